@@ -0,0 +1,131 @@
+"""
+聚类后端的一致性检查与性能对比
+
+使用方法：
+    python benchmarks/bench_clustering.py                    # 一致性检查 + 性能对比
+    python benchmarks/bench_clustering.py --check-only       # 只做一致性检查
+    python benchmarks/bench_clustering.py --sizes 10000 100000 --max-generic 20000
+
+点集与detectPraditor中的一致：40Hz最大值包络的相邻两帧(x[i], x[i+1])，
+eps = eps_ratio × 包络的80%分位值，min_samples = ceil(0.3 × 40)。
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.clustering import BACKENDS, DBSCAN, cluster_points
+
+
+MIN_SAMPLES = math.ceil(0.3 * 40)
+
+
+def synthetic_envelope(n_frames, rng, quantize=False):
+    """生成类似语音的40Hz包络：低幅噪声底噪 + 随机长度的高幅语音段"""
+    envelope = np.abs(rng.normal(0, 50, n_frames))
+    pos = 0
+    while pos < n_frames:
+        pos += int(rng.integers(10, 120))
+        length = int(rng.integers(5, 80))
+        envelope[pos:pos + length] += np.abs(rng.normal(rng.uniform(300, 3000), 400, len(envelope[pos:pos + length])))
+        pos += length
+    if quantize:  # 大量重复值，检验距离恰好为eps等边界情况
+        envelope = np.round(envelope / 25) * 25
+    return envelope
+
+
+def lag_points(envelope, eps_ratio):
+    """构造与detectPraditor相同的点集和eps"""
+    points = np.column_stack((envelope[:-1], envelope[1:]))
+    eps = eps_ratio * float(np.max(np.sort(envelope)[:int(.8 * len(envelope))]))
+    return points, eps
+
+
+def check_equivalence(n_cases=200, seed=0):
+    """随机生成点集，检查各后端输出的标签完全一致
+
+    Returns:
+        不一致的用例数
+    """
+    rng = np.random.default_rng(seed)
+    backends = [backend for backend in BACKENDS if backend != "sklearn" or DBSCAN is not None]
+    failures = 0
+
+    for case in range(n_cases):
+        n_frames = int(rng.integers(2, 3000))
+        quantize = case % 3 == 0
+        eps_ratio = float(rng.choice([0.02, 0.05, 0.1, 0.2, 0.5]))
+        min_samples = MIN_SAMPLES if case % 4 else int(rng.integers(1, 30))
+
+        if case % 5 == 0:  # 完全随机的点，包括负数坐标
+            points = rng.normal(0, 1, (n_frames, 2))
+            if quantize:
+                points = np.round(points * 4) / 4
+            eps = float(rng.uniform(0.05, 0.5))
+        else:
+            points, eps = lag_points(synthetic_envelope(n_frames, rng, quantize), eps_ratio)
+
+        results = {backend: cluster_points(points, eps, min_samples, backend=backend) for backend in backends}
+        reference = results[backends[0]]
+        for backend in backends[1:]:
+            if not np.array_equal(reference, results[backend]):
+                failures += 1
+                print(f"MISMATCH case={case} backend={backend} n={len(points)} eps={eps} min_samples={min_samples}")
+
+    print(f"Equivalence: {n_cases - failures}/{n_cases} cases identical across {', '.join(backends)}")
+    return failures
+
+
+def benchmark(sizes, max_generic, repeat=3, seed=1):
+    """在较长的输入上比较各后端耗时
+
+    Args:
+        sizes: 包络帧数列表（40帧 = 1秒音频）
+        max_generic: sklearn和kdtree后端的最大帧数，超过时跳过（两者需要保存所有邻居列表，内存占用很大）
+        repeat: 重复次数，取最小值
+        seed: 随机种子
+    """
+    rng = np.random.default_rng(seed)
+    backends = [backend for backend in BACKENDS if backend != "sklearn" or DBSCAN is not None]
+
+    print(f"{'frames':>10} {'audio':>10} " + " ".join(f"{backend:>10}" for backend in backends))
+    for n_frames in sizes:
+        points, eps = lag_points(synthetic_envelope(n_frames, rng), 0.05)
+        row = []
+        for backend in backends:
+            if backend != "grid" and n_frames > max_generic:
+                row.append(f"{'skipped':>10}")
+                continue
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cluster_points(points, eps, MIN_SAMPLES, backend=backend)
+                best = min(best, time.perf_counter() - start)
+            row.append(f"{best:>9.3f}s")
+        print(f"{n_frames:>10} {n_frames / 40 / 60:>8.1f}min " + " ".join(row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare clustering backends")
+    parser.add_argument("--check-only", action="store_true", help="Only run the equivalence checks")
+    parser.add_argument("--cases", type=int, default=200, help="Number of random equivalence cases")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2400, 12000, 72000, 288000], help="Envelope lengths in frames (40 frames = 1s)")
+    parser.add_argument("--max-generic", type=int, default=12000, help="Skip sklearn/kdtree above this many frames")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = check_equivalence(args.cases)
+    if not args.check_only:
+        benchmark(args.sizes, args.max_generic, args.repeat)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+滤波器实现的回归检查与性能对比
+
+使用方法：
+    python benchmarks/bench_filters.py                 # 使用resources/test_audio中的音频
+    python benchmarks/bench_filters.py a.wav b.wav     # 指定音频
+
+对每个音频和params.txt / params_vad.txt中的每组截止频率：
+- 比较sos（默认）与ba（旧版filtfilt）两种实现的输出差异（相对于信号RMS）；
+- 比较两种实现下detectPraditor的检测结果；
+- 检查低截止频率的窄带（如4-400Hz）下两种实现是否数值稳定；
+- 比较带缓存和不带缓存的滤波器设计耗时。
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.signal import butter
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.core.detection as detection
+import src.utils.audio as audio
+from src.utils.audio import ReadSound, bandpass_filter, design_filter
+from src.utils.params import get_default_params_path, read_params_file
+
+
+# 滤波输出的最大允许差异（相对于滤波后信号的RMS）
+MAX_RELATIVE_DIFF = 1e-3
+TEST_AUDIO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'resources', 'test_audio'))
+
+
+def cutoff_pairs():
+    """默认参数文件中出现的所有(cutoff0, cutoff1)"""
+    pairs = set()
+    for is_vad_mode in (False, True):
+        params = read_params_file(get_default_params_path(is_vad_mode))
+        for xset in params.values():
+            pairs.add((float(xset["cutoff0"]), float(xset["cutoff1"])))
+    return sorted(pairs)
+
+
+def detect_with(output, params, audio_obj, mode):
+    """使用指定的滤波实现运行detectPraditor（onset和offset）"""
+    original = audio.bandpass_filter
+
+    def patched(data, lowcut, highcut, fs, order=4, **kwargs):
+        return original(data, lowcut, highcut, fs, order=order, output=output, dtype=kwargs.get("dtype", np.float64))
+
+    detection.bandpass_filter = patched
+    try:
+        params = copy.deepcopy(params)
+        return (detection.detectPraditor(params, audio_obj, "onset", mode),
+                detection.detectPraditor(params, audio_obj, "offset", mode))
+    finally:
+        detection.bandpass_filter = original
+
+
+def check_file(fpath):
+    """检查一个音频文件
+
+    Returns:
+        不通过的检查项数
+    """
+    audio_obj = ReadSound(fpath)
+    data = np.array(audio_obj.get_array_of_samples())
+    failures = 0
+    print(f"{os.path.basename(fpath)} ({audio_obj.frame_rate} Hz, {len(data) / audio_obj.frame_rate:.1f}s)")
+
+    for lowcut, highcut in cutoff_pairs():
+        if highcut > audio_obj.frame_rate / 2:
+            continue
+        start = time.perf_counter()
+        sos_out = bandpass_filter(data, lowcut, highcut, audio_obj.frame_rate, output="sos")
+        sos_time = time.perf_counter() - start
+        start = time.perf_counter()
+        ba_out = bandpass_filter(data, lowcut, highcut, audio_obj.frame_rate, output="ba")
+        ba_time = time.perf_counter() - start
+
+        rms = float(np.sqrt(np.mean(sos_out ** 2))) or 1.0
+        relative_diff = float(np.max(np.abs(sos_out - ba_out))) / rms
+        ok = np.all(np.isfinite(sos_out)) and relative_diff <= MAX_RELATIVE_DIFF
+        failures += not ok
+        print(f"  {lowcut:>6.0f}-{highcut:<6.0f} Hz  sos {sos_time:.3f}s  ba {ba_time:.3f}s  "
+              f"max diff {relative_diff:.2e} x RMS  {'OK' if ok else 'FAIL'}")
+
+    # 低截止频率的窄带：ba形式的极点贴近单位圆
+    for lowcut, highcut in [(4, 400), (4, 1000)]:
+        sos_ok = bool(np.all(np.isfinite(bandpass_filter(data, lowcut, highcut, audio_obj.frame_rate, output="sos"))))
+        with np.errstate(all="ignore"):
+            ba_ok = bool(np.all(np.isfinite(bandpass_filter(data, lowcut, highcut, audio_obj.frame_rate, output="ba"))))
+        failures += not sos_ok
+        print(f"  {lowcut:>6.0f}-{highcut:<6.0f} Hz  sos {'stable' if sos_ok else 'NaN/inf'}  ba {'stable' if ba_ok else 'NaN/inf'}")
+
+    for mode in ("general", "vad"):
+        params = read_params_file(get_default_params_path(mode == "vad"))
+        sos_result = detect_with("sos", params, audio_obj, mode)
+        ba_result = detect_with("ba", params, audio_obj, mode)
+        diffs = [
+            float(np.max(np.abs(np.array(sorted(a)) - np.array(sorted(b))))) if len(a) == len(b) and a else 0.0
+            for a, b in zip(sos_result, ba_result)
+        ]
+        same_count = all(len(a) == len(b) for a, b in zip(sos_result, ba_result))
+        ok = same_count and max(diffs) < 0.001
+        failures += not ok
+        print(f"  detectPraditor ({mode}): onsets {len(sos_result[0])}/{len(ba_result[0])}, "
+              f"offsets {len(sos_result[1])}/{len(ba_result[1])}, max shift {max(diffs) * 1000:.3f}ms  {'OK' if ok else 'FAIL'}")
+
+    return failures
+
+
+def bench_design(repeat=2000):
+    """带缓存与不带缓存的滤波器设计耗时"""
+    wn = (4 / 11025, 10800 / 11025)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        butter(4, wn, btype="bandpass", output="sos")
+    uncached = time.perf_counter() - start
+
+    design_filter.cache_clear()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        design_filter(4, wn, "bandpass", "sos")
+    cached = time.perf_counter() - start
+    print(f"Filter design x{repeat}: butter {uncached:.3f}s, cached {cached:.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the sos and ba band-pass filter paths")
+    parser.add_argument("files", nargs="*", help="Audio files (default: resources/test_audio)")
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(
+        os.path.join(TEST_AUDIO_DIR, fname) for fname in os.listdir(TEST_AUDIO_DIR) if audio.isAudioFile(fname)
+    )
+    failures = sum(check_file(fpath) for fpath in files)
+    bench_design()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
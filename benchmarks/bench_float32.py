@@ -0,0 +1,119 @@
+"""
+float32分析数组的精度检查与内存对比
+
+使用方法：
+    python benchmarks/bench_float32.py                 # 使用resources/test_audio中的音频
+    python benchmarks/bench_float32.py a.wav b.wav     # 指定音频
+
+对每个音频分别以float64（默认）和float32运行run_detection（通用模式和VAD模式）：
+- 比较滤波输出的差异（相对于滤波后信号的RMS）；
+- 比较检测结果的数量和最大偏移；
+- 比较AnalysisContext中缓存数组的内存占用和检测耗时。
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.context import AnalysisContext
+from src.core.detection import run_detection
+from src.utils.audio import ReadSound, isAudioFile
+from src.utils.params import get_default_params_path, read_params_file
+
+
+# 滤波输出的最大允许差异（相对于滤波后信号的RMS）
+MAX_RELATIVE_DIFF = 1e-5
+# 检测结果的最大允许偏移（秒）
+MAX_SHIFT = 0.001
+TEST_AUDIO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'resources', 'test_audio'))
+
+
+def context_nbytes(context):
+    """AnalysisContext中缓存数组占用的字节数"""
+    return sum(filtered.nbytes for filtered in context.cached_arrays().values())
+
+
+def detect(fpath, mode, dtype):
+    """以指定的分析类型运行run_detection
+
+    Returns:
+        (onsets, offsets, 耗时)
+    """
+    audio_obj = ReadSound(fpath, analysis_dtype=dtype)
+    params = copy.deepcopy(read_params_file(get_default_params_path(mode == "vad")))
+    start = time.perf_counter()
+    onsets, offsets = run_detection(params, audio_obj, mode)
+    return onsets, offsets, time.perf_counter() - start
+
+
+def max_shift(a, b):
+    """两组时间点之间的最大偏移（数量不同时返回inf）"""
+    if len(a) != len(b):
+        return float("inf")
+    if not a:
+        return 0.0
+    return float(np.max(np.abs(np.array(sorted(a)) - np.array(sorted(b)))))
+
+
+def check_file(fpath):
+    """检查一个音频文件
+
+    Returns:
+        不通过的检查项数
+    """
+    failures = 0
+    print(os.path.basename(fpath))
+
+    contexts = {dtype: AnalysisContext(ReadSound(fpath, analysis_dtype=dtype)) for dtype in ("float64", "float32")}
+    cutoffs = sorted({
+        (float(xset["cutoff0"]), float(xset["cutoff1"]))
+        for is_vad_mode in (False, True)
+        for xset in read_params_file(get_default_params_path(is_vad_mode)).values()
+    })
+    for cutoff0, cutoff1 in cutoffs:
+        if cutoff1 > contexts["float64"].frame_rate / 2:
+            continue
+        reference = contexts["float64"].filtered(cutoff0, cutoff1)
+        candidate = contexts["float32"].filtered(cutoff0, cutoff1)
+        rms = float(np.sqrt(np.mean(reference ** 2))) or 1.0
+        relative_diff = float(np.max(np.abs(reference - candidate))) / rms
+        ok = relative_diff <= MAX_RELATIVE_DIFF
+        failures += not ok
+        print(f"  filter {cutoff0:>6.0f}-{cutoff1:<6.0f} Hz  max diff {relative_diff:.2e} x RMS  {'OK' if ok else 'FAIL'}")
+
+    nbytes = {dtype: context_nbytes(context) for dtype, context in contexts.items()}
+    print(f"  context arrays: float64 {nbytes['float64'] / 2 ** 20:.1f} MiB, float32 {nbytes['float32'] / 2 ** 20:.1f} MiB")
+
+    for mode in ("general", "vad"):
+        onsets64, offsets64, time64 = detect(fpath, mode, "float64")
+        onsets32, offsets32, time32 = detect(fpath, mode, "float32")
+        shift = max(max_shift(onsets64, onsets32), max_shift(offsets64, offsets32))
+        ok = shift <= MAX_SHIFT
+        failures += not ok
+        print(f"  run_detection ({mode}): onsets {len(onsets64)}/{len(onsets32)}, offsets {len(offsets64)}/{len(offsets32)}, "
+              f"max shift {shift * 1000:.3f}ms, {time64:.2f}s/{time32:.2f}s  {'OK' if ok else 'FAIL'}")
+
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare float32 and float64 analysis arrays")
+    parser.add_argument("files", nargs="*", help="Audio files (default: resources/test_audio)")
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(
+        os.path.join(TEST_AUDIO_DIR, fname) for fname in os.listdir(TEST_AUDIO_DIR) if isAudioFile(fname)
+    )
+    failures = sum(check_file(fpath) for fpath in files)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
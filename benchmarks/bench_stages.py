@@ -0,0 +1,218 @@
+"""
+detectPraditor和segment_audio各阶段耗时的基准测试（合成音频）
+
+使用方法：
+    python benchmarks/bench_stages.py                              # 默认：16/44.1/48/96kHz × 1s/10s/60s
+    python benchmarks/bench_stages.py --full                       # 1s到1小时
+    python benchmarks/bench_stages.py --rates 44100 --durations 600 --output stages.json
+    python benchmarks/bench_stages.py --compare old.json           # 与之前的结果对比
+
+对每个(采样率, 时长)生成确定性的合成语音（见synthetic.py），运行完整的run_detection，
+分别统计以下阶段的耗时（不含内部其他阶段，即"自身耗时"）和调用次数：
+- filtering:     带通滤波
+- downsampling:  40Hz最大值包络
+- clustering:    包络点聚类
+- compensation:  选出噪声类、补偿并合并成候选区间
+- refinement:    在滤波后的音频上细化候选区间
+- segmentation:  segment_audio中寻找切分点等其余部分
+- other:         run_detection中剩余的部分（切片、结果合并等）
+结果写入JSON文件，--compare时逐项与另一份结果对比。
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.core.context as context_module
+import src.core.detection as detection
+from src.utils.params import get_default_params_path, read_params_file
+from synthetic import as_read_sound, synthetic_speech
+
+
+DEFAULT_RATES = [16000, 44100, 48000, 96000]
+DEFAULT_DURATIONS = [1, 10, 60]
+FULL_DURATIONS = [1, 10, 60, 600, 3600]
+# 对比时认为变慢的阈值（相对变化）和最小绝对变化（秒），避免噪声误报
+REGRESSION_RATIO = 0.2
+REGRESSION_MIN_SECONDS = 0.05
+
+
+class StageTimer:
+    """把模块中的函数替换为计时包装，统计各阶段的自身耗时
+
+    嵌套调用时，内层阶段的耗时从外层阶段中扣除，因此各阶段之和等于总耗时。
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self._stack = []
+        self._patched = []
+
+    def wrap(self, owner, name, stage):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                inner = self._stack.pop()
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed - inner
+                self.calls[stage] = self.calls.get(stage, 0) + 1
+                if self._stack:
+                    self._stack[-1] += elapsed
+
+        setattr(owner, name, timed)
+        self._patched.append((owner, name, original))
+
+    def __enter__(self):
+        self.wrap(context_module, "bandpass_filter", "filtering")
+        self.wrap(detection, "bandpass_filter", "filtering")
+        self.wrap(context_module.AnalysisContext, "clip_arrays", "downsampling")
+        self.wrap(detection, "cluster_envelope", "clustering")
+        self.wrap(detection, "regions_from_labels", "compensation")
+        self.wrap(detection, "refine_regions", "refinement")
+        self.wrap(detection, "segment_audio", "segmentation")
+        self.wrap(detection, "run_detection", "other")
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+
+def detection_params(frame_rate, mode):
+    """默认参数；LowPass超过奈奎斯特频率时降到0.45倍采样率（与真实使用时手动调低一致）"""
+    params = copy.deepcopy(read_params_file(get_default_params_path(mode == "vad")))
+    for xset in params.values():
+        xset["cutoff1"] = str(min(float(xset["cutoff1"]), 0.45 * frame_rate))
+    return params
+
+
+def run_case(frame_rate, duration, mode, seed, repeat):
+    """运行一个用例，返回结果字典（各阶段取最快一次的耗时）"""
+    start = time.perf_counter()
+    arr, truth = synthetic_speech(duration, frame_rate, seed)
+    generate = time.perf_counter() - start
+
+    best = None
+    for _ in range(repeat):
+        audio_obj = as_read_sound(arr, frame_rate)
+        with StageTimer() as timer:
+            start = time.perf_counter()
+            onsets, offsets = detection.run_detection(detection_params(frame_rate, mode), audio_obj, mode)
+            total = time.perf_counter() - start
+        if best is None or total < best["total"]:
+            best = {"total": total, "seconds": dict(timer.seconds), "calls": dict(timer.calls)}
+
+    return {
+        "frame_rate": frame_rate,
+        "duration": duration,
+        "mode": mode,
+        "seed": seed,
+        "bursts": len(truth),
+        "onsets": len(onsets),
+        "offsets": len(offsets),
+        "generate_seconds": round(generate, 4),
+        "total_seconds": round(best["total"], 4),
+        "stages": {
+            stage: {"seconds": round(best["seconds"][stage], 4), "calls": best["calls"][stage]}
+            for stage in sorted(best["seconds"])
+        },
+    }
+
+
+def case_key(case):
+    return f"{case['mode']}/{case['frame_rate']}Hz/{case['duration']:g}s"
+
+
+def compare(results, baseline_path):
+    """与之前的结果文件逐项对比
+
+    Returns:
+        变慢的项数
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {case_key(case): case for case in json.load(f)["cases"]}
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for case in results["cases"]:
+        old = baseline.get(case_key(case))
+        if old is None:
+            continue
+        rows = [("total", old["total_seconds"], case["total_seconds"])]
+        rows += [
+            (stage, old["stages"].get(stage, {}).get("seconds", 0.0), info["seconds"])
+            for stage, info in case["stages"].items()
+        ]
+        for name, before, after in rows:
+            slower = after - before > REGRESSION_MIN_SECONDS and after > before * (1 + REGRESSION_RATIO)
+            regressions += slower
+            if slower or name == "total":
+                print(f"  {case_key(case):<24} {name:<14} {before:>8.3f}s -> {after:>8.3f}s  {'SLOWER' if slower else ''}")
+        if (old["onsets"], old["offsets"]) != (case["onsets"], case["offsets"]):
+            print(f"  {case_key(case):<24} detections changed: {old['onsets']}/{old['offsets']} -> {case['onsets']}/{case['offsets']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each detection stage on synthetic audio")
+    parser.add_argument("--rates", type=int, nargs="+", default=DEFAULT_RATES, help="Sample rates")
+    parser.add_argument("--durations", type=float, nargs="+", default=None, help=f"Durations in seconds (default: {DEFAULT_DURATIONS})")
+    parser.add_argument("--full", action="store_true", help=f"Use durations {FULL_DURATIONS}")
+    parser.add_argument("--modes", nargs="+", choices=["general", "vad"], default=["general", "vad"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat each case and keep the fastest run")
+    parser.add_argument("--output", default="bench_stages.json", help="Results file (default: bench_stages.json)")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.getLogger("Praditor").setLevel(logging.WARNING)
+
+    durations = args.durations or (FULL_DURATIONS if args.full else DEFAULT_DURATIONS)
+    results = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "cases": [],
+    }
+
+    stages = ["filtering", "downsampling", "clustering", "compensation", "refinement", "segmentation", "other"]
+    print(f"{'case':<24} {'total':>8} " + " ".join(f"{stage[:12]:>12}" for stage in stages))
+    for mode in args.modes:
+        for frame_rate in args.rates:
+            for duration in durations:
+                case = run_case(frame_rate, duration, mode, args.seed, args.repeat)
+                results["cases"].append(case)
+                print(f"{case_key(case):<24} {case['total_seconds']:>7.3f}s " + " ".join(
+                    f"{case['stages'].get(stage, {}).get('seconds', 0.0):>11.3f}s" for stage in stages
+                ))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
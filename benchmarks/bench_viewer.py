@@ -0,0 +1,181 @@
+"""
+AudioViewer拖动滚动时的帧率测试
+
+使用方法：
+    python benchmarks/bench_viewer.py                        # 60秒的合成语音
+    python benchmarks/bench_viewer.py <audio_file>           # 指定音频
+    python benchmarks/bench_viewer.py --duration 600 --frames 300 --interval-ms 12800
+    python benchmarks/bench_viewer.py --markers 2000 --labels   # 2000对onset/offset（类似VAD结果），显示时间标签
+    python benchmarks/bench_viewer.py --event-rate 500          # 回放时鼠标每秒500个移动事件
+
+模拟在图表上按住鼠标向左拖动（与真实拖动相同的处理），分两部分测试：
+1. 帧率：每一帧发送一次鼠标移动事件，再同步重绘一次图表，统计每秒能完成的帧数；
+2. 回放：按固定的事件频率发送鼠标移动事件（像真实的鼠标一样不等待重绘），
+   统计实际重绘的次数，以及最后一个事件之后还需要多久才能处理完（拖动的滞后）。
+默认在offscreen平台上运行，--show时显示窗口。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from synthetic import synthetic_speech
+
+
+def drag_fps(viewer, app, frames, step_px):
+    """模拟拖动，返回(帧率, 每帧耗时列表)"""
+    from PySide6.QtCore import QEvent, QPointF, Qt
+    from PySide6.QtGui import QMouseEvent
+
+    def mouse_event(event_type, x, buttons):
+        return QMouseEvent(event_type, QPointF(x, 10), QPointF(x, 10), Qt.LeftButton, buttons, Qt.NoModifier)
+
+    x = viewer.chart_view.width() - 1
+    viewer.chart_mouse_press_event(mouse_event(QEvent.MouseButtonPress, x, Qt.LeftButton))
+    frame_times = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        x -= step_px
+        if x < 0:  # 拖到左边后松开，从右边重新开始
+            viewer.chart_mouse_release_event(mouse_event(QEvent.MouseButtonRelease, 0, Qt.NoButton))
+            x = viewer.chart_view.width() - 1
+            viewer.chart_mouse_press_event(mouse_event(QEvent.MouseButtonPress, x, Qt.LeftButton))
+        viewer.chart_mouse_move_event(mouse_event(QEvent.MouseMove, x, Qt.LeftButton))
+        app.processEvents()
+        if getattr(viewer, "redraw_pending", None):  # 不等待重绘调度，立即重绘
+            viewer.redraw_timer.stop()
+            viewer.flushRedraw()
+        viewer.chart_view.viewport().repaint()
+        frame_times.append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+    viewer.chart_mouse_release_event(mouse_event(QEvent.MouseButtonRelease, x, Qt.NoButton))
+    return frames / elapsed, frame_times
+
+
+def drag_replay(viewer, app, seconds, event_rate, step_px):
+    """按固定频率回放鼠标拖动事件（由事件循环中的定时器发送，和真实的鼠标一样不等待重绘）
+
+    Returns:
+        (事件数, 重绘次数, 滞后秒数)：滞后为预定的最后一个事件时间之后到所有重绘完成的时间
+    """
+    from PySide6.QtCore import QEvent, QEventLoop, QPointF, Qt, QTimer
+    from PySide6.QtGui import QMouseEvent
+
+    def mouse_event(event_type, x, buttons):
+        return QMouseEvent(event_type, QPointF(x, 10), QPointF(x, 10), Qt.LeftButton, buttons, Qt.NoModifier)
+
+    redraws = [0]
+    update_chart = viewer.updateChart
+
+    def counted_update_chart():
+        redraws[0] += 1
+        update_chart()
+
+    viewer.updateChart = counted_update_chart
+    width = viewer.chart_view.width()
+    state = {"x": width - 1, "sent": 0}
+    n_events = int(seconds * event_rate)
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setTimerType(Qt.PreciseTimer)
+    timer.setInterval(max(1, round(1000 / event_rate)))
+
+    def send():
+        if state["sent"] == n_events:
+            # 所有事件已发出，等待合并的重绘完成
+            if not getattr(viewer, "redraw_pending", None):
+                timer.stop()
+                loop.quit()
+            return
+        # 与真实的鼠标一样，处理不过来时事件在队列中积压，之后一次性送达
+        due = min(n_events, int((time.perf_counter() - start) * event_rate) + 1)
+        while state["sent"] < due:
+            state["x"] -= step_px
+            if state["x"] < 0:
+                state["x"] = width - 1
+                viewer.last_mouse_pos = state["x"]
+            viewer.chart_mouse_move_event(mouse_event(QEvent.MouseMove, state["x"], Qt.LeftButton))
+            state["sent"] += 1
+
+    viewer.chart_mouse_press_event(mouse_event(QEvent.MouseButtonPress, state["x"], Qt.LeftButton))
+    timer.timeout.connect(send)
+    start = time.perf_counter()
+    timer.start()
+    loop.exec()
+    # 处理不过来时事件会越来越晚发出，所以和预定的结束时间比较
+    lag = max(0.0, time.perf_counter() - (start + n_events / event_rate))
+    viewer.chart_mouse_release_event(mouse_event(QEvent.MouseButtonRelease, state["x"], Qt.NoButton))
+    viewer.updateChart = update_chart
+    return n_events, redraws[0], lag
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure AudioViewer frames per second while drag-scrolling")
+    parser.add_argument("audio", nargs="?", default=None, help="Audio file (default: synthetic speech)")
+    parser.add_argument("--duration", type=float, default=60, help="Synthetic audio duration in seconds (default: 60)")
+    parser.add_argument("--frame-rate", type=int, default=44100, help="Synthetic audio sample rate (default: 44100)")
+    parser.add_argument("--frames", type=int, default=200, help="Number of drag steps (default: 200)")
+    parser.add_argument("--step-px", type=int, default=5, help="Mouse movement per step in pixels (default: 5)")
+    parser.add_argument("--interval-ms", type=int, default=None, help="Visible window in ms (default: the viewer's default)")
+    parser.add_argument("--replay-seconds", type=float, default=3, help="Length of the replayed drag in seconds (default: 3)")
+    parser.add_argument("--event-rate", type=int, default=250, help="Mouse move events per second in the replay (default: 250)")
+    parser.add_argument("--markers", type=int, default=0, help="Number of random onset/offset pairs to draw (default: 0)")
+    parser.add_argument("--labels", action="store_true", help="Show the time labels, as when the mouse is over the chart")
+    parser.add_argument("--show", action="store_true", help="Show the window instead of rendering offscreen")
+    args = parser.parse_args(argv)
+
+    if not args.show:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    from src.gui.plots import AudioViewer
+
+    app = QApplication.instance() or QApplication([])
+
+    audio_path = args.audio
+    temp_dir = None
+    if audio_path is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        audio_path = os.path.join(temp_dir.name, "synthetic.wav")
+        arr, _ = synthetic_speech(args.duration, args.frame_rate)
+        sf.write(audio_path, arr, args.frame_rate)
+
+    viewer = AudioViewer()
+    viewer.resize(1200, 400)
+    viewer.show()
+    if args.interval_ms:
+        viewer.interval_ms = args.interval_ms
+    viewer.tg_dict_tp = viewer.readAudio(audio_path)
+    if args.markers:
+        onsets = np.sort(np.random.default_rng(0).uniform(0, viewer.audio_obj.duration_seconds - 0.1, args.markers))
+        viewer.tg_dict_tp = {"onset": onsets.tolist(), "offset": (onsets + 0.05).tolist()}
+        viewer.updateXset(viewer.tg_dict_tp)
+    viewer.time_labels_visible = args.labels
+    app.processEvents()
+
+    fps, frame_times = drag_fps(viewer, app, args.frames, args.step_px)
+    frame_ms = np.array(frame_times) * 1000
+    print(f"{os.path.basename(audio_path)}: window {viewer.interval_ms}ms, {viewer.resolution} columns, "
+          f"{2 * args.markers} markers, {args.frames} frames")
+    print(f"{fps:.1f} fps  (frame time median {np.median(frame_ms):.2f}ms, p95 {np.percentile(frame_ms, 95):.2f}ms, max {frame_ms.max():.2f}ms)")
+
+    n_events, redraws, lag = drag_replay(viewer, app, args.replay_seconds, args.event_rate, args.step_px)
+    elapsed = args.replay_seconds + lag
+    print(f"replay: {n_events} events at {args.event_rate}/s -> {redraws} redraws ({redraws / elapsed:.1f}/s), "
+          f"lag after the last event {lag * 1000:.0f}ms")
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+标准输出回归检查：检测结果是否与已标注的结果一致，并记录耗时和峰值内存
+
+使用方法：
+    python benchmarks/check_golden.py                              # resources/test_audio中的标准结果
+    python benchmarks/check_golden.py <folder> --tolerance 0.005   # 自己标注的文件夹
+    python benchmarks/check_golden.py --cluster-backend grid --dtype float32 --segment-workers 2
+    python benchmarks/check_golden.py --output golden.json         # 结果写入JSON，便于版本间对比
+
+每个音频的标准结果按以下顺序查找（VAD模式为<文件名>_vad.*）：
+<文件名>.csv（Praditor输出的CSV格式），<文件名>.TextGrid。
+参数与GUI/批处理一样按File→Folder→Default优先级加载。检测结果不写出任何文件。
+
+通过条件：onset和offset的数量与标准结果相同，且按时间顺序一一对应的误差都不超过tolerance。
+"""
+
+import argparse
+import copy
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.batch import list_audio_files
+from src.core.clustering import BACKENDS
+from src.core.detection import postprocess_vad, run_detection
+from src.core.evaluation import load_reference
+from src.utils.audio import ReadSound
+from src.utils.params import load_params
+
+
+TEST_AUDIO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'resources', 'test_audio'))
+# 默认允许的误差（秒）。整段滤波与逐段滤波在片段边界附近会有几毫秒的差异
+DEFAULT_TOLERANCE = 0.015
+
+
+def load_expected(audio_file_path, is_vad_mode):
+    """读取音频对应的标准结果
+
+    Returns:
+        (onsets, offsets)；没有标准结果时返回None
+    """
+    stem = os.path.splitext(audio_file_path)[0] + ("_vad" if is_vad_mode else "")
+    if os.path.exists(stem + ".csv"):
+        with open(stem + ".csv", "r", newline="", encoding="utf-8") as csvfile:
+            rows = list(csv.DictReader(csvfile))
+        if is_vad_mode:
+            return [float(row["minTime"]) for row in rows], [float(row["maxTime"]) for row in rows]
+        return ([float(row["onset"]) for row in rows if row["onset"]],
+                [float(row["offset"]) for row in rows if row["offset"]])
+    if os.path.exists(stem + ".TextGrid"):
+        return load_reference(stem + ".TextGrid", is_vad_mode)
+    return None
+
+
+def max_deviation(detected, expected):
+    """数量相同时返回按时间顺序一一对应的最大误差（秒），数量不同时返回inf"""
+    if len(detected) != len(expected):
+        return float("inf")
+    if not expected:
+        return 0.0
+    return float(np.max(np.abs(np.sort(detected) - np.sort(expected))))
+
+
+def detect(audio_file_path, mode, options):
+    """运行检测（与批处理相同的流程，但不写出文件）"""
+    is_vad_mode = mode == "vad"
+    audio_obj = ReadSound(audio_file_path, analysis_dtype=options["analysis_dtype"])
+    params = copy.deepcopy(load_params(audio_file_path, is_vad_mode))
+    onsets, offsets = run_detection(params, audio_obj, mode, cluster_backend=options["cluster_backend"],
+                                    shared_context=options["shared_context"], single_pass=options["single_pass"],
+                                    workers=options["segment_workers"])
+    if is_vad_mode:
+        onsets, offsets = postprocess_vad(onsets, offsets, audio_obj.duration_seconds)
+    return onsets, offsets
+
+
+def check_file(audio_file_path, mode, expected, options, tolerance, measure_memory=True):
+    """检查一个音频文件
+
+    Returns:
+        结果字典
+    """
+    start = time.perf_counter()
+    onsets, offsets = detect(audio_file_path, mode, options)
+    wall_time = time.perf_counter() - start
+
+    peak_memory = None
+    if measure_memory:  # tracemalloc会拖慢检测，单独再运行一次
+        tracemalloc.start()
+        detect(audio_file_path, mode, options)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    onset_deviation = max_deviation(onsets, expected[0])
+    offset_deviation = max_deviation(offsets, expected[1])
+    return {
+        "file": os.path.basename(audio_file_path),
+        "mode": mode,
+        "passed": max(onset_deviation, offset_deviation) <= tolerance,
+        "onsets": [len(onsets), len(expected[0])],
+        "offsets": [len(offsets), len(expected[1])],
+        "onset_max_deviation": onset_deviation,
+        "offset_max_deviation": offset_deviation,
+        "wall_time": round(wall_time, 4),
+        "peak_memory": peak_memory,
+    }
+
+
+def format_deviation(seconds):
+    return "count differs" if seconds == float("inf") else f"{seconds * 1000:.2f}ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check detections against annotated outputs")
+    parser.add_argument("folders", nargs="*", help="Folders with audio and expected CSV/TextGrid files (default: resources/test_audio)")
+    parser.add_argument("--modes", nargs="+", choices=["general", "vad"], default=["general", "vad"])
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help=f"Allowed deviation in seconds (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--cluster-backend", choices=BACKENDS, default=None)
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64")
+    parser.add_argument("--single-pass", action="store_true")
+    parser.add_argument("--segment-workers", type=int, default=1)
+    parser.add_argument("--no-shared-context", action="store_true", help="Filter every clip separately (legacy path)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.getLogger("Praditor").setLevel(logging.WARNING)
+
+    options = {
+        "cluster_backend": args.cluster_backend,
+        "analysis_dtype": args.dtype,
+        "single_pass": args.single_pass,
+        "segment_workers": args.segment_workers,
+        "shared_context": not args.no_shared_context,
+    }
+
+    results = []
+    for folder in args.folders or [TEST_AUDIO_DIR]:
+        for audio_file_path in list_audio_files(folder):
+            for mode in args.modes:
+                expected = load_expected(audio_file_path, mode == "vad")
+                if expected is None:
+                    continue
+                result = check_file(audio_file_path, mode, expected, options, args.tolerance, not args.no_memory)
+                results.append(result)
+                memory = f"{result['peak_memory'] / 2 ** 20:7.1f} MiB" if result["peak_memory"] is not None else ""
+                print(f"{result['file']:<32} {mode:<8} onsets {result['onsets'][0]:>4}/{result['onsets'][1]:<4} "
+                      f"{format_deviation(result['onset_max_deviation']):>14}  offsets {result['offsets'][0]:>4}/{result['offsets'][1]:<4} "
+                      f"{format_deviation(result['offset_max_deviation']):>14}  {result['wall_time']:7.3f}s {memory}  "
+                      f"{'OK' if result['passed'] else 'FAIL'}")
+
+    failures = sum(not result["passed"] for result in results)
+    print(f"{len(results) - failures}/{len(results)} passed (tolerance {args.tolerance * 1000:g}ms)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "tolerance": args.tolerance, "results": results}, f, indent=2)
+    return 1 if failures or not results else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+确定性的合成语音音频，用于基准测试
+
+有色（粉红）噪声底噪上叠加随机长度的类语音片段：基频90-250Hz的谐波串，
+带起音/衰减包络和少量摩擦噪声。同样的参数总是生成同样的采样点，
+并返回每个片段的真实起止时间。
+
+使用方法：
+    from synthetic import synthetic_speech
+    arr, truth = synthetic_speech(60, 44100, seed=0)
+    audio_obj = as_read_sound(arr, 44100)
+
+    python benchmarks/synthetic.py out.wav --duration 60 --rate 44100   # 写出wav文件
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+from scipy.signal import lfilter
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.audio import ReadSound
+
+
+# Paul Kellet的粉红噪声近似滤波器（-3dB/倍频程）
+PINK_B = [0.049922035, -0.095993537, 0.050612699, -0.004408786]
+PINK_A = [1, -2.494956002, 2.017265875, -0.522189400]
+# 每次生成的最大采样点数，控制长音频的内存占用
+CHUNK_SAMPLES = 1 << 22
+
+
+def burst_times(duration, rng, min_pause=0.15, max_pause=1.2, min_burst=0.1, max_burst=0.8):
+    """生成交替的停顿和语音片段
+
+    Returns:
+        [(onset, offset), ...]，单位为秒
+    """
+    times = []
+    t = float(rng.uniform(min_pause, max_pause))
+    while True:
+        length = float(rng.uniform(min_burst, max_burst))
+        if t + length > duration - min_pause:
+            break
+        times.append((t, t + length))
+        t += length + float(rng.uniform(min_pause, max_pause))
+    return times
+
+
+def _burst(n, frame_rate, rng):
+    """一个类语音片段（float，峰值约为1）"""
+    t = np.arange(n) / frame_rate
+    f0 = float(rng.uniform(90, 250))
+    f0_curve = f0 * (1 + 0.1 * np.sin(2 * np.pi * float(rng.uniform(2, 5)) * t))  # 缓慢的基频变化
+    phase = 2 * np.pi * np.cumsum(f0_curve) / frame_rate
+
+    signal = np.zeros(n)
+    for harmonic in range(1, int(min(4000, frame_rate / 2 - 1) // (f0 * 1.1)) + 1):
+        signal += np.sin(harmonic * phase) / harmonic
+    signal += 0.1 * rng.standard_normal(n)  # 摩擦噪声
+
+    # 起音和衰减（各约20ms）
+    ramp = min(int(0.02 * frame_rate), n // 2)
+    envelope = np.ones(n)
+    if ramp:
+        envelope[:ramp] = np.linspace(0, 1, ramp)
+        envelope[-ramp:] = np.linspace(1, 0, ramp)
+    return signal * envelope / (np.max(np.abs(signal)) or 1.0)
+
+
+def synthetic_speech(duration, frame_rate, seed=0, snr_db=25, level=0.5):
+    """生成合成语音
+
+    Args:
+        duration: 时长（秒）
+        frame_rate: 采样率
+        seed: 随机种子
+        snr_db: 语音片段峰值相对底噪RMS的信噪比（dB）
+        level: 语音片段峰值（相对int16满幅）
+
+    Returns:
+        (int16数组, 真实起止时间列表)
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(duration * frame_rate)
+    times = burst_times(duration, rng)
+    arr = np.empty(n_samples, dtype=np.int16)
+
+    peak = level * 32767
+    noise_rms = peak / 10 ** (snr_db / 20)
+    zi = np.zeros(len(PINK_A) - 1)
+    bursts = iter(times)
+    pending = next(bursts, None)
+    active = []  # 跨越块边界的片段：(起点, 波形)
+
+    for start in range(0, n_samples, CHUNK_SAMPLES):
+        stop = min(start + CHUNK_SAMPLES, n_samples)
+        noise, zi = lfilter(PINK_B, PINK_A, rng.standard_normal(stop - start), zi=zi)
+        chunk = noise * (noise_rms / 0.1)  # 滤波后白噪声的RMS约为0.1
+
+        while pending is not None and int(pending[0] * frame_rate) < stop:
+            onset, offset = int(pending[0] * frame_rate), int(pending[1] * frame_rate)
+            active.append((onset, _burst(offset - onset, frame_rate, rng) * peak))
+            pending = next(bursts, None)
+
+        remaining = []
+        for onset, wave in active:
+            lo, hi = max(onset, start), min(onset + len(wave), stop)
+            chunk[lo - start:hi - start] += wave[lo - onset:hi - onset]
+            if onset + len(wave) > stop:
+                remaining.append((onset, wave))
+        active = remaining
+
+        arr[start:stop] = np.clip(np.round(chunk), -32768, 32767)
+    return arr, times
+
+
+def as_read_sound(arr, frame_rate, analysis_dtype=np.float64):
+    """把数组包装为ReadSound对象"""
+    return ReadSound(arr=arr, duration_seconds=len(arr) / frame_rate, frame_rate=frame_rate, analysis_dtype=analysis_dtype)
+
+
+def main(argv=None):
+    import soundfile as sf
+
+    parser = argparse.ArgumentParser(description="Write a synthetic speech-like recording")
+    parser.add_argument("output", help="Output .wav path")
+    parser.add_argument("--duration", type=float, default=60, help="Duration in seconds (default: 60)")
+    parser.add_argument("--rate", type=int, default=44100, help="Sample rate (default: 44100)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    arr, times = synthetic_speech(args.duration, args.rate, args.seed)
+    sf.write(args.output, arr, args.rate, subtype="PCM_16")
+    print(f"{args.output}: {args.duration}s at {args.rate} Hz, {len(times)} bursts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
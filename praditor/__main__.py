@@ -0,0 +1,11 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
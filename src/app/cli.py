@@ -0,0 +1,230 @@
+"""
+Praditor命令行入口（不依赖Qt）
+
+使用方法：
+    python -m praditor batch <folder>                # 默认模式，批量检测文件夹内所有音频
+    python -m praditor batch <folder> --mode vad     # VAD模式
+    python -m praditor batch <folder> --workers 8    # 指定进程数
+    python -m praditor batch <folder> --cluster-backend grid   # 指定聚类后端
+    python -m praditor batch <folder> --mode vad --single-pass  # VAD模式只检测一遍
+    python -m praditor batch <folder> --workers 1 --segment-workers 8   # 少量长录音：文件内部分段并行
+    python -m praditor batch <folder> --dtype float32   # 分析数组使用float32，内存减半
+    python -m praditor batch <folder> --stats   # 为每个文件写出各阶段耗时和计数（<文件名>_stats.json）
+    python -m praditor batch <folder> --force   # 忽略结果缓存，全部重新检测（默认跳过音频和参数都没有改变的文件）
+    python -m praditor batch <folder> --channel 2   # 多声道音频检测第二个声道（默认第一个；mix为各声道平均）
+    python -m praditor batch <folder> --channel all   # 每个声道分别（并行）检测，TextGrid中每个声道一组tier
+    python -m praditor sweep <folder> --grid amp=1.4,1.6,1.8 eps_ratio=0.015,0.02   # 网格扫描参数
+    python -m praditor sweep <folder> --random 50 --range onset.amp=1.2:2.0 --reference <folder>  # 随机扫描并与参考标注比较
+    python -m praditor evaluate <results> <reference>              # 各误差阈值下的命中率（替代legacy统计脚本）
+    python -m praditor evaluate <results> <reference> --first-only  # 每个文件只比较第一个onset
+    python -m praditor evaluate <chronset> <reference> --chronset   # 评估Chronset的txt结果
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.clustering import BACKENDS, DEFAULT_BACKEND
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="praditor", description="Praditor command line interface")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = subparsers.add_parser("batch", help="Run detection on every audio file in a folder")
+    batch_parser.add_argument("folder", help="Folder containing audio files")
+    batch_parser.add_argument("--mode", choices=["general", "vad"], default="general", help="Detection mode (default: general)")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    batch_parser.add_argument("--params", default=None, help="Params file applied to every audio (default: File > Folder > Default)")
+    batch_parser.add_argument("--cluster-backend", choices=BACKENDS, default=None, help=f"Clustering backend (default: {DEFAULT_BACKEND})")
+    batch_parser.add_argument("--segment-workers", type=int, default=1, help="Worker processes per file for segment-level parallelism (default: 1)")
+    batch_parser.add_argument("--dtype", choices=["float64", "float32"], default="float64", help="Floating-point type of the analysis arrays (default: float64)")
+    batch_parser.add_argument("--single-pass", action="store_true", help="VAD mode: reuse the detections made while segmenting instead of detecting every segment again")
+    batch_parser.add_argument("--stats", action="store_true", help="Write per-stage timings and counters to <name>_stats.json next to each audio")
+    batch_parser.add_argument("--verbose", action="store_true", help="Show per-file progress logs from the workers")
+    batch_parser.add_argument("--force", action="store_true", help="Re-detect every file even if its audio and params are unchanged since a cached run")
+    batch_parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the result cache")
+    batch_parser.add_argument("--cache-dir", default=None, help="Result cache folder (default: $PRADITOR_CACHE_DIR or the user cache folder)")
+    batch_parser.add_argument("--cache-size", type=float, default=256, help="Result cache size limit in MiB; least recently used results are evicted (default: 256)")
+    batch_parser.add_argument("--channel", type=_parse_channel, default=0, metavar="{1,2,...,mix,all}",
+                              help="Channel of multichannel audio to detect: a channel number, 'mix' for the average of all channels, "
+                                   "or 'all' to detect every channel and write one tier per channel (default: 1)")
+    batch_parser.add_argument("--channel-workers", type=int, default=None, help="With --channel all: channels detected in parallel per file (default: number of channels)")
+
+    sweep_parser = subparsers.add_parser("sweep", help="Evaluate a grid or random sample of parameters over a folder")
+    sweep_parser.add_argument("folder", help="Folder containing audio files")
+    sweep_parser.add_argument("--mode", choices=["general", "vad"], default="general", help="Detection mode (default: general)")
+    sweep_parser.add_argument("--params", default=None, help="Base params file (default: params.txt / params_vad.txt)")
+    sweep_parser.add_argument("--grid", nargs="+", default=[], metavar="NAME=V1,V2", help="Grid values, e.g. amp=1.4,1.6 or onset.eps_ratio=0.01,0.02 (general mode only)")
+    sweep_parser.add_argument("--random", type=int, default=0, metavar="N", help="Number of random samples drawn from --range")
+    sweep_parser.add_argument("--range", nargs="+", default=[], metavar="NAME=LOW:HIGH", help="Sampling ranges for --random, e.g. amp=1.2:2.0")
+    sweep_parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    sweep_parser.add_argument("--reference", default=None, help="Folder with reference TextGrids to score against")
+    sweep_parser.add_argument("--tolerance", type=float, default=0.02, help="Matching tolerance in seconds (default: 0.02)")
+    sweep_parser.add_argument("--output", default="sweep.csv", help="Results table (default: sweep.csv, plus sweep_summary.csv)")
+    sweep_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    sweep_parser.add_argument("--cluster-backend", choices=BACKENDS, default=None, help=f"Clustering backend (default: {DEFAULT_BACKEND})")
+    sweep_parser.add_argument("--verbose", action="store_true", help="Show progress logs from the workers")
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="Report hit rates of detected onsets against reference TextGrids")
+    evaluate_parser.add_argument("results", help="Folder with detected TextGrids (or Chronset txt files with --chronset)")
+    evaluate_parser.add_argument("reference", help="Folder with reference TextGrids of the same names")
+    evaluate_parser.add_argument("--tier", default="onset", help="Point tier to compare (default: onset)")
+    evaluate_parser.add_argument("--first-only", action="store_true", help="Only compare the first reference point of each file")
+    evaluate_parser.add_argument("--chronset", action="store_true", help="Results are Chronset txt files (filename<TAB>ms)")
+    evaluate_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes for loading (default: number of CPUs)")
+
+    return parser
+
+
+def _parse_channel(value):
+    """--channel的值：从1开始的声道序号转换为从0开始，mix和all保持不变"""
+    if value in ("mix", "all"):
+        return value
+    try:
+        channel = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a channel number, 'mix' or 'all': {value}") from None
+    if channel < 1:
+        raise argparse.ArgumentTypeError(f"channel numbers start at 1: {value}")
+    return channel - 1
+
+
+def run_batch_command(args):
+    """执行batch子命令"""
+    from src.core.batch import run_batch
+    from src.core.result_cache import ResultCache
+
+    if not os.path.isdir(args.folder):
+        logging.getLogger("Praditor").error(f"Not a folder: {args.folder}")
+        return 1
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir, max_bytes=int(args.cache_size * 2 ** 20))
+
+    results = run_batch(
+        args.folder,
+        mode=args.mode,
+        workers=args.workers,
+        params_path=args.params,
+        log_level=logging.INFO if args.verbose else logging.WARNING,
+        cluster_backend=args.cluster_backend,
+        single_pass=args.single_pass,
+        segment_workers=args.segment_workers,
+        analysis_dtype=args.dtype,
+        stats=args.stats,
+        cache=cache,
+        force=args.force,
+        channel=args.channel,
+        channel_workers=args.channel_workers,
+    )
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+def _parse_assignments(items, parse_value):
+    """解析NAME=VALUE形式的参数列表"""
+    result = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected NAME=VALUE: {item}")
+        result[name] = parse_value(value)
+    return result
+
+
+def _parse_number(value):
+    """整数保持为int，其余为float"""
+    number = float(value)
+    return int(number) if number.is_integer() and "." not in value else number
+
+
+def run_sweep_command(args):
+    """执行sweep子命令"""
+    from src.core.sweep import check_candidates, format_summary, grid_candidates, random_candidates, run_sweep
+
+    logger = logging.getLogger("Praditor")
+    if not os.path.isdir(args.folder):
+        logger.error(f"Not a folder: {args.folder}")
+        return 1
+
+    try:
+        grid = _parse_assignments(args.grid, lambda value: [_parse_number(v) for v in value.split(",")])
+        ranges = _parse_assignments(args.range, lambda value: tuple(_parse_number(v) for v in value.split(":")))
+        candidates = grid_candidates(grid) if grid else []
+        if args.random:
+            samples = random_candidates(ranges, args.random, args.seed)
+            # 网格和随机采样同时给出时，每个随机样本与网格组合
+            candidates = [{**g, **r} for g in candidates or [{}] for r in samples]
+        check_candidates(candidates, args.mode)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    if not candidates:
+        candidates = [{}]  # 只评估基础参数
+
+    _, summary = run_sweep(
+        args.folder,
+        candidates,
+        mode=args.mode,
+        params_path=args.params,
+        workers=args.workers,
+        cluster_backend=args.cluster_backend,
+        reference_dir=args.reference,
+        tolerance=args.tolerance,
+        output=args.output,
+        log_level=logging.INFO if args.verbose else logging.WARNING,
+    )
+
+    # 有参考标注时按F1排序，列出最好的几组参数
+    if summary and "f1" in summary[0]:
+        print(f"Best {min(5, len(summary))} of {len(summary)} parameter sets by F1 "
+              f"(all sets: {os.path.splitext(args.output)[0]}_summary.csv)")
+        print(format_summary(summary, top=5))
+    return 0
+
+
+def run_evaluate_command(args):
+    """执行evaluate子命令"""
+    from src.core.evaluation import evaluate_chronset, evaluate_folders, format_report
+
+    logger = logging.getLogger("Praditor")
+    for folder in (args.results, args.reference):
+        if not os.path.isdir(folder):
+            logger.error(f"Not a folder: {folder}")
+            return 1
+
+    if args.chronset:
+        result = evaluate_chronset(args.results, args.reference, tier=args.tier, workers=args.workers)
+        print(f"| Detected Number: {result['detected']} | Should Find Number: {result['should_find']} |")
+    else:
+        result = evaluate_folders(args.results, args.reference, tier=args.tier, first_only=args.first_only, workers=args.workers)
+    print(format_report(result))
+    return 0
+
+
+def main(argv=None):
+    """命令行主函数
+
+    Args:
+        argv: 命令行参数列表，默认为sys.argv[1:]
+
+    Returns:
+        进程退出码
+    """
+    args = build_parser().parse_args(argv)
+
+    if args.command == "batch":
+        return run_batch_command(args)
+    if args.command == "sweep":
+        return run_sweep_command(args)
+    if args.command == "evaluate":
+        return run_evaluate_command(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import ctypes
+import multiprocessing
 import os
 import sys
 import webbrowser
@@ -36,12 +37,17 @@ from PySide6.QtWidgets import (
 )
 
 from src.gui.styles import *
-from src.core.detection import detectPraditor, create_textgrid_with_time_point, stop_flag, segment_audio
+from src.core.batch import BatchJob
+from src.core.cancellation import CancellationToken
+from src.core.result_cache import ResultCache
+from src.core.detection import create_textgrid_with_time_point, run_detection, postprocess_vad
 from src.gui.plots import AudioViewer
+from src.gui.run_table import RunAllSignals, RunAllTable
 from src.gui.sliders import MySliders
 from src.gui.toolbar import CustomToolBar
 from src.gui.titlebar import CustomTitleBar
-from src.utils.audio import isAudioFile, get_frm_points_from_textgrid, get_frm_intervals_from_textgrid
+from src.utils.audio import isAudioFile
+from src.utils.params import ParamsError, params_path_candidates, read_params_file
 from src.utils.resources import get_resource_path
 
 
@@ -73,86 +79,39 @@ class ConsoleOutput(io.StringIO):  # 自定义输出流类，用于捕获print
 
 
 class DetectPraditorThread(QThread):  # 异步检测任务类
-    finished = Signal(list, list)  # 参数：onset_results, offset_results
+    detected = Signal(list, list)  # 参数：onset_results, offset_results（QThread自己的finished信号在run返回后发出）
     
     def __init__(self, params, audio_obj, mode):
         super().__init__()
         self.params = params
         self.audio_obj = audio_obj
         self.mode = mode
-        self.setTerminationEnabled(True)  # 启用线程终止
+        self.cancel_token = CancellationToken()  # 每个任务单独取消，互不影响
     
     def stop(self):
-        """安全停止线程"""
-        
-        # 设置全局停止标志
-        from src.core import detection
-        detection.stop_flag = True
-
-        # 如果线程正在运行，尝试优雅终止
-        if self.isRunning():
-            self.terminate()
-            # 限制等待时间，避免无限阻塞
-            if not self.wait(1000):  # 1秒超时
-                self.terminate()
-                system_logger.warning("Termination timed out")
+        """安全停止线程（不阻塞调用线程）
 
-        system_logger.info("Thread terminated")
+        只取消本任务的token，检测在下一个分块边界（分段、候选区间）处返回，
+        不再强制终止线程，因此不会在写文件的中途被杀死；被取消的任务不会发出detected信号。
+        这里不等待线程结束（滤波或聚类一个长文件时可能需要一段时间），清理工作连接到QThread的finished信号。
+        """
+        self.cancel_token.cancel()
+        system_logger.info("Thread stopping")
         
     
     def run(self):
-        from src.core import detection
-        if detection.stop_flag:
+        if self.cancel_token.cancelled:
             system_logger.info("Abort")
-            self.finished.emit([], [])
+            return
         try:
+            onset_results, offset_results = run_detection(self.params, self.audio_obj, self.mode, cancel_token=self.cancel_token)
+            if not self.cancel_token.cancelled:
+                self.detected.emit(onset_results, offset_results)
 
-            onset_results, offset_results = [], []
-
-            system_logger.info("Segmenting...")  # 记录开始分段日志
-            count = 0
-            segments = segment_audio(self.audio_obj, segment_duration=15, params=self.params, min_pause=1, mode="vad")
-
-            for start, end in segments:
-
-                # 设置全局停止标志
-                from src.core import detection
-                if detection.stop_flag:
-                    break
-
-
-                count += 1
-
-                # 记录当前进度百分比
-                progress = int((count / len(segments)) * 100)
-                system_logger.info(f"Detection progress: {progress:.0f}%")
-                clip_onset_results, clip_offset_results = [], []
-
-                audio_clip = self.audio_obj[start:end]
-
-
-                if self.params["onset"]:
-                    clip_onset_results = detectPraditor(self.params, audio_clip, "onset", self.mode)
-                    clip_onset_results = [x + start/1000 for x in clip_onset_results]
-
-
-                if self.params["offset"]:
-                    clip_offset_results = detectPraditor(self.params, audio_clip, "offset", self.mode)
-                    clip_offset_results = [x + start/1000 for x in clip_offset_results]
-
-                # 合并当前片段的结果
-                onset_results.extend(clip_onset_results)
-                offset_results.extend(clip_offset_results)
-
-
-            self.finished.emit(onset_results, offset_results)
-
-
-            
         except Exception as e:
-            if not detection.stop_flag:
+            if not self.cancel_token.cancelled:
                 system_logger.error(f"Error: {e}")
-                self.finished.emit([], [])
+                self.detected.emit([], [])
 
 
    
@@ -199,10 +158,13 @@ class MainWindow(QMainWindow):
         self.detection_count = 0
         self.total_detections = 0
         self.current_runnables = []
+        self.stopping_threads = []  # 已取消但还没有返回的检测线程（线程结束前必须保留引用）
         
         # run-all模式状态跟踪
         self.is_running_all = False
-        self.run_all_current_index = 0
+        self.run_all_job = None  # 正在运行的BatchJob
+        self.run_all_table = None  # run-all的实时结果表（第一次run-all时创建）
+        self.result_cache = ResultCache()  # 音频和参数都没有改变的文件在run-all中直接复用结果
         # 存储按钮原始状态
         self._button_original_states = {}
 
@@ -364,9 +326,8 @@ class MainWindow(QMainWindow):
                     txt_file.write(f"{self.MySliders.getParams()}")
         else:  # 存在default mode
             try:
-                with open(default_params_path, "r") as txt_file:
-                    self.MySliders.resetParams(eval(txt_file.read()))
-            except KeyError:
+                self.MySliders.resetParams(read_params_file(default_params_path))
+            except (KeyError, ParamsError):
                 with open(default_params_path, 'w') as txt_file:
                     txt_file.write(f"{self.MySliders.getParams()}")
 
@@ -583,10 +544,7 @@ class MainWindow(QMainWindow):
         
         根据当前模式（普通/VAD）选择不同的结果文件格式
         """
-        if self.toolbar.vad_btn.isChecked():
-            self.AudioViewer.tg_dict_tp = get_frm_intervals_from_textgrid(self.file_path)
-        else:
-            self.AudioViewer.tg_dict_tp = get_frm_points_from_textgrid(self.file_path)
+        self.AudioViewer.tg_dict_tp = self.AudioViewer.file_cache.textgrid(self.file_path, self.toolbar.vad_btn.isChecked())
         
         if not self.AudioViewer.tg_dict_tp or self.AudioViewer.tg_dict_tp == {"onset": [], "offset": []}:
             popup_window = QMessageBox()
@@ -717,10 +675,12 @@ class MainWindow(QMainWindow):
                 txt_file_path = get_resource_path(f"src/app/params{file_suffix}.txt")
 
         try:
-            with open(txt_file_path, 'r') as txt_file:
-                self.MySliders.resetParams(eval(txt_file.read()))
+            self.MySliders.resetParams(read_params_file(txt_file_path))
             params_logger.info(f"TXT file read from: {txt_file_path}")
 
+        except ParamsError as e:
+            params_logger.warning(f"Invalid params file: {e}")
+
         except FileNotFoundError:
             # 切换到Default模式
             self.toolbar.default_btn.setChecked(True)
@@ -763,9 +723,8 @@ class MainWindow(QMainWindow):
         同时会根据VAD模式状态，决定使用带_vad后缀的参数文件还是普通参数文件
         检查结果会通过按钮属性反映，用于UI样式显示（如按钮颜色变化）
         """
-        # 获取当前滑块参数的字符串表示
-        current_params = str(self.MySliders.getParams())
-        # current_params_dict = self.MySliders.getParams()
+        # 获取当前滑块参数（参数文件的解析结果按修改时间缓存，切换文件时不会重复读取）
+        current_params = self.MySliders.getParams()
         
         # 检查是否处于VAD模式，决定参数文件后缀
         is_vad_mode = self.toolbar.vad_btn.isChecked()
@@ -780,10 +739,8 @@ class MainWindow(QMainWindow):
         default_params_match = False  # 默认参数是否匹配
         if os.path.exists(default_params_path):
             try:
-                with open(default_params_path, 'r') as txt_file:
-                    # 读取并解析默认参数文件内容，转换为字符串进行比较
-                    default_params = str(eval(txt_file.read()))
-                    default_params_match = (current_params == default_params)
+                # 读取并解析默认参数文件内容进行比较
+                default_params_match = (current_params == read_params_file(default_params_path))
             except Exception as e:
                 # 解析失败时忽略错误
                 pass
@@ -803,10 +760,8 @@ class MainWindow(QMainWindow):
             if os.path.exists(folder_params_path):
                 folder_params_exists = True
                 try:
-                    with open(folder_params_path, 'r') as txt_file:
-                        # 读取并解析文件夹参数文件内容，转换为字符串进行比较
-                        folder_params = str(eval(txt_file.read()))
-                        folder_params_match = (current_params == folder_params)
+                    # 读取并解析文件夹参数文件内容进行比较
+                    folder_params_match = (current_params == read_params_file(folder_params_path))
                 except Exception as e:
                     # 解析失败时忽略错误
                     pass
@@ -826,10 +781,8 @@ class MainWindow(QMainWindow):
             if os.path.exists(file_params_path):
                 file_params_exists = True
                 try:
-                    with open(file_params_path, 'r') as txt_file:
-                        # 读取并解析文件参数内容，转换为字符串进行比较
-                        file_params = str(eval(txt_file.read()))
-                        file_params_match = (current_params == file_params)
+                    # 读取并解析文件参数内容进行比较
+                    file_params_match = (current_params == read_params_file(file_params_path))
                 except Exception as e:
                     # 解析失败时忽略错误
                     pass
@@ -850,36 +803,17 @@ class MainWindow(QMainWindow):
         
         # 检查是否处于VAD模式
         is_vad_mode = self.toolbar.vad_btn.isChecked()
-        file_suffix = "_vad" if is_vad_mode else ""
-        
-        # 默认使用文件同名参数
-        txt_file_path = os.path.splitext(self.file_path)[0] + f"{file_suffix}.txt"
-        params_to_use = None
-        
-        # 检查文件同名参数是否存在
-        if os.path.exists(txt_file_path):
-            with open(txt_file_path, "r") as txt_file:
-                params_to_use = txt_file.read()
-        else:
-            # 检查folder模式的params.txt是否存在
-            folder_path = os.path.dirname(self.file_path)
-            folder_params_path = os.path.join(folder_path, f"params{file_suffix}.txt")
-            
-            if os.path.exists(folder_params_path):
-                with open(folder_params_path, "r") as txt_file:
-                    params_to_use = txt_file.read()
-            else:
-                # 最后使用默认的params.txt
-                default_params_path = os.path.join(os.getcwd(), f"params{file_suffix}.txt")
-                if not os.path.exists(default_params_path):
-                    default_params_path = get_resource_path(f"src/app/params{file_suffix}.txt")
-                    
-                with open(default_params_path, "r") as default_txt_file:
-                    params_to_use = default_txt_file.read()
-        
-        # 应用参数
-        if params_to_use:
-            self.MySliders.resetParams(eval(params_to_use))
+
+        # 与命令行使用同一套File→Folder→Default优先级；某一级的参数文件无效时退回下一级
+        # 参数文件的解析结果按修改时间缓存（预读相邻音频时已读入）
+        for txt_file_path in params_path_candidates(self.file_path, is_vad_mode):
+            try:
+                params_to_use = read_params_file(txt_file_path)
+            except (ParamsError, FileNotFoundError) as e:
+                params_logger.warning(f"Invalid params file: {e}")
+                continue
+            self.MySliders.resetParams(params_to_use)
+            return
 
 
 
@@ -917,6 +851,7 @@ class MainWindow(QMainWindow):
             self.file_path = self.file_paths[self.which_one]
             file_logger.info(f"Selected file: {self.file_path}")
             self.AudioViewer.tg_dict_tp = self.AudioViewer.readAudio(self.file_path, is_vad_mode=self.toolbar.vad_btn.isChecked())
+            self.prefetchAdjacentAudio()
             
             # 启用所有模式按钮
             self.toolbar.default_btn.setEnabled(True)
@@ -1004,14 +939,12 @@ class MainWindow(QMainWindow):
     def stopDetection(self):
         """停止当前正在运行的检测任务"""
 
-        # 设置全局停止标志
-        from src.core import detection
-        detection.stop_flag = True    
-
-        # 终止所有当前运行的线程
+        # 取消所有当前运行的线程（不等待，线程结束后由releaseDetectThread清理）
         for thread in self.current_runnables.copy():
             try:
                 thread.stop()  # 使用安全停止方法
+                if thread.isRunning():
+                    self.stopping_threads.append(thread)
             except RuntimeError:
                 # 忽略已删除的C++对象
                 pass
@@ -1024,9 +957,17 @@ class MainWindow(QMainWindow):
         self.detection_count = 0
         self.total_detections = 0
         
-        # 退出run-all模式
+        # 取消run-all：正在处理的文件尽快返回，已完成文件的汇总CSV在任务结束时写出
+        if self.run_all_job is not None:
+            self.run_all_job.cancel()
         self.is_running_all = False
 
+        self.enableControlsAfterRun()
+
+        system_logger.info("Abort")  # 记录手动停止日志，确保Reset按钮在参数文件保存后显示为可用
+
+    def enableControlsAfterRun(self):
+        """检测结束（完成或停止）后启用所有按钮、滑块和工具栏"""
         # 直接启用所有带图标按钮
         icon_buttons_map = {
             self.title_bar.trash_btn: 'trash',
@@ -1068,8 +1009,6 @@ class MainWindow(QMainWindow):
 
         
         self.updateToolbarButtonsState()  # 更新工具栏按钮状态
-
-        system_logger.info("Abort")  # 记录手动停止日志，确保Reset按钮在参数文件保存后显示为可用
         
     
 
@@ -1088,47 +1027,97 @@ class MainWindow(QMainWindow):
         
         # 检查是否所有检测任务都已完成
         if self.detection_count == self.total_detections:
-            # 处理检测结果
+            # 处理检测结果（线程在run返回后由releaseDetectThread移出列表）
             self.process_detection_results()
-        
-            # 清空线程列表，因为所有线程都已完成
-            self.current_runnables.clear()
 
+
+    def releaseDetectThread(self, thread):
+        """检测线程结束（完成或被取消后返回）时释放引用并删除线程对象"""
+        if thread in self.current_runnables:
+            self.current_runnables.remove(thread)
+        if thread in self.stopping_threads:
+            self.stopping_threads.remove(thread)
+        thread.deleteLater()
     
     def runAllAudioFiles(self):
-        """依次对所有音频文件执行Praditor检测
+        """对文件夹中的所有音频文件执行Praditor检测
         
-        按照顺序处理文件夹中的所有音频文件，检测完成后自动切换到下一个文件
+        文件分发到有界的进程池中并行检测（见src.core.batch.BatchJob），所有文件使用当前滑块的参数；
+        波形视图与检测分离，处理过程中可以继续浏览文件，每个文件的状态、时长和检测耗时实时显示在结果表中。
+        音频和参数都没有改变的文件复用缓存的结果；按住Shift点击时忽略缓存，全部重新检测
         """
-        """Run Praditor on all audio files sequentially, displaying one audio after current detection finishes"""
-        if not hasattr(self, 'file_paths') or len(self.file_paths) == 0:
+        if not hasattr(self, 'file_paths') or len(self.file_paths) == 0 or self.run_all_job is not None:
             return
+        force = bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)
+
+        self.update_current_param()
+        is_vad_mode = self.toolbar.vad_btn.isChecked()
+
+        # 与execPraditor一致：关闭的一侧不检测
+        params = self.MySliders.getParams()
+        if self.run_onset.isChecked():
+            params["onset"] = {}
+        if self.run_offset.isChecked():
+            params["offset"] = {}
         
-        # 禁用除最小化、最大化、关闭、停止以外的所有按钮
+        # 禁用除最小化、最大化、关闭、停止以外的所有按钮；保留前后切换，检测时可以浏览结果
         self.setButtonsEnabled(False)
         self.MySliders.setEnabled(False)
         self.toolbar.setEnabled(False)
-        
-        # 设置run-all标志和起始索引
+        self._setButtonEnabled(self.title_bar.prev_audio_btn, 'prev_audio', True)
+        self._setButtonEnabled(self.title_bar.next_audio_btn, 'next_audio', True)
         self.is_running_all = True
-        self.run_all_current_index = 0  # 从第一个音频开始
-        
-        # 重置stop_flag
-        from src.core import detection
-        detection.stop_flag = False
-        
-        # 显示第一个音频
-        self.which_one = self.run_all_current_index
+
+        if self.run_all_table is None:
+            self.run_all_table = RunAllTable(self)
+            self.run_all_table.fileActivated.connect(self.showRunAllFile)
+        self.run_all_table.setFiles(self.file_paths)
+        self.run_all_table.show()
+        self.run_all_table.raise_()
+
+        # 回调在进程池的内部线程中调用，通过信号转到主线程
+        signals = RunAllSignals(self)
+        job = BatchJob(self.file_paths, mode="vad" if is_vad_mode else "general", params=params,
+                       on_start=signals.started.emit, on_done=signals.done.emit, on_finished=signals.finished.emit,
+                       cache=self.result_cache, force=force)
+        signals.started.connect(self.run_all_table.markStarted)
+        signals.done.connect(self.onRunAllFileDone)
+        signals.finished.connect(lambda results, job=job, signals=signals: self.onRunAllFinished(job, signals))
+        self.run_all_job = job
+        job.start()
+
+    def onRunAllFileDone(self, index, result):
+        """run-all中一个文件处理完成：更新结果表；如果正在显示该文件，刷新波形上的结果"""
+        self.run_all_table.markDone(index, result)
+        if result["status"] == "done" and self.file_paths[index] == self.file_path:
+            self.AudioViewer.tg_dict_tp = self.AudioViewer.file_cache.textgrid(self.file_path, self.toolbar.vad_btn.isChecked())
+            self.AudioViewer.updateXset(self.AudioViewer.tg_dict_tp)
+            self.showXsetNum(is_test=False)
+
+    def onRunAllFinished(self, job, signals):
+        """run-all结束（全部完成或停止后正在处理的文件都已返回）"""
+        signals.deleteLater()
+        if job is not self.run_all_job:
+            return
+        self.run_all_job = None
+        self.run_all_table.markFinished()
+        if self.is_running_all:  # 停止时已经恢复了按钮
+            self.is_running_all = False
+            self.enableControlsAfterRun()
+            # 发射run完成信号
+            self.run_current_done.emit()
+
+    def showRunAllFile(self, index):
+        """在波形视图中打开结果表中双击的文件"""
+        self.player.stop()
+        self.which_one = index
         self.file_path = self.file_paths[self.which_one]
         dir_name = os.path.basename(os.path.dirname(self.file_path))
         base_name = os.path.basename(self.file_path)
         self.setWindowTitle(f"Praditor - {dir_name}/{base_name} ({self.which_one+1}/{len(self.file_paths)})")
         self.AudioViewer.tg_dict_tp = self.AudioViewer.readAudio(self.file_path, is_vad_mode=self.toolbar.vad_btn.isChecked())
+        self.prefetchAdjacentAudio()
         self.showXsetNum(is_test=False)
-        
-        
-        # 启动检测
-        self.execPraditor(is_test=False)
 
 
 
@@ -1136,22 +1125,16 @@ class MainWindow(QMainWindow):
     def on_run_signal(self):
         """处理run信号，开始执行检测
         
-        设置stop_flag为False，然后执行检测
+        每个检测线程有自己的取消token，不需要重置全局状态
         """
-        """处理run_signal信号，在执行检测前设置stop_flag = False"""
-        from src.core import detection
-        detection.stop_flag = False
         self.execPraditor(is_test=False)
 
     
     def on_test_signal(self):
         """处理test信号，开始测试检测
         
-        设置stop_flag为False，然后执行测试检测
+        每个检测线程有自己的取消token，不需要重置全局状态
         """
-        """处理test_signal信号，在执行检测前设置stop_flag = False"""
-        from src.core import detection
-        detection.stop_flag = False
         self.execPraditor(is_test=True)
 
     
@@ -1167,53 +1150,7 @@ class MainWindow(QMainWindow):
         is_test = self.current_detection_params["is_test"]
         
         if is_vad_mode:
-            ###########################
-            # 如果头尾是从有声直接开始/结束，则为其赋值为0/音频长度
-            ###########################
-            if onsets and offsets:  # 确保列表非空
-                if onsets[0] >= offsets[0]:
-                    onsets = [0.0] + onsets
-    
-                if offsets[-1] <= onsets[-1]:
-                    offsets.append(self.AudioViewer.audio_obj.duration_seconds)
-    
-                ##########################
-                # Select the one offset that is closest to onset and earlier than onset
-                ##########################
-    
-                new_onsets = []
-                new_offsets = []
-                if len(onsets) <= len(offsets):
-                    for i, onset in enumerate(onsets):
-                        if i == 0:
-                            new_offsets.append(offsets[-1])
-                            new_onsets.append(onset)
-                        else:
-                            try:
-                                new_offsets.append(max([offset for offset in offsets if onsets[i-1] < offset < onset]))
-                                new_onsets.append(onset)
-                            except ValueError:
-                                pass
-
-
-            
-                else:  # len(onsets) > len(offsets)
-                    reversed_offsets = list(reversed(offsets))
-                    for i, reversed_offset in enumerate(reversed_offsets):
-                        if i == 0:
-                            new_onsets.append(onsets[0])
-                            new_offsets.append(reversed_offset)
-                        else:
-                            try:
-                                new_onsets.append(min([onset for onset in onsets if reversed_offset < onset < reversed_offsets[i-1]]))
-                                new_offsets.append(reversed_offset)
-
-                            except ValueError:
-                                pass
-                    new_offsets = list(reversed(new_offsets))
-    
-                onsets = sorted(new_onsets)
-                offsets = sorted(new_offsets)
+            onsets, offsets = postprocess_vad(onsets, offsets, self.AudioViewer.audio_obj.duration_seconds)
     
         if is_test:
             # 测试模式：直接显示结果，不保存
@@ -1230,130 +1167,11 @@ class MainWindow(QMainWindow):
             self.readXset()
             self.showXsetNum(is_test=is_test)
             # self.update_current_param()
-        # 
-        # 检查是否处于run-all模式
-        if self.is_running_all:
-            # 递增当前索引
-            self.run_all_current_index += 1
-            # from src.core import detection
-            # print("running all?", not detection.stop_flag)
-            # 检查是否还有更多文件要处理
-            if self.run_all_current_index < len(self.file_paths):# and not detection.stop_flag:
-                # 更新当前索引到which_one
-                self.which_one = self.run_all_current_index
-                # 更新当前文件路径
-                self.file_path = self.file_paths[self.which_one]
-                # 更新窗口标题
-                dir_name = os.path.basename(os.path.dirname(self.file_path))
-                base_name = os.path.basename(self.file_path)
-                self.setWindowTitle(f"Praditor - {dir_name}/{base_name} ({self.which_one+1}/{len(self.file_paths)})")
-                # 读取新的音频文件
-                self.AudioViewer.tg_dict_tp = self.AudioViewer.readAudio(self.file_path, is_vad_mode=self.toolbar.vad_btn.isChecked())
-                # 显示当前音频的xset数量
-                self.showXsetNum(is_test=False)
-                # 启动下一个音频的检测
-                self.execPraditor(is_test=False)
-            else:
-                # 所有文件处理完成，退出run-all模式
-                self.is_running_all = False
-                
-                # 确保所有线程都已终止
-                if self.current_runnables:
-                    for thread in self.current_runnables.copy():
-                        try:
-                            thread.stop()  # 使用安全停止方法
-                        except RuntimeError:
-                            # 忽略已删除的C++对象
-                            pass
-                    # 清空列表
-                    self.current_runnables.clear()
-                
-                # 直接启用所有带图标按钮，与stopDetection方法保持一致
-                icon_buttons_map = {
-                    self.title_bar.trash_btn: 'trash',
-                    self.title_bar.read_btn: 'read',
-                    self.title_bar.run_btn: 'play',
-                    self.title_bar.run_all_btn: 'run-all',
-                    self.title_bar.test_btn: 'test',
-                    self.title_bar.prev_audio_btn: 'prev_audio',
-                    self.title_bar.next_audio_btn: 'next_audio',
-                    self.title_bar.help_menu_btn: 'question',
-                    self.toolbar.save_btn: 'save',
-                    self.toolbar.reset_btn: 'reset',
-                    self.toolbar.backward_btn: 'backward',
-                    self.toolbar.forward_btn: 'forward',
-                }
-                for btn, icon_name in icon_buttons_map.items():
-                    self._setButtonEnabled(btn, icon_name, True)
-
-                # 直接启用所有仅状态按钮，与stopDetection方法保持一致
-                state_only_buttons = [
-                    self.title_bar.title_label,
-                    self.title_bar.onset_btn,
-                    self.title_bar.offset_btn,
-                    self.toolbar.file_btn,
-                    self.toolbar.folder_btn,
-                    self.toolbar.default_btn,
-                    self.toolbar.vad_btn
-                ]
-                for btn in state_only_buttons:
-                    btn.setEnabled(True)
-
-                # 启用滑块、工具栏和模式按钮
-                self.MySliders.setEnabled(True)
-                self.toolbar.setEnabled(True)
-                self.toolbar.default_btn.setEnabled(True)
-                self.toolbar.folder_btn.setEnabled(True)
-                self.toolbar.file_btn.setEnabled(True)
-                self.toolbar.vad_btn.setEnabled(True)
-                self.updateToolbarButtonsState()
-                
-                # 发射run完成信号
-                self.run_current_done.emit()
-        else:
-            # 单个文件处理完成
-            # 直接启用所有带图标按钮，与stopDetection方法保持一致
-            icon_buttons_map = {
-                self.title_bar.trash_btn: 'trash',
-                self.title_bar.read_btn: 'read',
-                self.title_bar.run_btn: 'play',
-                self.title_bar.run_all_btn: 'run-all',
-                self.title_bar.test_btn: 'test',
-                self.title_bar.prev_audio_btn: 'prev_audio',
-                self.title_bar.next_audio_btn: 'next_audio',
-                self.title_bar.help_menu_btn: 'question',
-                self.toolbar.save_btn: 'save',
-                self.toolbar.reset_btn: 'reset',
-                self.toolbar.backward_btn: 'backward',
-                self.toolbar.forward_btn: 'forward',
-            }
-            for btn, icon_name in icon_buttons_map.items():
-                self._setButtonEnabled(btn, icon_name, True)
-
-            # 直接启用所有仅状态按钮，与stopDetection方法保持一致
-            state_only_buttons = [
-                self.title_bar.title_label,
-                self.title_bar.onset_btn,
-                self.title_bar.offset_btn,
-                self.toolbar.file_btn,
-                self.toolbar.folder_btn,
-                self.toolbar.default_btn,
-                self.toolbar.vad_btn
-            ]
-            for btn in state_only_buttons:
-                btn.setEnabled(True)
 
-            # 启用滑块、工具栏和模式按钮
-            self.MySliders.setEnabled(True)
-            self.toolbar.setEnabled(True)
-            self.toolbar.default_btn.setEnabled(True)
-            self.toolbar.folder_btn.setEnabled(True)
-            self.toolbar.file_btn.setEnabled(True)
-            self.toolbar.vad_btn.setEnabled(True)
-            self.updateToolbarButtonsState()
-            
-            # 发射run完成信号
-            self.run_current_done.emit()
+        self.enableControlsAfterRun()
+        
+        # 发射run完成信号
+        self.run_current_done.emit()
         
 
 
@@ -1364,9 +1182,6 @@ class MainWindow(QMainWindow):
             is_test: 是否为测试模式，测试模式下不保存结果
         """
 
-        from src.core import detection
-        detection.stop_flag = False
-
         self.update_current_param()
 
 
@@ -1434,9 +1249,8 @@ class MainWindow(QMainWindow):
 
         xset_thread = DetectPraditorThread(params, self.AudioViewer.audio_obj, mode="vad" if is_vad_mode else "general")
 
-        xset_thread.finished.connect(lambda thread=xset_thread: self.current_runnables.remove(thread) if thread in self.current_runnables else None)
-        xset_thread.finished.connect(self.on_detect_finished)
-        xset_thread.finished.connect(xset_thread.deleteLater)
+        xset_thread.detected.connect(self.on_detect_finished)
+        xset_thread.finished.connect(lambda thread=xset_thread: self.releaseDetectThread(thread))
 
         xset_thread.start()
         self.total_detections += 1
@@ -1704,6 +1518,17 @@ class MainWindow(QMainWindow):
         self.updateToolbarButtonsState()  # 更新save和reset按钮状态
 
 
+    def prefetchAdjacentAudio(self):
+        """在后台预读当前文件的下一个和上一个文件（音频、TextGrid和参数文件）
+        
+        切换文件或run-all处理到下一个文件时可以直接从缓存中取出
+        """
+        if not getattr(self, 'file_paths', None):
+            return
+        n_files = len(self.file_paths)
+        neighbours = [self.file_paths[(self.which_one + step) % n_files] for step in (1, -1)]
+        self.AudioViewer.file_cache.prefetch([fpath for fpath in dict.fromkeys(neighbours) if fpath != self.file_path])
+
     def prevnext_audio(self, direction=None):
         """处理音频切换
         
@@ -1735,6 +1560,7 @@ class MainWindow(QMainWindow):
         base_name = os.path.basename(self.file_path)
         self.setWindowTitle(f"Praditor - {dir_name}/{base_name} ({self.which_one+1}/{len(self.file_paths)})")
         self.AudioViewer.tg_dict_tp = self.AudioViewer.readAudio(self.file_path, is_vad_mode=self.toolbar.vad_btn.isChecked())
+        self.prefetchAdjacentAudio()
         
         # 启用所有模式按钮
         self.toolbar.default_btn.setEnabled(True)
@@ -1920,19 +1746,23 @@ class MainWindow(QMainWindow):
 
 
 
-app = QApplication(sys.argv)
+if __name__ == "__main__":
+    # run-all的进程池在Windows/macOS上以spawn方式启动子进程，会重新导入本模块；打包后还需要freeze_support
+    multiprocessing.freeze_support()
+
+    app = QApplication(sys.argv)
 
-# 创建系统托盘图标
-# tray_icon = QSystemTrayIcon(QIcon("icon.png"), app)
+    # 创建系统托盘图标
+    # tray_icon = QSystemTrayIcon(QIcon("icon.png"), app)
 
-window = MainWindow()
+    window = MainWindow()
 
-# 加载图标文件
-# icon = QIcon('icon.png')  # 替换为你的图标文件路径
-# print(get_resource_path('resources/icons/icon.ico'))
-# print(os.path.exists(get_resource_path("resources/icons/icon.ico")))
-# 设置窗口图标
-# window.setWindowIcon(QIcon(resource_path('icon.ico')))
-window.show()
+    # 加载图标文件
+    # icon = QIcon('icon.png')  # 替换为你的图标文件路径
+    # print(get_resource_path('resources/icons/icon.ico'))
+    # print(os.path.exists(get_resource_path("resources/icons/icon.ico")))
+    # 设置窗口图标
+    # window.setWindowIcon(QIcon(resource_path('icon.ico')))
+    window.show()
 
-app.exec()
+    app.exec()
@@ -0,0 +1,376 @@
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.cancellation import CancellationToken, is_cancelled, shared_event
+from src.core.detection import run_detection, run_detection_channels, postprocess_vad, create_textgrid_with_time_point
+from src.core.instrumentation import record
+from src.core.results import ResultStore
+from src.utils.audio import ReadSound, isAudioFile
+from src.utils.logger import sot_logger
+from src.utils.params import load_params, read_params_file
+
+
+def list_audio_files(folder):
+    """列出文件夹中的所有音频文件
+
+    Args:
+        folder: 文件夹路径
+
+    Returns:
+        排序后的音频文件路径列表
+    """
+    return sorted(
+        os.path.normpath(os.path.join(folder, fname))
+        for fname in os.listdir(folder)
+        if isAudioFile(fname)
+    )
+
+
+def process_file(audio_file_path, mode="general", params_path=None, cluster_backend=None, single_pass=False, segment_workers=1,
+                 analysis_dtype="float64", stats=False, params=None, cancel_token=None, cache=None, force=False, channel=0,
+                 channel_workers=None):
+    """对单个音频文件执行检测并写出TextGrid和CSV（不更新父文件夹汇总CSV）
+
+    Args:
+        audio_file_path: 音频文件路径
+        mode: "general"或"vad"
+        params_path: 指定参数文件；为None时按照File→Folder→Default优先级加载
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        single_pass: VAD模式下沿用分段时的检测结果，不再逐段重新检测
+        segment_workers: 单个文件内部分段并行检测的进程数
+        analysis_dtype: 分析使用的浮点类型，"float64"或"float32"
+        stats: 是否记录各阶段的耗时和计数，写出到音频旁的<文件名>_stats.json（VAD模式为_vad_stats.json）
+        params: 直接指定参数字典（例如GUI中滑块的参数），优先于params_path；会被原地修改
+        cancel_token: CancellationToken；被取消时不写出结果，status为"cancelled"
+        cache: ResultCache；音频和实际生效的参数都没有改变时直接用缓存的结果写出TextGrid和CSV，不解码也不检测
+        force: 忽略缓存中的结果重新检测（新结果仍写入缓存）
+        channel: 多声道音频检测的声道：声道序号（从0开始）、"mix"（各声道的平均）或"all"（每个声道分别检测，
+            TextGrid中每个声道一组tier，见detection.run_detection_channels）
+        channel_workers: channel为"all"时同时检测的声道数，默认为声道数；此时segment_workers不起作用
+
+    Returns:
+        结果字典，包含文件路径、onsets、offsets、音频时长、检测耗时和状态（"done"、"skipped"或"cancelled"）；
+        使用缓存结果时"cached"为True；stats为True时还包含"stats"；
+        channel为"all"时onsets和offsets为每个声道的结果列表
+    """
+    if stats:
+        with record() as file_stats:
+            result = process_file(audio_file_path, mode, params_path, cluster_backend, single_pass, segment_workers, analysis_dtype,
+                                  params=params, cancel_token=cancel_token, cache=cache, force=force, channel=channel,
+                                  channel_workers=channel_workers)
+        suffix = "_vad" if mode == "vad" else ""
+        file_stats.dump(os.path.splitext(audio_file_path)[0] + f"{suffix}_stats.json",
+                        path=os.path.abspath(audio_file_path), mode=mode, duration=result["duration"], status=result["status"])
+        result["stats"] = file_stats.as_dict()
+        return result
+
+    is_vad_mode = mode == "vad"
+    start_time = time.perf_counter()
+
+    if params is None:
+        params = load_params(audio_file_path, is_vad_mode) if params_path is None else read_params_file(params_path)
+
+    cache_key = None
+    if cache is not None:
+        # 检测会原地修改参数，必须在检测之前计算键
+        cache_key = cache.key(audio_file_path, params, mode, cluster_backend=cluster_backend, single_pass=single_pass,
+                              analysis_dtype=analysis_dtype, channel=channel)
+        cached = None if force else cache.get(cache_key)
+        if cached is not None:
+            if channel == "all":
+                create_textgrid_with_time_point(audio_file_path, is_vad_mode, update_parent_csv=False, duration=cached["duration"],
+                                                channels=[(list(onsets), list(offsets))
+                                                          for onsets, offsets in zip(cached["onsets"], cached["offsets"])])
+            else:
+                create_textgrid_with_time_point(audio_file_path, is_vad_mode, list(cached["onsets"]), list(cached["offsets"]),
+                                                update_parent_csv=False, duration=cached["duration"])
+            return {
+                "path": audio_file_path,
+                "onsets": cached["onsets"],
+                "offsets": cached["offsets"],
+                "duration": cached["duration"],
+                "status": "done",
+                "cached": True,
+                "elapsed": time.perf_counter() - start_time,
+            }
+
+    audio_obj = ReadSound(audio_file_path, analysis_dtype=analysis_dtype, channel=0 if channel == "all" else channel)
+
+    result = {
+        "path": audio_file_path,
+        "onsets": [],
+        "offsets": [],
+        "duration": audio_obj.duration_seconds,
+        "status": "done",
+    }
+
+    # 与GUI一致：LowPass超过奈奎斯特频率时不检测
+    nyquist = float(audio_obj.frame_rate) / 2
+    if any(float(params[xset]["cutoff1"]) > nyquist for xset in params if params[xset]):
+        sot_logger.warning(f"LowPass exceeds the Nyquist frequency boundary {nyquist:.0f}: {audio_file_path}")
+        result["status"] = "skipped"
+        result["elapsed"] = time.perf_counter() - start_time
+        return result
+
+    if channel == "all":
+        channel_results = run_detection_channels(params, audio_obj, mode, workers=channel_workers or audio_obj.num_channels,
+                                                 cancel_token=cancel_token, cluster_backend=cluster_backend, single_pass=single_pass)
+    else:
+        channel_results = [run_detection(params, audio_obj, mode, cluster_backend=cluster_backend, single_pass=single_pass,
+                                         workers=segment_workers, cancel_token=cancel_token)]
+    if is_cancelled(cancel_token):
+        result["status"] = "cancelled"
+        result["elapsed"] = time.perf_counter() - start_time
+        return result
+    if is_vad_mode:
+        channel_results = [postprocess_vad(onsets, offsets, audio_obj.duration_seconds) for onsets, offsets in channel_results]
+
+    if channel == "all":
+        onsets = [channel_onsets for channel_onsets, _ in channel_results]
+        offsets = [channel_offsets for _, channel_offsets in channel_results]
+        create_textgrid_with_time_point(audio_file_path, is_vad_mode, update_parent_csv=False, duration=audio_obj.duration_seconds,
+                                        channels=channel_results)
+    else:
+        onsets, offsets = channel_results[0]
+        create_textgrid_with_time_point(audio_file_path, is_vad_mode, onsets, offsets, update_parent_csv=False,
+                                        duration=audio_obj.duration_seconds)
+    if cache is not None:
+        cache.put(cache_key, onsets, offsets, audio_obj.duration_seconds)
+
+    result["onsets"] = onsets
+    result["offsets"] = offsets
+    result["elapsed"] = time.perf_counter() - start_time
+    return result
+
+
+# 子进程中的取消标志（由_init_worker创建）
+_worker_cancel_token = None
+
+
+def _init_worker(log_level, cancel_event=None):
+    """子进程初始化：设置日志级别，避免大量进度日志刷屏；cancel_event为主进程中的multiprocessing.Event"""
+    global _worker_cancel_token
+    logging.getLogger("Praditor").setLevel(log_level)
+    _worker_cancel_token = CancellationToken(cancel_event) if cancel_event is not None else None
+
+
+def _process_file_task(*args, **kwargs):
+    """在子进程中处理一个文件（参数见process_file），使用主进程共享的取消标志"""
+    return process_file(*args, cancel_token=_worker_cancel_token, **kwargs)
+
+
+def run_batch(folder, mode="general", workers=None, params_path=None, log_level=logging.WARNING, report_every=5.0, cluster_backend=None,
+              single_pass=False, segment_workers=1, analysis_dtype="float64", stats=False, cancel_token=None, cache=None, force=False,
+              channel=0, channel_workers=None):
+    """使用进程池对文件夹中的所有音频文件执行检测
+
+    Args:
+        folder: 音频文件夹路径
+        mode: "general"或"vad"
+        workers: 进程数，默认为CPU核数
+        params_path: 指定参数文件；为None时每个文件按照File→Folder→Default优先级加载
+        log_level: 子进程的日志级别
+        report_every: 进度汇报间隔（秒）
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        single_pass: VAD模式下沿用分段时的检测结果，不再逐段重新检测
+        segment_workers: 单个文件内部分段并行检测的进程数；适合少量长录音（可配合workers=1）
+        analysis_dtype: 分析使用的浮点类型，"float64"或"float32"
+        stats: 是否为每个文件写出各阶段的耗时和计数（见process_file）
+        cancel_token: CancellationToken；通过共享的事件传给子进程，正在检测的文件在下一个分块边界处返回（不写出结果），
+            还没开始的文件不再处理（汇总CSV只包含已完成的文件）
+        cache: ResultCache；音频和参数都没有改变的文件直接复用缓存的结果，全部完成后按大小上限淘汰旧结果
+        force: 忽略缓存中的结果，全部重新检测
+        channel: 多声道音频检测的声道（见process_file）；为"all"时汇总CSV中每个声道一组行，文件名加_ch1、_ch2……后缀
+        channel_workers: channel为"all"时每个文件同时检测的声道数，默认为声道数
+
+    Returns:
+        每个文件的结果字典列表（按文件名排序）
+    """
+    file_paths = list_audio_files(folder)
+    if not file_paths:
+        sot_logger.warning(f"No audio files found in {folder}")
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    is_vad_mode = mode == "vad"
+    sot_logger.info(f"Processing {len(file_paths)} files with {workers} workers")
+
+    store = ResultStore.for_audio(file_paths[0], is_vad_mode)
+    results = []
+    start_time = time.perf_counter()
+    last_report = start_time
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_level, shared_event(cancel_token))) as executor:
+        futures = {executor.submit(_process_file_task, fpath, mode, params_path, cluster_backend, single_pass, segment_workers,
+                                   analysis_dtype, stats, cache=cache, force=force, channel=channel,
+                                   channel_workers=channel_workers): fpath for fpath in file_paths}
+        for future in as_completed(futures):
+            fpath = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                sot_logger.error(f"Error: {fpath}: {e}")
+                result = {"path": fpath, "onsets": [], "offsets": [], "status": "failed", "error": str(e)}
+
+            # 汇总结果只在主进程中记录，避免多进程同时写同一个文件
+            if result["status"] == "done":
+                audio_filename = os.path.splitext(os.path.basename(fpath))[0]
+                if channel == "all":
+                    for index, (onsets, offsets) in enumerate(zip(result["onsets"], result["offsets"]), start=1):
+                        store.record(audio_filename, onsets, offsets, channel=index)
+                else:
+                    store.record(audio_filename, result["onsets"], result["offsets"])
+            results.append(result)
+
+            now = time.perf_counter()
+            if now - last_report >= report_every or len(results) == len(file_paths):
+                sot_logger.info(f"Processed {len(results)}/{len(file_paths)} files ({len(results) / (now - start_time):.2f} files/sec)")
+                last_report = now
+
+            if is_cancelled(cancel_token):
+                executor.shutdown(wait=False, cancel_futures=True)
+                sot_logger.info("Batch cancelled")
+                break
+
+    # 全部完成后一次性写出汇总CSV
+    store.materialize()
+    if cache is not None:
+        cache.prune()
+
+    elapsed = time.perf_counter() - start_time
+    failed = sum(1 for result in results if result["status"] == "failed")
+    skipped = sum(1 for result in results if result["status"] == "skipped")
+    cached = sum(1 for result in results if result.get("cached"))
+    sot_logger.info(f"Finished {len(results)} files in {elapsed:.1f}s ({len(results) / elapsed:.2f} files/sec), {failed} failed, {skipped} skipped, "
+                    f"{cached} from cache")
+
+    results.sort(key=lambda result: result["path"])
+    return results
+
+
+class BatchJob:
+    """在有界进程池上逐个分发文件的批处理任务，每个文件完成后通过回调返回结果（用于GUI的run-all）
+
+    与run_batch一次提交所有文件不同，同时在处理中的文件不超过workers个，一个完成再提交下一个，
+    因此可以准确回调每个文件开始处理的时间。取消时主进程和子进程共用一个multiprocessing.Event，
+    正在检测的文件在下一个分块边界处返回（不写出结果），还没开始的文件不再提交。
+
+    回调在调用start()的线程或进程池的内部线程中调用，GUI中需要通过信号转到主线程。
+    """
+
+    def __init__(self, file_paths, mode="general", params=None, workers=None, cluster_backend=None, log_level=logging.WARNING,
+                 on_start=None, on_done=None, on_finished=None, cache=None, force=False):
+        """初始化批处理任务
+
+        Args:
+            file_paths: 音频文件路径列表（需在同一文件夹中，汇总CSV写在其父文件夹）
+            mode: "general"或"vad"
+            params: 所有文件共用的参数字典；为None时每个文件按照File→Folder→Default优先级加载
+            workers: 进程数，默认为CPU核数
+            cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+            log_level: 子进程的日志级别
+            on_start: on_start(index)，第index个文件开始处理时调用
+            on_done: on_done(index, result)，第index个文件处理完成时调用，result见process_file
+            on_finished: on_finished(results)，所有文件完成（或取消后正在处理的文件都返回）时调用
+            cache: ResultCache，见process_file；结束时按大小上限淘汰旧结果
+            force: 忽略缓存中的结果，全部重新检测
+        """
+        self.file_paths = list(file_paths)
+        self.mode = mode
+        self.params = params
+        self.workers = min(workers or os.cpu_count() or 1, max(len(self.file_paths), 1))
+        self.cluster_backend = cluster_backend
+        self.log_level = log_level
+        self.on_start = on_start
+        self.on_done = on_done
+        self.on_finished = on_finished
+        self.cache = cache
+        self.force = force
+        self.results = [None] * len(self.file_paths)
+        self.cancel_token = CancellationToken(multiprocessing.Event())
+        self._lock = threading.RLock()
+        self._executor = None
+        self._store = None
+        self._next = 0
+        self._active = 0
+        self._finished = False
+
+    def start(self):
+        """创建进程池并提交前workers个文件"""
+        if not self.file_paths:
+            self._finish()
+            return
+        self._store = ResultStore.for_audio(self.file_paths[0], self.mode == "vad")
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.log_level, self.cancel_token.shared_event()))
+        sot_logger.info(f"Processing {len(self.file_paths)} files with {self.workers} workers")
+        with self._lock:
+            for _ in range(self.workers):
+                self._submit_next()
+
+    def cancel(self):
+        """取消任务：正在处理的文件尽快返回，不再提交新的文件"""
+        self.cancel_token.cancel()
+
+    @property
+    def finished(self):
+        """是否已经结束（完成或取消）"""
+        return self._finished
+
+    def _submit_next(self):
+        """提交下一个文件（需持有锁）
+
+        Returns:
+            是否提交了新的文件
+        """
+        if self.cancel_token.cancelled or self._next >= len(self.file_paths):
+            return False
+        index = self._next
+        self._next += 1
+        self._active += 1
+        if self.on_start is not None:
+            self.on_start(index)
+        future = self._executor.submit(_process_file_task, self.file_paths[index], self.mode, cluster_backend=self.cluster_backend,
+                                       params=self.params, cache=self.cache, force=self.force)
+        future.add_done_callback(lambda future, index=index: self._done(index, future))
+        return True
+
+    def _done(self, index, future):
+        fpath = self.file_paths[index]
+        try:
+            result = future.result()
+        except Exception as e:
+            sot_logger.error(f"Error: {fpath}: {e}")
+            result = {"path": fpath, "onsets": [], "offsets": [], "status": "failed", "error": str(e)}
+
+        with self._lock:
+            # 汇总结果只在主进程中记录，避免多进程同时写同一个文件
+            if result["status"] == "done":
+                self._store.record(os.path.splitext(os.path.basename(fpath))[0], result["onsets"], result["offsets"])
+            self.results[index] = result
+            self._active -= 1
+            if self.on_done is not None:
+                self.on_done(index, result)
+            if not self._submit_next() and self._active == 0:
+                self._finish()
+
+    def _finish(self):
+        """写出汇总CSV并关闭进程池"""
+        if self._store is not None:
+            self._store.materialize()
+        if self.cache is not None:
+            self.cache.prune()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._finished = True
+        done = sum(1 for result in self.results if result is not None and result["status"] == "done")
+        sot_logger.info(f"Finished {done}/{len(self.file_paths)} files" + (" (cancelled)" if self.cancel_token.cancelled else ""))
+        if self.on_finished is not None:
+            self.on_finished(self.results)
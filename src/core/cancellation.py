@@ -0,0 +1,68 @@
+import multiprocessing
+import multiprocessing.synchronize
+import threading
+
+
+class CancellationToken:
+    """单个检测任务的取消标志
+
+    每个任务（文件、分段、参数扫描）持有自己的token，互不影响；
+    检测在各阶段和热循环的分块边界检查token，被取消后尽快返回，不需要强制终止线程。
+    """
+
+    def __init__(self, event=None):
+        """初始化取消标志
+
+        Args:
+            event: 已有的事件对象；传入multiprocessing.Event时可以在子进程中取消（见batch.BatchJob）
+        """
+        self._event = event if event is not None else threading.Event()
+        self._shared_events = []  # shared_event()创建的、需要一起设置的multiprocessing.Event
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """取消任务（可在任意线程中调用）"""
+        with self._lock:
+            self._event.set()
+            for event in self._shared_events:
+                event.set()
+
+    def shared_event(self):
+        """可以传给进程池子进程的事件（只能通过initializer的initargs传递）
+
+        token本身由multiprocessing.Event创建时直接返回它；否则新建一个multiprocessing.Event，
+        之后调用cancel()时一起设置。子进程中用CancellationToken(event)重建token。
+
+        Returns:
+            multiprocessing.Event
+        """
+        if isinstance(self._event, multiprocessing.synchronize.Event):
+            return self._event
+        event = multiprocessing.Event()
+        with self._lock:
+            if self._event.is_set():
+                event.set()
+            self._shared_events.append(event)
+        return event
+
+    @property
+    def cancelled(self):
+        """任务是否已被取消"""
+        return self._event.is_set()
+
+
+def is_cancelled(cancel_token):
+    """检查token是否已被取消；token为None表示任务不可取消
+
+    Args:
+        cancel_token: CancellationToken或None
+
+    Returns:
+        是否已被取消
+    """
+    return cancel_token is not None and cancel_token.cancelled
+
+
+def shared_event(cancel_token):
+    """cancel_token对应的、可以传给子进程的事件；token为None时返回None（子进程中的任务不可取消）"""
+    return cancel_token.shared_event() if cancel_token is not None else None
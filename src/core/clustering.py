@@ -0,0 +1,247 @@
+from collections import deque
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+try:
+    from sklearn.cluster import DBSCAN
+except ImportError:  # light版本不带sklearn
+    DBSCAN = None
+
+
+BACKENDS = ("sklearn", "kdtree", "grid")
+DEFAULT_BACKEND = "sklearn" if DBSCAN is not None else "grid"
+
+
+def dbscan_sklearn(points, eps, min_samples):
+    """使用sklearn的DBSCAN（曼哈顿距离）
+
+    Returns:
+        每个点的标签，-1表示噪声点
+    """
+    if DBSCAN is None:
+        raise ImportError("scikit-learn is not installed, use the 'kdtree' or 'grid' backend instead")
+    return DBSCAN(eps=eps, min_samples=min_samples, metric="manhattan").fit(points).labels_
+
+
+def dbscan_kdtree(points, eps, min_samples):
+    """基于cKDTree的DBSCAN（即legacy/dbscan.py中light版本使用的实现）
+
+    Returns:
+        每个点的标签，-1表示噪声点
+    """
+    n_samples = points.shape[0]
+    labels = np.full(n_samples, -1, dtype=int)
+    if n_samples == 0:
+        return labels
+
+    tree = cKDTree(points)
+    neighborhoods = tree.query_ball_point(points, r=eps, p=1)
+    core_samples = np.array([len(neigh) for neigh in neighborhoods]) >= min_samples
+    cluster_id = 0
+
+    for i in range(n_samples):
+        if not core_samples[i] or labels[i] != -1:
+            continue
+        labels[i] = cluster_id
+        queue = deque([i])
+
+        while queue:
+            current = queue.popleft()
+            for neighbor in neighborhoods[current]:
+                if labels[neighbor] == -1:
+                    labels[neighbor] = cluster_id
+                    if core_samples[neighbor]:
+                        queue.append(neighbor)
+        cluster_id += 1
+
+    return labels
+
+
+def dbscan_grid(points, eps, min_samples):
+    """针对二维点的网格DBSCAN，时间O(n log n)，内存O(n)
+
+    曼哈顿距离在旋转坐标 u=x+y, v=x-y 下等价于切比雪夫距离，
+    因此把点放进边长为eps的(u, v)网格后：
+    - 同一格子内的点两两距离都不超过eps；
+    - 距离不超过eps的点一定落在相邻(3×3)的格子里。
+    点数达到min_samples的格子整体都是核心点，其余格子只需要和相邻格子逐点比较；
+    格子之间是否连通只需比较边界点，不需要保存每个点的邻居列表。
+
+    标签编号规则与sklearn一致：簇按其最小核心点下标排序，
+    边界点归入能到达它的编号最小的簇（距离恰好等于eps的浮点边界情况除外）。
+
+    Returns:
+        每个点的标签，-1表示噪声点
+    """
+    n_samples = points.shape[0]
+    labels = np.full(n_samples, -1, dtype=int)
+    if n_samples == 0:
+        return labels
+    if not np.isfinite(eps) or eps <= 0:
+        return dbscan_kdtree(points, eps, min_samples)
+
+    u = points[:, 0] + points[:, 1]
+    v = points[:, 0] - points[:, 1]
+
+    # 1. 分格
+    cell_u = np.floor(u / eps).astype(np.int64)
+    cell_v = np.floor(v / eps).astype(np.int64)
+    cell_u -= cell_u.min() - 1
+    cell_v -= cell_v.min() - 1
+    width = int(cell_v.max()) + 2
+    keys = cell_u * width + cell_v
+
+    cell_keys, point_cell, cell_counts = np.unique(keys, return_inverse=True, return_counts=True)
+    point_cell = point_cell.ravel()
+    n_cells = len(cell_keys)
+    order = np.argsort(point_cell, kind="stable")
+    cell_starts = np.concatenate(([0], np.cumsum(cell_counts)[:-1]))
+
+    def cell_points(c):
+        return order[cell_starts[c]:cell_starts[c] + cell_counts[c]]
+
+    # 每个格子的3×3邻居格子，不存在时为-1
+    offsets = [(du, dv) for du in (-1, 0, 1) for dv in (-1, 0, 1)]
+    neighbors = np.full((n_cells, len(offsets)), -1, dtype=np.int64)
+    for k, (du, dv) in enumerate(offsets):
+        target = cell_keys + du * width + dv
+        pos = np.searchsorted(cell_keys, target)
+        pos_clipped = np.minimum(pos, n_cells - 1)
+        found = cell_keys[pos_clipped] == target
+        neighbors[found, k] = pos_clipped[found]
+
+    def block_points(c):
+        return np.concatenate([cell_points(nb) for nb in neighbors[c] if nb >= 0])
+
+    def within_eps(a, b):
+        return np.maximum(np.abs(u[a][:, None] - u[b][None, :]), np.abs(v[a][:, None] - v[b][None, :])) <= eps
+
+    # 2. 核心点
+    is_core = np.zeros(n_samples, dtype=bool)
+    dense = cell_counts >= min_samples
+    is_core[dense[point_cell]] = True
+
+    block_counts = np.where(neighbors >= 0, cell_counts[np.maximum(neighbors, 0)], 0).sum(axis=1)
+    for c in np.flatnonzero(~dense & (block_counts >= min_samples)):
+        members = cell_points(c)
+        is_core[members] = within_eps(members, block_points(c)).sum(axis=1) >= min_samples
+
+    core_idx = np.flatnonzero(is_core)
+    if len(core_idx) == 0:
+        return labels
+
+    # 3. 核心格子之间的连通性
+    core_cells = np.unique(point_cell[core_idx])
+    core_cell_mask = np.zeros(n_cells, dtype=bool)
+    core_cell_mask[core_cells] = True
+
+    core_order = core_idx[np.argsort(point_cell[core_idx], kind="stable")]
+    core_counts = np.bincount(point_cell[core_idx], minlength=n_cells)
+    core_starts = np.concatenate(([0], np.cumsum(core_counts)[:-1]))
+
+    def cell_cores(c):
+        return core_order[core_starts[c]:core_starts[c] + core_counts[c]]
+
+    u_min = np.full(n_cells, np.inf)
+    u_max = np.full(n_cells, -np.inf)
+    v_min = np.full(n_cells, np.inf)
+    v_max = np.full(n_cells, -np.inf)
+    np.minimum.at(u_min, point_cell[core_idx], u[core_idx])
+    np.maximum.at(u_max, point_cell[core_idx], u[core_idx])
+    np.minimum.at(v_min, point_cell[core_idx], v[core_idx])
+    np.maximum.at(v_max, point_cell[core_idx], v[core_idx])
+
+    edges_a = [core_cells]
+    edges_b = [core_cells]
+    for du, dv in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+        k = offsets.index((du, dv))
+        a = core_cells
+        b = neighbors[a, k]
+        keep = b >= 0
+        a, b = a[keep], b[keep]
+        keep = core_cell_mask[b]
+        a, b = a[keep], b[keep]
+        if len(a) == 0:
+            continue
+
+        if dv == 0:  # 同一行：v方向距离必然小于eps
+            linked = u_min[b] - u_max[a] <= eps
+        elif du == 0:  # 同一列：u方向距离必然小于eps
+            linked = v_min[b] - v_max[a] <= eps
+        else:  # 对角格子：先用边界粗筛，再逐对精确判断
+            if dv == 1:
+                linked = (u_min[b] - u_max[a] <= eps) & (v_min[b] - v_max[a] <= eps)
+            else:
+                linked = (u_min[b] - u_max[a] <= eps) & (v_min[a] - v_max[b] <= eps)
+            for j in np.flatnonzero(linked):
+                cores_a = cell_cores(a[j])
+                cores_b = cell_cores(b[j])
+                sort_b = np.argsort(u[cores_b], kind="stable")
+                sorted_u = u[cores_b][sort_b]
+                reach = np.searchsorted(sorted_u, u[cores_a] + eps, side="right")
+                has_reach = reach > 0
+                if dv == 1:
+                    prefix = np.minimum.accumulate(v[cores_b][sort_b])
+                    hit = prefix[np.maximum(reach, 1) - 1] <= v[cores_a] + eps
+                else:
+                    prefix = np.maximum.accumulate(v[cores_b][sort_b])
+                    hit = prefix[np.maximum(reach, 1) - 1] >= v[cores_a] - eps
+                linked[j] = bool(np.any(has_reach & hit))
+
+        edges_a.append(a[linked])
+        edges_b.append(b[linked])
+
+    edges_a = np.concatenate(edges_a)
+    edges_b = np.concatenate(edges_b)
+    graph = coo_matrix((np.ones(len(edges_a), dtype=np.int8), (edges_a, edges_b)), shape=(n_cells, n_cells))
+    _, cell_component = connected_components(graph, directed=False)
+
+    # 簇的编号按其最小核心点下标排序，与sklearn的扫描顺序一致
+    core_component = cell_component[point_cell[core_idx]]
+    components, core_component = np.unique(core_component, return_inverse=True)
+    first_core = np.full(len(components), n_samples, dtype=np.int64)
+    np.minimum.at(first_core, core_component, core_idx)
+    rank = np.empty(len(components), dtype=int)
+    rank[np.argsort(first_core)] = np.arange(len(components))
+    labels[core_idx] = rank[core_component]
+
+    # 4. 边界点：归入能到达它的编号最小的簇
+    border_cells = np.unique(point_cell[~is_core])
+    for c in border_cells:
+        block_cells = neighbors[c][neighbors[c] >= 0]
+        block_cells = block_cells[core_cell_mask[block_cells]]
+        if len(block_cells) == 0:
+            continue
+        members = cell_points(c)
+        members = members[~is_core[members]]
+        block_cores = np.concatenate([cell_cores(nb) for nb in block_cells])
+        reach = within_eps(members, block_cores)
+        candidate = np.where(reach, labels[block_cores][None, :], n_samples).min(axis=1)
+        labels[members] = np.where(candidate < n_samples, candidate, -1)
+
+    return labels
+
+
+def cluster_points(points, eps, min_samples, backend=None):
+    """对二维点做DBSCAN聚类（曼哈顿距离）
+
+    Args:
+        points: 形状为(n, 2)的点数组
+        eps: 邻域半径
+        min_samples: 核心点所需的最少邻居数（包括自身）
+        backend: "sklearn"、"kdtree"或"grid"，默认为DEFAULT_BACKEND
+
+    Returns:
+        每个点的标签，-1表示噪声点
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "sklearn":
+        return dbscan_sklearn(points, eps, min_samples)
+    elif backend == "kdtree":
+        return dbscan_kdtree(points, eps, min_samples)
+    elif backend == "grid":
+        return dbscan_grid(points, eps, min_samples)
+    raise ValueError(f"Unknown clustering backend: {backend}. Choose from {BACKENDS}")
@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.core.instrumentation import count, timer
+from src.utils.audio import bandpass_filter
+
+
+# 候选区间缓存最多保留的(截止频率, onset/offset, eps_ratio)组数，超出时淘汰最久未使用的一组
+REGION_CACHE_GROUPS = 32
+
+
+class AnalysisContext:
+    """单个音频文件的共享分析上下文
+
+    整段音频对每组截止频率(cutoff0, cutoff1)只滤波一次，
+    分段、onset、offset等各个阶段都从这里取只读视图（不复制数据），
+    也不再有分段边界处的滤波边缘效应。
+
+    40Hz最大值包络仍按每个片段自己的网格计算（onset从片段起点、offset从片段终点开始分帧），
+    与逐段滤波时完全一致；包络只有滤波结果的1/ds大小，每次重新计算的开销可以忽略。
+
+    cache_regions为True时还会按(片段, 截止频率, eps_ratio)缓存聚类得到的候选区间，
+    用于参数扫描中只改变细化参数（amp、ratio等）的多组参数；最多保留REGION_CACHE_GROUPS组。
+    """
+
+    def __init__(self, audio_obj, cache_regions=False):
+        """初始化分析上下文
+
+        Args:
+            audio_obj: 整段音频的ReadSound对象；之后传入的片段都必须由同一音频切片得到
+            cache_regions: 是否缓存聚类得到的候选区间
+        """
+        self.audio_obj = audio_obj
+        self.frame_rate = audio_obj.frame_rate
+        self.ds_factor = audio_obj.frame_rate // 40  # 把一秒钟的音频分成n=40份
+        self._filtered = {}
+        self.cache_regions = cache_regions
+        self._regions = OrderedDict()  # (cutoff0, cutoff1, which_set, eps_ratio) -> {(片段起点, 终点): 候选区间}
+        self._lock = threading.Lock()
+
+    def filtered(self, cutoff0, cutoff1):
+        """获取整段音频的带通滤波结果（每组截止频率只计算一次）
+
+        Args:
+            cutoff0: 低截止频率
+            cutoff1: 高截止频率
+
+        Returns:
+            滤波后的整段音频数组（只读）
+        """
+        key = (float(cutoff0), float(cutoff1))
+        with self._lock:
+            if key not in self._filtered:
+                with timer("filtering"):
+                    filtered = bandpass_filter(
+                        np.asarray(self.audio_obj.get_array_of_samples()),
+                        lowcut=cutoff0,
+                        highcut=cutoff1,
+                        fs=self.frame_rate,
+                        dtype=self.audio_obj.analysis_dtype
+                    )
+                filtered.flags.writeable = False
+                self._filtered[key] = filtered
+            return self._filtered[key]
+
+    def cached_arrays(self):
+        """返回所有已缓存的滤波结果，用于在进程之间共享
+
+        Returns:
+            {(cutoff0, cutoff1): filtered}
+        """
+        with self._lock:
+            return dict(self._filtered)
+
+    def add_arrays(self, cutoff0, cutoff1, filtered):
+        """放入已经计算好的滤波结果，例如共享内存中的数组
+
+        Args:
+            cutoff0: 低截止频率
+            cutoff1: 高截止频率
+            filtered: 整段音频的滤波结果
+        """
+        with self._lock:
+            self._filtered[(float(cutoff0), float(cutoff1))] = filtered
+
+    def cached_regions(self, audio_clip, cutoff0, cutoff1, which_set, eps_ratio, compute):
+        """获取片段的候选区间；cache_regions为False时直接计算
+
+        Args:
+            audio_clip: 由同一音频切片得到的ReadSound对象
+            cutoff0: 低截止频率
+            cutoff1: 高截止频率
+            which_set: "onset"或"offset"
+            eps_ratio: 聚类半径比例
+            compute: 无参数的函数，返回候选区间（结果不可被修改）
+
+        Returns:
+            compute()的结果
+        """
+        if not self.cache_regions:
+            return compute()
+
+        group_key = (float(cutoff0), float(cutoff1), which_set, float(eps_ratio))
+        start = audio_clip.start_frame
+        clip_key = (start, start + len(audio_clip.get_array_of_samples()))
+        with self._lock:
+            group = self._regions.get(group_key)
+            if group is not None:
+                self._regions.move_to_end(group_key)
+                if clip_key in group:
+                    count("region_cache_hits")
+                    return group[clip_key]
+        regions = compute()
+        with self._lock:
+            self._regions.setdefault(group_key, {})[clip_key] = regions
+            self._regions.move_to_end(group_key)
+            while len(self._regions) > REGION_CACHE_GROUPS:
+                self._regions.popitem(last=False)
+        return regions
+
+    def clip_arrays(self, audio_clip, cutoff0, cutoff1, which_set="onset"):
+        """获取片段对应的滤波数组（视图）和40Hz最大值包络
+
+        与逐段滤波时的处理相同：offset时先翻转，再去掉末尾不足一帧的采样点后分帧取最大值。
+
+        Args:
+            audio_clip: 由同一音频切片得到的ReadSound对象（使用其start_frame定位）
+            cutoff0: 低截止频率
+            cutoff1: 高截止频率
+            which_set: "onset"或"offset"
+
+        Returns:
+            (filtered, envelope)
+        """
+        ds = self.ds_factor
+        start = audio_clip.start_frame
+        filtered = self.filtered(cutoff0, cutoff1)[start:start + len(audio_clip.get_array_of_samples())]
+        if which_set == "offset":
+            filtered = filtered[::-1]
+
+        with timer("downsampling"):
+            n_frames = len(filtered) // ds
+            filtered = filtered[:n_frames * ds]
+            envelope = np.max(filtered.reshape((n_frames, ds)), axis=1) if n_frames else filtered[:0]
+        return filtered, envelope
@@ -1,4 +1,4 @@
-import gc
+import copy
 import math
 import os
 import sys
@@ -8,20 +8,22 @@ import csv
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 import numpy as np
-from sklearn.cluster import DBSCAN
 from textgrid import TextGrid, PointTier, Point, IntervalTier, Interval
 
+from src.core.cancellation import is_cancelled
+from src.core.clustering import cluster_points
+from src.core.context import AnalysisContext
+from src.core.instrumentation import count, timed, timer
+from src.core.refine import scan_onset
+from src.core.results import ResultStore
 from src.utils.audio import bandpass_filter, get_current_time, ReadSound
 from src.utils.logger import sot_logger
+from src.utils.params import get_default_params_path, parse_params, read_params_file, typed_params
 
 
-global stop_flag  # 全局停止变量
-stop_flag = False
-
-
-
-
-def segment_audio(audio_obj, segment_duration=10, min_pause=0.2, params="folder", mode="vad", verbose=False):
+@timed("segment_audio")
+def segment_audio(audio_obj, segment_duration=10, min_pause=0.2, params="folder", mode="vad", verbose=False, cluster_backend=None, context=None,
+                  return_detections=False, cancel_token=None):
     """分割音频文件，用于VAD模式下的音频处理
     
     Args:
@@ -31,46 +33,46 @@ def segment_audio(audio_obj, segment_duration=10, min_pause=0.2, params="folder"
         params: 参数来源，"file"、"folder"、"default"或直接传入参数字典
         mode: 模式，默认为"vad"
         verbose: 是否输出详细信息
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        context: AnalysisContext；提供时使用其中的音频和滤波结果
+        return_detections: 是否同时返回分段时已经得到的检测结果
+        cancel_token: CancellationToken；每个窗口检测前检查，被取消时返回空结果
     
     Returns:
-        分段结果列表，每个元素为[start, end]，单位为毫秒
+        分段结果列表，每个元素为[start, end]，单位为毫秒；
+        return_detections为True时返回(segments, detections)，
+        detections与segments一一对应，每个元素为(onsets, offsets)（秒，相对整段音频），
+        为None表示该分段没有被完整覆盖，需要重新检测
     """
 
-    if stop_flag:
-        return []
-    wav_path = audio_obj.fpath
+    if is_cancelled(cancel_token):
+        return ([], []) if return_detections else []
+    # 由数组构造的音频（例如合成音频）没有文件路径，此时params只能直接传入参数字典
+    wav_path = getattr(audio_obj, "fpath", None) or ""
 
-    audio_obj = ReadSound(wav_path)
+    # 直接使用传入的音频（例如split_channels得到的声道视图），不重新读取文件
+    if context is not None:
+        audio_obj = context.audio_obj
 
     folder_param_path = os.path.join(os.path.dirname(wav_path), "params_vad.txt")
-    file_txt_path = wav_path.replace(".wav", "_vad.txt")
+    file_txt_path = os.path.splitext(wav_path)[0] + "_vad.txt"
 
     match params:
-        case "file":
-            if os.path.exists(file_txt_path):
-                with open(file_txt_path, "r") as f:
-                    params = eval(f.read())
-            else:
-                params = default_params
-        case "folder":
-            if os.path.exists(folder_param_path):
-                with open(folder_param_path, "r") as f:
-                    params = eval(f.read())
-            else:
-                params = default_params
-        case "default":
-            params = default_params
-        case _:  # 最好直接输入dict
-            if type(params) == dict:
-                params = params
-            elif type(params) == str:
-                params = eval(params)
-            else:
-                params = default_params
+        case "file" if os.path.exists(file_txt_path):
+            params = read_params_file(file_txt_path)
+        case "folder" if os.path.exists(folder_param_path):
+            params = read_params_file(folder_param_path)
+        case dict():  # 最好直接输入dict
+            pass
+        case str() if params not in ("file", "folder", "default"):
+            params = parse_params(params)
+        case _:
+            params = read_params_file(get_default_params_path(is_vad_mode=True))
     
     params["offset"] = params["onset"]  # VAD特供
 
     segments = []
+    detections = []
 
     y = audio_obj.arr
     sr = audio_obj.frame_rate
@@ -80,18 +82,21 @@ def segment_audio(audio_obj, segment_duration=10, min_pause=0.2, params="folder"
     start = 0.0 * 1000
     end = segment_duration * 1000
     while end <= audio_len * 1000:
-        if stop_flag:
-            return []
+        if is_cancelled(cancel_token):
+            return ([], []) if return_detections else []
         segment = audio_obj[start:end]
+        count("segment_windows")
         # print(type(segment) == type(audio_obj))
-        onsets = detectPraditor(params, segment, "onset", mode=mode)
-        offsets = detectPraditor(params, segment, "offset", mode=mode)
+        onsets = detectPraditor(params, segment, "onset", mode=mode, cluster_backend=cluster_backend, context=context, cancel_token=cancel_token)
+        offsets = detectPraditor(params, segment, "offset", mode=mode, cluster_backend=cluster_backend, context=context, cancel_token=cancel_token)
         # print()
         # print(start, end)
         # print(onsets, offsets, audio_len * 1000)
         if not onsets or not offsets:
             if segments:
                 segments[-1][1] = end
+                detections[-1][0].extend(x + start/1000 for x in onsets)
+                detections[-1][1].extend(x + start/1000 for x in offsets)
             # 首个窗口没检测到语音，跳过继续往后搜索
         else:
 
@@ -123,6 +128,12 @@ def segment_audio(audio_obj, segment_duration=10, min_pause=0.2, params="folder"
             # -----------------
 
             segments.append([start, end])
+            # 只保留切分点之前的结果；切分点之后的部分由下一个窗口重新检测
+            cut = (end - start) / 1000
+            detections.append((
+                [x + start/1000 for x in onsets if x < cut],
+                [x + start/1000 for x in offsets if x < cut],
+            ))
 
         start = end
         end = start + segment_duration * 1000
@@ -130,134 +141,83 @@ def segment_audio(audio_obj, segment_duration=10, min_pause=0.2, params="folder"
         if end > audio_len * 1000:
             if audio_len * 1000 - start > 10:
                 segments[-1][1] = audio_len * 1000
+                detections[-1] = None  # 末尾没有被任何窗口检测过
                 break
             else:
                 segments.append([start, audio_len * 1000])
+                detections.append(None)
                 break
     # print(segments)
     if not segments:
         segments.append([0.0, audio_len * 1000])
+        detections.append(None)
     
     # print(segments)
     # exit()
+    count("segments", len(segments))
+    if return_detections:
+        return segments, detections
     return segments
 
 
 
-def detectPraditor(params, audio_obj, which_set, mode="general", stime=0, etime=-1, verbose=False):
-    """
-    合并后的检测函数
-    
-    Args:
-        params: 检测参数
-        audio_obj: 音频对象
-        which_set: "onset"或"offset"
-        mode: "general"（通用模式）或"vad"（VAD模式）
-        stime: 开始时间（毫秒），默认0
-        etime: 结束时间（毫秒），默认-1表示整个音频
-        verbose: 是否输出详细信息，默认False
-    """
-
-    if stop_flag:
-        return []
-
-    # 导入数据，并且遵循一定之格式
-    for xset in params:
-        for item in params[xset]:
-            # print(1)
-            try:
-                params[xset][item] = eval(params[xset][item])
-            except Exception:
-                pass
-            # print(2)
-
-
-    mode = mode.lower()
+@timed("clustering")
+def cluster_envelope(_audio_arr_ds, eps_ratio, _dsFactor, _audio_samplerate, cluster_backend=None):
+    """把40Hz最大值包络相邻两帧组成的点聚类
 
-    # VAD模式特殊处理：强制将offset参数设为与onset相同
-    if mode == "vad":
-        params["offset"] = params["onset"]
-
-    params = params[which_set]  # 选择是onset还是offset
-
-    # VAD模式固定参数
-    if mode == "vad":
-        params.update({
-            "ratio": 0.9,
-            "win_size": 50,
-            "ref_len": 250,
-            "penalty": 10
-        })
-
-    # 处理时间范围
-    if etime != -1:
-        audio_obj = audio_obj[stime*1000:etime*1000]    
-    # 检查是否需要停止
-    if stop_flag:
-        return []
-    
-    _answer_frames = []
-    _audio_obj = audio_obj
-    _audio_samplerate = audio_obj.frame_rate
-
-    _audio_arr_filtered = bandpass_filter(
-        np.array(audio_obj.get_array_of_samples()),
-        lowcut=params["cutoff0"],
-        highcut=params["cutoff1"],
-        fs=_audio_obj.frame_rate
-    )
-
-    # warning or auto change?
-    if which_set == "offset":
-        _audio_arr_filtered = np.flip(_audio_arr_filtered)
+    Args:
+        _audio_arr_ds: 40Hz最大值包络
+        eps_ratio: 聚类半径相对于包络80%分位值的比例
+        _dsFactor: 降采样因子
+        _audio_samplerate: 采样率
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
 
-    # 1.1. 降采样
-    # 把一秒钟的音频分成n=40份
-    _dsFactor = _audio_obj.frame_rate // 40
+    Returns:
+        (点集, 聚类标签)
+    """
+    _points_array = np.column_stack((_audio_arr_ds[:-1], _audio_arr_ds[1:]))
 
-    # 统一降采样处理：确保音频长度能被降采样因子整除
-    if len(_audio_arr_filtered) % _dsFactor != 0:
-        _audio_arr_filtered = _audio_arr_filtered[:-(len(_audio_arr_filtered) % _dsFactor)]
+    _eps = eps_ratio * float(np.max(np.sort(_audio_arr_ds)[:int(.8 * len(_audio_arr_ds))]))  # 找到合适的radius，防止异常值
 
-    _audio_arr_ds = _audio_arr_filtered.reshape((len(_audio_arr_filtered) // _dsFactor, _dsFactor))
-    _audio_arr_ds = np.max(_audio_arr_ds, axis=1)  # 用max方法降采样
+    _min_samples = math.ceil(0.3/_dsFactor * _audio_samplerate)
+    _cluster_labels = cluster_points(_points_array, _eps, _min_samples, backend=cluster_backend)
 
-    _points_array = np.array([
-        [_audio_arr_ds[i] for i in range(len(_audio_arr_ds) - 1)],
-        [_audio_arr_ds[i + 1] for i in range(len(_audio_arr_ds) - 1)]
-    ]).T
+    count("points_clustered", len(_points_array))
+    count("clusters", len(set(_cluster_labels.tolist()) - {-1}))
+    return _points_array, _cluster_labels
 
-    _eps = params["eps_ratio"] * float(np.max(np.sort(_audio_arr_ds)[:int(.8 * len(_audio_arr_ds))]))  # 找到合适的radius，防止异常值
-    
 
-    del _audio_arr_ds
-    gc.collect()
+@timed("compensation")
+def regions_from_labels(_points_array, _cluster_labels, _dsFactor, _audio_samplerate):
+    """由聚类结果找出候选区间：选出最接近零点的噪声类，补偿其下方的点，合并成区间并去掉过短的间隔
 
-    _min_samples = math.ceil(0.3/_dsFactor * _audio_obj.frame_rate)
-    try:
-        _cluster = DBSCAN(eps=_eps, min_samples=_min_samples, metric="manhattan").fit(_points_array)
-    except MemoryError:
-        sot_logger.warning("Not enough memory")
-        return []
+    Args:
+        _points_array: 聚类点集
+        _cluster_labels: 聚类标签（会被原地修改）
+        _dsFactor: 降采样因子
+        _audio_samplerate: 采样率
 
+    Returns:
+        候选区间列表，元素为包络帧下标对；找不到时返回None
+    """
     # To look for the label with which the coordinate is closet to the zero point
     # xy值加起来最小值 -> 最接近零点
     noise_label = 0
-    for i in range(0, len(set(_cluster.labels_))-1):
-        if np.min(np.sum(_points_array[_cluster.labels_ == i], axis=1)) < np.min(np.sum(_points_array[_cluster.labels_ == noise_label], axis=1)):
+    for i in range(0, len(set(_cluster_labels))-1):
+        if np.min(np.sum(_points_array[_cluster_labels == i], axis=1)) < np.min(np.sum(_points_array[_cluster_labels == noise_label], axis=1)):
             noise_label = i
-    _points_confirmed = _points_array[_cluster.labels_ == noise_label]
+    _points_confirmed = _points_array[_cluster_labels == noise_label]
 
     # 把最小cluster以下的所有点都囊括进来
     if len(_points_confirmed) == 0:
-        return []
+        return None
     try:
         _points_compensation = np.array(range(len(_points_array)))[np.sum(np.square(_points_array), axis=1) <= np.mean(np.sum(np.square(_points_confirmed), axis=1))]
     except Exception:
-        return []
+        return None
 
 
-    _labels = _cluster.labels_
+    _labels = _cluster_labels
     for i in _points_compensation:
         _labels[int(i)] = noise_label
 
@@ -291,20 +251,68 @@ def detectPraditor(params, audio_obj, which_set, mode="general", stime=0, etime=
         _onsets = [i for i in _onsets if i not in _bad_onoffsets]
         _offsets = [i for i in _offsets if i not in _bad_onoffsets]
     _onoffsets = [(_onsets[i], _offsets[i]) for i in range(len(_onsets))]
+    count("candidates", len(_onoffsets))
+    return _onoffsets
+
+
+def find_candidate_regions(_audio_arr_ds, eps_ratio, _dsFactor, _audio_samplerate, cluster_backend=None):
+    """在40Hz最大值包络上聚类，找出待细化的候选区间
+
+    结果只取决于包络（即音频片段和截止频率）和eps_ratio，与其余参数无关，
+    因此可以在参数扫描的多组参数之间复用（见AnalysisContext.cached_regions）。
+
+    Args:
+        _audio_arr_ds: 40Hz最大值包络
+        eps_ratio: 聚类半径相对于包络80%分位值的比例
+        _dsFactor: 降采样因子
+        _audio_samplerate: 采样率
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
 
+    Returns:
+        (候选区间列表, 聚类点数)，候选区间为包络帧下标对；找不到时返回None
+    """
+    try:
+        _points_array, _cluster_labels = cluster_envelope(_audio_arr_ds, eps_ratio, _dsFactor, _audio_samplerate, cluster_backend)
+    except MemoryError:
+        sot_logger.warning("Not enough memory")
+        return None
+
+    _onoffsets = regions_from_labels(_points_array, _cluster_labels, _dsFactor, _audio_samplerate)
+    if _onoffsets is None:
+        return None
+    return _onoffsets, len(_cluster_labels)
+
+
+@timed("refinement")
+def refine_regions(_audio_arr_filtered, _onoffsets, _n_points, params, _dsFactor, which_set="onset", verbose=False, cancel_token=None):
+    """在滤波后的音频上逐个细化候选区间，得到onset（或翻转后的offset）所在的采样点
 
+    Args:
+        _audio_arr_filtered: 片段的滤波结果（offset时为翻转后的数组）
+        _onoffsets: 候选区间列表，见find_candidate_regions
+        _n_points: 聚类点数
+        params: 单侧（onset或offset）的参数字典
+        _dsFactor: 降采样因子
+        which_set: "onset"或"offset"
+        verbose: 是否输出详细信息
+        cancel_token: CancellationToken；每个候选区间细化前检查
+
+    Returns:
+        采样点列表（相对片段起点）；被取消时返回None
+    """
+    _answer_frames = []
     for i, (__offset, __onset) in enumerate(_onoffsets):
         if verbose:
             sot_logger.info(f"{which_set.capitalize()} {(i+1)/len(_onoffsets)*100:.0f}%")
 
         # 检查是否需要停止
-        if stop_flag:
-            return []
+        if is_cancelled(cancel_token):
+            return None
 
         # 强制跳过条件
         if __onset <= 0 - 3:
             continue
-        if __offset >= len(_cluster.labels_) + 3:
+        if __offset >= _n_points + 3:
             continue
 
         __offset = 0 if __offset <= 0 else __offset
@@ -346,43 +354,129 @@ def detectPraditor(params, audio_obj, which_set, mode="general", stime=0, etime=
         if __ref_midpoint < __sample_startpoint:
             __ref_midpoint = __sample_startpoint
 
-        __countValidPiece = 0
-        __countBadPiece = 0
-        __countDSTime = -1
+        _final_answer = scan_onset(
+            _audio_arr_filtered,
+            __ref_midpoint,
+            __ref_midpoint_next,
+            win_size=params["win_size"],
+            ratio=params["ratio"],
+            threshold=__y1_threshold,
+            num_valid=params["numValid"],
+            penalty=params["penalty"]
+        )
+        if _final_answer is not None:
+            if which_set == "offset":
+                _final_answer = len(_audio_arr_filtered) - (_final_answer +  len(_audio_arr_filtered) % _dsFactor)
+            _answer_frames.append(_final_answer)
+
+    count("answers", len(_answer_frames))
+    return _answer_frames
+
+
+@timed("detect")
+def detectPraditor(params, audio_obj, which_set, mode="general", stime=0, etime=-1, verbose=False, cluster_backend=None, context=None,
+                   cancel_token=None):
+    """
+    合并后的检测函数
+    
+    Args:
+        params: 检测参数
+        audio_obj: 音频对象
+        which_set: "onset"或"offset"
+        mode: "general"（通用模式）或"vad"（VAD模式）
+        stime: 开始时间（毫秒），默认0
+        etime: 结束时间（毫秒），默认-1表示整个音频
+        verbose: 是否输出详细信息，默认False
+        cluster_backend: 聚类后端，"sklearn"、"kdtree"或"grid"，默认为src.core.clustering.DEFAULT_BACKEND
+        context: AnalysisContext；提供时不再对片段单独滤波，而是取整段音频滤波结果的视图
+        cancel_token: CancellationToken；在滤波、聚类和逐个候选区间细化之间检查，被取消时返回空列表
+    """
 
-        while __ref_midpoint + __countDSTime < __ref_midpoint_next:
+    if is_cancelled(cancel_token):
+        return []
 
-                
-            __countDSTime += 1
+    # 导入数据，并且遵循一定之格式（参数值原地转换成数字，已经是数字时只做检查）
+    for xset, section in typed_params(params).items():
+        params[xset].update(section)
 
-            __left_boundary = __ref_midpoint + __countDSTime - params["win_size"]
-            __right_boundary = __ref_midpoint + __countDSTime
 
-            try:
-                __raw_value = abs(_audio_arr_filtered[__left_boundary:__right_boundary] - _audio_arr_filtered[__left_boundary-1:__right_boundary-1])
-            except ValueError:
-                break
-            __raw_value.sort()
-            __raw_value = __raw_value[:int(len(__raw_value) * params["ratio"])]
+    mode = mode.lower()
 
-            __y1_value = sum(__raw_value)/len(__raw_value)
+    # VAD模式特殊处理：强制将offset参数设为与onset相同
+    if mode == "vad":
+        params["offset"] = params["onset"]
 
-            if __y1_value > __y1_threshold:
-                __countValidPiece += 1
-            else:
-                __countBadPiece += 1
+    params = params[which_set]  # 选择是onset还是offset
 
-            if __countValidPiece - __countBadPiece * params["penalty"]  <= 0:
-                __countValidPiece = 0
-                __countBadPiece = 0
-            elif __countValidPiece - __countBadPiece >= params["numValid"]:
-                _final_answer = __ref_midpoint + __countDSTime - __countValidPiece - __countBadPiece
+    # VAD模式固定参数
+    if mode == "vad":
+        params.update({
+            "ratio": 0.9,
+            "win_size": 50,
+            "ref_len": 250,
+            "penalty": 10
+        })
 
-                if which_set == "offset":
-                    _final_answer = len(_audio_arr_filtered) - (_final_answer +  len(_audio_arr_filtered) % _dsFactor)
-                _answer_frames.append(_final_answer)
-                break
+    # 处理时间范围
+    if etime != -1:
+        audio_obj = audio_obj[stime*1000:etime*1000]    
+    # 检查是否需要停止
+    if is_cancelled(cancel_token):
+        return []
     
+    _audio_obj = audio_obj
+    _audio_samplerate = audio_obj.frame_rate
+
+    # 1.1. 降采样
+    # 把一秒钟的音频分成n=40份
+    _dsFactor = _audio_obj.frame_rate // 40
+
+    if context is not None:
+        # 直接使用整段音频的滤波结果（视图），包络按片段自己的网格计算
+        _audio_arr_filtered, _audio_arr_ds = context.clip_arrays(
+            audio_obj, params["cutoff0"], params["cutoff1"], which_set
+        )
+    else:
+        with timer("filtering"):
+            _audio_arr_filtered = bandpass_filter(
+                np.asarray(audio_obj.get_array_of_samples()),
+                lowcut=params["cutoff0"],
+                highcut=params["cutoff1"],
+                fs=_audio_obj.frame_rate,
+                dtype=_audio_obj.analysis_dtype
+            )
+
+        # warning or auto change?
+        if which_set == "offset":
+            _audio_arr_filtered = np.flip(_audio_arr_filtered)
+
+        # 统一降采样处理：确保音频长度能被降采样因子整除
+        if len(_audio_arr_filtered) % _dsFactor != 0:
+            _audio_arr_filtered = _audio_arr_filtered[:-(len(_audio_arr_filtered) % _dsFactor)]
+
+        with timer("downsampling"):
+            _audio_arr_ds = _audio_arr_filtered.reshape((len(_audio_arr_filtered) // _dsFactor, _dsFactor))
+            _audio_arr_ds = np.max(_audio_arr_ds, axis=1)  # 用max方法降采样
+
+    # 包络可能是AnalysisContext中缓存数组的视图，不再调用gc.collect()（每次要几十毫秒）
+    def _find_regions():
+        return find_candidate_regions(_audio_arr_ds, params["eps_ratio"], _dsFactor, _audio_samplerate, cluster_backend)
+
+    if is_cancelled(cancel_token):
+        return []
+    if context is not None:
+        _regions = context.cached_regions(audio_obj, params["cutoff0"], params["cutoff1"], which_set, params["eps_ratio"], _find_regions)
+    else:
+        _regions = _find_regions()
+    if _regions is None:
+        return []
+    _onoffsets, _n_points = _regions
+
+
+    _answer_frames = refine_regions(_audio_arr_filtered, _onoffsets, _n_points, params, _dsFactor, which_set, verbose, cancel_token)
+    if _answer_frames is None:
+        return []
+
     # 处理时间范围偏移
     _answer = [frm/_audio_samplerate for frm in list(set(_answer_frames))]
     # print(_answer)
@@ -399,98 +493,230 @@ def detectPraditor(params, audio_obj, which_set, mode="general", stime=0, etime=
     return _answer
 
 
-def update_parent_folder_csv(audio_file_path, is_vad_mode, onsets, offsets):
+@timed("run_detection")
+def run_detection(params, audio_obj, mode="general", cluster_backend=None, shared_context=True, single_pass=False, workers=1, context=None,
+                  cancel_token=None):
+    """对整段音频执行完整的检测流程：先分段，再逐段检测onset和offset
+
+    与GUI中的检测线程流程一致，但不依赖Qt，可用于批处理
+
+    Args:
+        params: 检测参数字典（会被原地修改，与GUI行为一致）
+        audio_obj: 音频对象
+        mode: "general"（通用模式）或"vad"（VAD模式）
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        shared_context: 是否整段音频只滤波一次（AnalysisContext），各阶段共用；
+            为False时每个片段单独滤波（旧行为）
+        single_pass: 仅VAD模式有效。直接沿用分段时每个窗口的检测结果，
+            只对没有被窗口完整覆盖的分段（末尾、短音频）重新检测，总计约一次检测的耗时
+        workers: 分段检测的进程数；大于1时各分段并行检测，结果仍按分段顺序合并
+        context: 已有的AnalysisContext（例如参数扫描中多组参数共用）；为None时按shared_context决定是否新建
+        cancel_token: CancellationToken；被取消时尽快返回已完成分段的结果（调用者应丢弃）
+
+    Returns:
+        (onsets, offsets)，单位为秒
+    """
+    onset_results, offset_results = [], []
+    if context is None and shared_context:
+        context = AnalysisContext(audio_obj)
+
+    sot_logger.info("Segmenting...")
+    segments, detections = segment_audio(audio_obj, segment_duration=15, params=params, min_pause=1, mode="vad",
+                                         cluster_backend=cluster_backend, context=context, return_detections=True,
+                                         cancel_token=cancel_token)
+
+    # 分段时使用的就是VAD模式和同一组参数，只有VAD模式下结果可以直接沿用
+    if not single_pass or mode.lower() != "vad":
+        detections = [None] * len(segments)
+
+    if workers > 1 and detections.count(None) > 1 and not is_cancelled(cancel_token):
+        from src.core.parallel import detect_segments_parallel
+        detections = detect_segments_parallel(params, audio_obj, segments, detections, mode, cluster_backend, context, workers,
+                                              cancel_token)
+        for segment_detections in detections:
+            if segment_detections is None:  # 被取消
+                break
+            if params["onset"]:
+                onset_results.extend(segment_detections[0])
+            if params["offset"]:
+                offset_results.extend(segment_detections[1])
+        return onset_results, offset_results
+
+    for index, ((start, end), segment_detections) in enumerate(zip(segments, detections), start=1):
+        if is_cancelled(cancel_token):
+            break
+
+        # 记录当前进度百分比
+        progress = int((index / len(segments)) * 100)
+        sot_logger.info(f"Detection progress: {progress:.0f}%")
+
+        if segment_detections is None:
+            segment_detections = detect_segment(params, audio_obj, start, end, mode, cluster_backend, context, cancel_token)
+
+        if params["onset"]:
+            onset_results.extend(segment_detections[0])
+        if params["offset"]:
+            offset_results.extend(segment_detections[1])
+
+    return onset_results, offset_results
+
+
+def run_detection_channels(params, audio_obj, mode="general", workers=1, cancel_token=None, **options):
+    """对多声道音频的每个声道分别执行run_detection（例如被试和主试各占一个声道的录音）
+
+    每个声道使用同一组参数的副本，结果与用ReadSound(channel=i)单独检测该声道相同；
+    各声道共享一次解码得到的数据，不重新读取文件。
+
+    Args:
+        params: 检测参数字典（不会被修改）
+        audio_obj: 音频对象，见ReadSound.split_channels
+        mode: "general"（通用模式）或"vad"（VAD模式）
+        workers: 同时检测的声道数；大于1时每个声道在单独的进程中检测（见src.core.parallel.detect_channels_parallel）
+        cancel_token: CancellationToken；被取消时不再开始新的声道（调用者应丢弃结果）
+        **options: 传给run_detection的其他参数，例如cluster_backend、single_pass
+
+    Returns:
+        每个声道的(onsets, offsets)列表，单位为秒
+    """
+    if workers > 1 and audio_obj.num_channels > 1 and not is_cancelled(cancel_token):
+        from src.core.parallel import detect_channels_parallel
+        return detect_channels_parallel(params, audio_obj, mode, workers, cancel_token, **options)
+
+    results = []
+    for channel_obj in audio_obj.split_channels():
+        if is_cancelled(cancel_token):
+            break
+        sot_logger.info(f"Detecting channel {channel_obj.channel + 1}/{audio_obj.num_channels}")
+        results.append(run_detection(copy.deepcopy(params), channel_obj, mode, cancel_token=cancel_token, **options))
+    return results
+
+
+def detect_segment(params, audio_obj, start, end, mode="general", cluster_backend=None, context=None, cancel_token=None):
+    """对一个分段检测onset和offset
+
+    Args:
+        params: 检测参数字典
+        audio_obj: 整段音频对象
+        start: 分段起点（毫秒）
+        end: 分段终点（毫秒）
+        mode: "general"（通用模式）或"vad"（VAD模式）
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        context: AnalysisContext，可为None
+        cancel_token: CancellationToken，可为None
+
+    Returns:
+        (onsets, offsets)，单位为秒，相对整段音频；未启用的一侧为空列表
+    """
+    audio_clip = audio_obj[start:end]
+    onsets, offsets = [], []
+
+    if params["onset"]:
+        clip_onset_results = detectPraditor(params, audio_clip, "onset", mode, cluster_backend=cluster_backend, context=context,
+                                             cancel_token=cancel_token)
+        onsets = [x + start/1000 for x in clip_onset_results]
+
+    if params["offset"]:
+        clip_offset_results = detectPraditor(params, audio_clip, "offset", mode, cluster_backend=cluster_backend, context=context,
+                                              cancel_token=cancel_token)
+        offsets = [x + start/1000 for x in clip_offset_results]
+
+    return onsets, offsets
+
+
+def postprocess_vad(onsets, offsets, duration):
+    """VAD模式下整理检测结果，使onset与offset一一配对
+
+    Args:
+        onsets: Onset检测结果列表
+        offsets: Offset检测结果列表
+        duration: 音频时长（秒）
+
+    Returns:
+        (onsets, offsets)，配对并排序后的结果
+    """
+    if not onsets or not offsets:
+        return onsets, offsets
+
+    # 如果头尾是从有声直接开始/结束，则为其赋值为0/音频长度
+    if onsets[0] >= offsets[0]:
+        onsets = [0.0] + onsets
+
+    if offsets[-1] <= onsets[-1]:
+        offsets = offsets + [duration]
+
+    # Select the one offset that is closest to onset and earlier than onset
+    new_onsets = []
+    new_offsets = []
+    if len(onsets) <= len(offsets):
+        for i, onset in enumerate(onsets):
+            if i == 0:
+                new_offsets.append(offsets[-1])
+                new_onsets.append(onset)
+            else:
+                try:
+                    new_offsets.append(max([offset for offset in offsets if onsets[i-1] < offset < onset]))
+                    new_onsets.append(onset)
+                except ValueError:
+                    pass
+
+    else:  # len(onsets) > len(offsets)
+        reversed_offsets = list(reversed(offsets))
+        for i, reversed_offset in enumerate(reversed_offsets):
+            if i == 0:
+                new_onsets.append(onsets[0])
+                new_offsets.append(reversed_offset)
+            else:
+                try:
+                    new_onsets.append(min([onset for onset in onsets if reversed_offset < onset < reversed_offsets[i-1]]))
+                    new_offsets.append(reversed_offset)
+                except ValueError:
+                    pass
+        new_offsets = list(reversed(new_offsets))
+
+    return sorted(new_onsets), sorted(new_offsets)
+
+
+@timed("write_parent_csv")
+def update_parent_folder_csv(audio_file_path, is_vad_mode, onsets, offsets, materialize=True, audio_filename=None):
     """更新父文件夹中的汇总CSV文件
     
+    结果先追加到ResultStore的日志中（O(1)），materialize为True时立即合并进CSV。
+    批量处理时应传入materialize=False，全部完成后再调用materialize_parent_folder_csv一次。
+    
     Args:
         audio_file_path: 音频文件路径
         is_vad_mode: 是否为VAD模式
         onsets: Onset检测结果列表
         offsets: Offset检测结果列表
+        materialize: 是否立即重写汇总CSV
+        audio_filename: 汇总CSV中的文件名，默认为音频文件名（不含扩展名）
     """
-    audio_dir = os.path.dirname(os.path.abspath(audio_file_path))
-    parent_dir = os.path.dirname(audio_dir)
-    folder_name = os.path.basename(audio_dir)
-    
-    csv_suffix = "_vad" if is_vad_mode else ""
-    parent_csv_path = os.path.join(parent_dir, f"{folder_name}{csv_suffix}.csv")
-    
-    audio_filename = os.path.splitext(os.path.basename(audio_file_path))[0]
-    
-    existing_data = []
-    if os.path.exists(parent_csv_path):
-        try:
-            with open(parent_csv_path, "r", newline="", encoding="utf-8") as csvfile:
-                reader = csv.DictReader(csvfile)
-                existing_data = list(reader)
-        except (csv.Error, StopIteration):
-            existing_data = []
-    
-    new_data = []
-    found = False
-    for row in existing_data:
-        if row.get("filename") == audio_filename:
-            if not found:
-                if is_vad_mode:
-                    for i in range(len(onsets)):
-                        if i < len(offsets):
-                            new_data.append({
-                                "filename": audio_filename,
-                                "minTime": onsets[i],
-                                "maxTime": offsets[i],
-                                "mark": "sound"
-                            })
-                else:
-                    max_len = max(len(onsets), len(offsets))
-                    for i in range(max_len):
-                        onset = onsets[i] if i < len(onsets) else ""
-                        offset = offsets[i] if i < len(offsets) else ""
-                        new_data.append({
-                            "filename": audio_filename,
-                            "onset": onset,
-                            "offset": offset
-                        })
-                found = True
-        else:
-            new_data.append(row)
-    
-    if not found:
-        if is_vad_mode:
-            for i in range(len(onsets)):
-                if i < len(offsets):
-                    new_data.append({
-                        "filename": audio_filename,
-                        "minTime": onsets[i],
-                        "maxTime": offsets[i],
-                        "mark": "sound"
-                    })
-        else:
-            max_len = max(len(onsets), len(offsets))
-            for i in range(max_len):
-                onset = onsets[i] if i < len(onsets) else ""
-                offset = offsets[i] if i < len(offsets) else ""
-                new_data.append({
-                    "filename": audio_filename,
-                    "onset": onset,
-                    "offset": offset
-                })
-    
-    new_data.sort(key=lambda x: x.get("filename", ""))
-    
-    if is_vad_mode:
-        fieldnames = ["filename", "minTime", "maxTime", "mark"]
-    else:
-        fieldnames = ["filename", "onset", "offset"]
+    store = ResultStore.for_audio(audio_file_path, is_vad_mode)
+    if audio_filename is None:
+        audio_filename = os.path.splitext(os.path.basename(audio_file_path))[0]
+    store.record(audio_filename, onsets, offsets)
+
+    if materialize:
+        store.materialize()
+
+
+@timed("write_parent_csv")
+def materialize_parent_folder_csv(audio_file_path, is_vad_mode):
+    """把尚未合并的结果写入父文件夹中的汇总CSV文件
     
-    with open(parent_csv_path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(new_data)
+    Args:
+        audio_file_path: 该文件夹中任意一个音频文件的路径
+        is_vad_mode: 是否为VAD模式
     
-    sot_logger.info(f"Parent folder CSV updated at: {parent_csv_path}")
+    Returns:
+        汇总CSV路径；没有需要合并的结果时返回None
+    """
+    return ResultStore.for_audio(audio_file_path, is_vad_mode).materialize()
 
 
-def create_textgrid_with_time_point(audio_file_path, is_vad_mode:bool, onsets=[], offsets=[]):
+@timed("write_textgrid")
+def create_textgrid_with_time_point(audio_file_path, is_vad_mode:bool, onsets=[], offsets=[], update_parent_csv=True, materialize_parent_csv=True,
+                                    duration=None, channels=None):
     """创建TextGrid文件，包含检测结果
     
     Args:
@@ -498,6 +724,11 @@ def create_textgrid_with_time_point(audio_file_path, is_vad_mode:bool, onsets=[]
         is_vad_mode: 是否为VAD模式
         onsets: Onset检测结果列表
         offsets: Offset检测结果列表
+        update_parent_csv: 是否同时更新父文件夹中的汇总CSV（批处理时由主进程统一更新）
+        materialize_parent_csv: 是否立即重写汇总CSV；为False时只追加到结果日志中
+        duration: 音频时长（秒）；已知时不再解码音频
+        channels: 每个声道的(onsets, offsets)列表（见run_detection_channels）；提供时忽略onsets和offsets，
+            每个声道写一组tier，名称加_ch1、_ch2……后缀，CSV中的文件名也加同样的后缀
     
     Returns:
         None
@@ -506,66 +737,63 @@ def create_textgrid_with_time_point(audio_file_path, is_vad_mode:bool, onsets=[]
     audio_dir = os.path.dirname(os.path.abspath(audio_file_path))
     audio_filename = os.path.splitext(os.path.basename(audio_file_path))[0]
     audio_extension = os.path.splitext(os.path.basename(audio_file_path))[1]
-    audio_obj = ReadSound(os.path.join(audio_dir, audio_filename+audio_extension))
-    audio_duration = audio_obj.duration_seconds
-    audio_samplerate = audio_obj.frame_rate
+    if duration is None:
+        duration = ReadSound(os.path.join(audio_dir, audio_filename+audio_extension)).duration_seconds
+    audio_duration = duration
 
+    # (tier名后缀, onsets, offsets)
+    if channels is None:
+        tier_sets = [("", onsets, offsets)]
+    else:
+        tier_sets = [(f"_ch{channel + 1}", channel_onsets, channel_offsets)
+                     for channel, (channel_onsets, channel_offsets) in enumerate(channels)]
 
+    tg = TextGrid()
     if is_vad_mode:
+        tg_filename = os.path.join(audio_dir, audio_filename + "_vad.TextGrid")
 
-        # 检测 onsets 和 offsets 的数量是否一致
-        if len(onsets) != len(offsets):
-            raise ValueError(f"The number of onsets ({len(onsets)}) and offsets ({len(offsets)}) does not match. ")
-
-        # 检测并删除包含 None 的对应元素
-        indices_to_remove = [i for i in range(len(onsets)) if onsets[i] is None or offsets[i] is None]
-        for idx in sorted(indices_to_remove, reverse=True):
-            del onsets[idx]
-            del offsets[idx]
-
-
-        # 获取音频文件的目录和文件名（不包括扩展名）
-        audio_dir = os.path.dirname(os.path.abspath(audio_file_path))
-        audio_filename = os.path.splitext(os.path.basename(audio_file_path))[0]
-        audio_extension = os.path.splitext(os.path.basename(audio_file_path))[1]
-        audio_obj = ReadSound(os.path.join(audio_dir, audio_filename+audio_extension))
-
+        for suffix, onsets, offsets in tier_sets:
+            # 检测 onsets 和 offsets 的数量是否一致
+            if len(onsets) != len(offsets):
+                raise ValueError(f"The number of onsets ({len(onsets)}) and offsets ({len(offsets)}) does not match. ")
 
-        tg_filename = os.path.join(audio_dir, audio_filename + "_vad.TextGrid")
-        tg = TextGrid()
+            # 检测并删除包含 None 的对应元素
+            indices_to_remove = [i for i in range(len(onsets)) if onsets[i] is None or offsets[i] is None]
+            for idx in sorted(indices_to_remove, reverse=True):
+                del onsets[idx]
+                del offsets[idx]
 
-        interval_tier = IntervalTier(name="interval", minTime=0., maxTime=audio_obj.duration_seconds)
+            interval_tier = IntervalTier(name="interval" + suffix, minTime=0., maxTime=audio_duration)
 
-        for i in range(len(onsets)):
-            try:
-                interval_tier.addInterval(Interval(onsets[i], offsets[i], "sound"))
-            except ValueError:
-                continue
-        tg.append(interval_tier)
+            for i in range(len(onsets)):
+                try:
+                    interval_tier.addInterval(Interval(onsets[i], offsets[i], "sound"))
+                except ValueError:
+                    continue
+            tg.append(interval_tier)
 
     else:
-        # 创建一个新的TextGrid对象
         tg_filename = os.path.join(audio_dir, audio_filename + ".TextGrid")
-        tg = TextGrid()
 
         # 时间
         # time_points = [frm/audio_samplerate for frm in frame_points]
 
-        for set_mode in ["onset", "offset"]:
-            point_tier = PointTier(name=set_mode, minTime=0., maxTime=audio_duration)
+        for suffix, onsets, offsets in tier_sets:
+            for set_mode in ["onset", "offset"]:
+                point_tier = PointTier(name=set_mode + suffix, minTime=0., maxTime=audio_duration)
 
-            if set_mode == "onset":
-                xsets = onsets
-            elif set_mode == "offset":
-                xsets = offsets
-                # print(xsets)
-            for time_point in xsets:
-                try:
-                    point_tier.addPoint(Point(time_point, set_mode))
-                except ValueError:
-                    continue
+                if set_mode == "onset":
+                    xsets = onsets
+                elif set_mode == "offset":
+                    xsets = offsets
+                    # print(xsets)
+                for time_point in xsets:
+                    try:
+                        point_tier.addPoint(Point(time_point, set_mode))
+                    except ValueError:
+                        continue
 
-            tg.append(point_tier)
+                tg.append(point_tier)
 
 
 
@@ -578,9 +806,13 @@ def create_textgrid_with_time_point(audio_file_path, is_vad_mode:bool, onsets=[]
     textgrid_to_csv(tg_filename)
     
     # 更新父文件夹中的汇总CSV文件
-    update_parent_folder_csv(audio_file_path, is_vad_mode, onsets, offsets)
+    if update_parent_csv:
+        for suffix, onsets, offsets in tier_sets:
+            update_parent_folder_csv(audio_file_path, is_vad_mode, onsets, offsets, materialize=materialize_parent_csv,
+                                     audio_filename=audio_filename + suffix)
 
 
+@timed("write_csv")
 def textgrid_to_csv(textgrid_file_path):
     """将TextGrid文件转换为CSV文件"""
     # 获取TextGrid文件的目录和文件名（不包括扩展名）
@@ -597,17 +829,20 @@ def textgrid_to_csv(textgrid_file_path):
     tg = TextGrid(textgrid_file_path)
     tg.read(textgrid_file_path)
     
+    # 多声道的结果每个声道一组tier（onset_ch1、interval_ch1……），CSV中的文件名加上同样的后缀
+    def tier_filename(tier):
+        _, _, channel = tier.name.partition("_")
+        return f"{original_filename}_{channel}" if channel else original_filename
+
     # 根据TextGrid类型（点或区间）进行不同处理
     if tg.tiers[0].__class__.__name__ == "PointTier":
         # 点模式：onset和offset作为两列
-        data = {"onset": [], "offset": []}
+        groups = {}  # 文件名 -> {"onset": [...], "offset": [...]}
         
         # 提取每个tier的数据
         for tier in tg.tiers:
-            data[tier.name] = [p.time for p in tier]
-        
-        # 确定最大长度，用于对齐数据
-        max_len = max(len(data["onset"]), len(data["offset"]))
+            set_mode = tier.name.partition("_")[0]
+            groups.setdefault(tier_filename(tier), {"onset": [], "offset": []})[set_mode] = [p.time for p in tier]
         
         # 写入CSV文件
         with open(csv_filename, "w", newline="", encoding="utf-8") as csvfile:
@@ -615,10 +850,13 @@ def textgrid_to_csv(textgrid_file_path):
             # 写入表头
             writer.writerow(["filename", "onset", "offset"])
             # 写入数据
-            for i in range(max_len):
-                onset = data["onset"][i] if i < len(data["onset"]) else ""
-                offset = data["offset"][i] if i < len(data["offset"]) else ""
-                writer.writerow([original_filename, onset, offset])
+            for filename, data in groups.items():
+                # 确定最大长度，用于对齐数据
+                max_len = max(len(data["onset"]), len(data["offset"]))
+                for i in range(max_len):
+                    onset = data["onset"][i] if i < len(data["onset"]) else ""
+                    offset = data["offset"][i] if i < len(data["offset"]) else ""
+                    writer.writerow([filename, onset, offset])
     
     elif tg.tiers[0].__class__.__name__ == "IntervalTier":
         # 区间模式：minTime, maxTime, mark作为列
@@ -627,9 +865,10 @@ def textgrid_to_csv(textgrid_file_path):
             # 写入表头
             writer.writerow(["filename", "minTime", "maxTime", "mark"])
             # 写入数据，只保存mark为"sound"的区间
-            for interval in tg.tiers[0]:
-                if interval.mark == "sound":
-                    writer.writerow([original_filename, interval.minTime, interval.maxTime, interval.mark])
+            for tier in tg.tiers:
+                for interval in tier:
+                    if interval.mark == "sound":
+                        writer.writerow([tier_filename(tier), interval.minTime, interval.maxTime, interval.mark])
     
     # print(f"{tg_filename}\t|\t{get_current_time()}\t|\tCSV created at: {csv_filename}")
     sot_logger.info(f"CSV created at: {csv_filename}")
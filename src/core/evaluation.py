@@ -0,0 +1,282 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from textgrid import TextGrid
+
+
+# 统计命中率时使用的误差阈值（毫秒），与原统计脚本一致
+TOLERANCES_MS = (25, 20, 15, 10, 5, 1)
+
+
+def load_reference(textgrid_path, is_vad_mode):
+    """读取参考标注（与Praditor输出的TextGrid格式相同）
+
+    Args:
+        textgrid_path: TextGrid文件路径
+        is_vad_mode: 是否为VAD模式（区间层，"sound"区间的起止点分别作为onset和offset）
+
+    Returns:
+        (onsets, offsets)，单位为秒
+    """
+    tg = TextGrid()
+    tg.read(textgrid_path)
+    if is_vad_mode:
+        intervals = [interval for interval in tg.tiers[0] if interval.mark == "sound"]
+        return [interval.minTime for interval in intervals], [interval.maxTime for interval in intervals]
+
+    points = {tier.name: [point.time for point in tier] for tier in tg.tiers}
+    return points.get("onset", []), points.get("offset", [])
+
+
+def count_hits(detected, reference, tolerance):
+    """按时间顺序一对一匹配，统计误差在tolerance（秒）以内的检测点数"""
+    detected = sorted(detected)
+    reference = sorted(reference)
+    hits = i = j = 0
+    while i < len(detected) and j < len(reference):
+        diff = detected[i] - reference[j]
+        if abs(diff) <= tolerance:
+            hits += 1
+            i += 1
+            j += 1
+        elif diff < 0:
+            i += 1
+        else:
+            j += 1
+    return hits
+
+
+def load_tier_points(textgrid_path, tier="onset"):
+    """读取TextGrid中某一点层的所有时间点
+
+    Returns:
+        时间点列表（秒）；文件或层不存在时返回None
+    """
+    if not os.path.exists(textgrid_path):
+        return None
+    tg = TextGrid()
+    tg.read(textgrid_path)
+    for point_tier in tg.tiers:
+        if point_tier.name == tier:
+            return [point.time for point in point_tier]
+    return None
+
+
+def load_chronset(txt_path):
+    """读取Chronset的结果文件（每行：文件名\\t毫秒，未检测到时为NaN）
+
+    Returns:
+        {文件名（不含扩展名）: 秒}，未检测到时为nan
+    """
+    results = {}
+    with open(txt_path, "r") as f:
+        for line in f.read().strip().split("\n"):
+            fields = line.split("\t")
+            value = float("nan") if fields[1].strip() == "NaN" else int(fields[1]) / 1000
+            results[os.path.splitext(fields[0])[0]] = value
+    return results
+
+
+def nearest_differences(references, candidates):
+    """对每个参考时间点找最近的候选点
+
+    候选点排序后用searchsorted二分查找，O((n + m) log m)。
+
+    Args:
+        references: 参考时间点（秒），nan会被跳过
+        candidates: 候选时间点（秒）
+
+    Returns:
+        (references, nearest)两个数组：有效的参考点和与之最近的候选点；差值为references - nearest
+    """
+    references = np.asarray(references, dtype=float)
+    references = references[~np.isnan(references)]
+    candidates = np.sort(np.asarray(candidates, dtype=float))
+    if len(candidates) == 0 or len(references) == 0:
+        return references[:0], references[:0]
+
+    right = np.clip(np.searchsorted(candidates, references), 0, len(candidates) - 1)
+    left = np.clip(right - 1, 0, len(candidates) - 1)
+    # 距离相等时取较早的候选点（与原脚本中min(..., key=abs)按时间顺序取第一个一致）
+    use_left = np.abs(references - candidates[left]) <= np.abs(references - candidates[right])
+    return references, np.where(use_left, candidates[left], candidates[right])
+
+
+def hit_rates(differences, tolerances_ms=TOLERANCES_MS):
+    """各误差阈值下的命中率和命中部分的标准差
+
+    Args:
+        differences: 差值数组（秒）
+        tolerances_ms: 阈值列表（毫秒）
+
+    Returns:
+        {阈值: (命中率, 命中部分差值的标准差（毫秒）)}
+    """
+    differences = np.asarray(differences, dtype=float)
+    distances = np.abs(differences)
+    rates = {}
+    for tolerance in tolerances_ms:
+        hits = distances < tolerance / 1000
+        rate = float(np.mean(hits)) if len(differences) else 0.0
+        rates[tolerance] = (rate, float(np.std(differences[hits]) * 1000) if hits.any() else float("nan"))
+    return rates
+
+
+def summarize(references, nearest, files, tolerances_ms=TOLERANCES_MS):
+    """汇总一次评估的结果
+
+    Args:
+        references: 参考时间点数组
+        nearest: 与之对应的候选点数组
+        files: 参与评估的文件数
+        tolerances_ms: 阈值列表（毫秒）
+
+    Returns:
+        结果字典：文件数、点数、平均差值和标准差（毫秒）、各阈值的命中率，
+        以及线性回归（候选点 ~ 参考点）的斜率、截距和残差的命中率
+    """
+    differences = references - nearest
+    result = {
+        "files": files,
+        "total": len(differences),
+        "mean_ms": float(np.mean(differences) * 1000) if len(differences) else float("nan"),
+        "std_ms": float(np.std(differences) * 1000) if len(differences) else float("nan"),
+        "hit_rates": hit_rates(differences, tolerances_ms),
+    }
+    if len(differences) > 1:
+        slope, intercept = np.polyfit(references, nearest, 1)
+        residuals = nearest - (slope * references + intercept)
+        result.update({
+            "slope": float(slope),
+            "intercept_ms": float(intercept * 1000),
+            "residual_hit_rates": hit_rates(residuals, tolerances_ms),
+        })
+    return result
+
+
+def evaluate_points(candidates, references, first_only=False, tolerances_ms=TOLERANCES_MS):
+    """在内存中的结果上评估（不读文件，可在参数调优的循环中直接调用）
+
+    Args:
+        candidates: {文件名: 候选时间点列表}
+        references: {文件名: 参考时间点列表}
+        first_only: 只评估每个文件的第一个参考点（如单词命名任务中的首个onset）
+        tolerances_ms: 阈值列表（毫秒）
+
+    Returns:
+        结果字典，见summarize
+    """
+    all_references = []
+    all_nearest = []
+    files = 0
+    for name, file_references in references.items():
+        if name not in candidates:
+            continue
+        files += 1
+        if first_only:
+            file_references = list(file_references)[:1]
+        file_references, nearest = nearest_differences(file_references, candidates[name])
+        all_references.append(file_references)
+        all_nearest.append(nearest)
+
+    if not all_references:
+        return summarize(np.empty(0), np.empty(0), files, tolerances_ms)
+    return summarize(np.concatenate(all_references), np.concatenate(all_nearest), files, tolerances_ms)
+
+
+def _load_pair(candidate_path, reference_path, tier):
+    return load_tier_points(candidate_path, tier), load_tier_points(reference_path, tier)
+
+
+def load_folders(candidate_dir, reference_dir, tier="onset", workers=None):
+    """并行读取两个文件夹中同名TextGrid的某一点层
+
+    Args:
+        candidate_dir: 候选结果文件夹（如Praditor的输出）
+        reference_dir: 参考标注文件夹（如人工标注）
+        tier: 点层名称
+        workers: 进程数，默认为CPU核数；为1时不使用进程池
+
+    Returns:
+        (candidates, references)两个字典{文件名: 时间点列表}，只包含两边都有该层的文件
+    """
+    names = sorted(f for f in os.listdir(candidate_dir) if f.endswith("TextGrid"))
+    candidate_paths = [os.path.join(candidate_dir, name) for name in names]
+    reference_paths = [os.path.join(reference_dir, name) for name in names]
+    tiers = [tier] * len(names)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(names), 1))
+    if workers == 1:
+        pairs = list(map(_load_pair, candidate_paths, reference_paths, tiers))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pairs = list(executor.map(_load_pair, candidate_paths, reference_paths, tiers,
+                                      chunksize=max(1, len(names) // (workers * 4))))
+
+    candidates, references = {}, {}
+    for name, (candidate, reference) in zip(names, pairs):
+        if candidate is None or reference is None:
+            continue
+        stem = os.path.splitext(name)[0]
+        candidates[stem] = candidate
+        references[stem] = reference
+    return candidates, references
+
+
+def evaluate_folders(candidate_dir, reference_dir, tier="onset", first_only=False, workers=None, tolerances_ms=TOLERANCES_MS):
+    """评估一个文件夹的TextGrid结果（替代原analyze_Praditor脚本）
+
+    Returns:
+        结果字典，见summarize
+    """
+    candidates, references = load_folders(candidate_dir, reference_dir, tier, workers)
+    return evaluate_points(candidates, references, first_only, tolerances_ms)
+
+
+def evaluate_chronset(chronset_dir, reference_dir, tier="onset", workers=None, tolerances_ms=TOLERANCES_MS):
+    """评估Chronset的结果（替代原analyze_Chronset脚本）：每个文件一个onset，与第一个参考点比较
+
+    Returns:
+        结果字典，见summarize；另含"detected"（Chronset给出结果的文件数）和"should_find"（有参考点的文件数）
+    """
+    chronset = {}
+    for fname in sorted(os.listdir(chronset_dir)):
+        if fname.endswith("txt"):
+            chronset |= load_chronset(os.path.join(chronset_dir, fname))
+
+    names = sorted(f for f in os.listdir(reference_dir) if f.endswith("TextGrid"))
+    paths = [os.path.join(reference_dir, name) for name in names]
+    workers = min(workers or os.cpu_count() or 1, max(len(names), 1))
+    if workers == 1:
+        points = list(map(load_tier_points, paths, [tier] * len(paths)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            points = list(executor.map(load_tier_points, paths, [tier] * len(paths),
+                                       chunksize=max(1, len(names) // (workers * 4))))
+
+    candidates, references = {}, {}
+    should_find = 0
+    for name, reference in zip(names, points):
+        stem = os.path.splitext(name)[0]
+        should_find += bool(reference)
+        if reference and stem in chronset and not np.isnan(chronset[stem]):
+            candidates[stem] = [chronset[stem]]
+            references[stem] = reference[:1]
+    result = evaluate_points(candidates, references, True, tolerances_ms)
+    result["detected"] = len(candidates)
+    result["should_find"] = should_find
+    return result
+
+
+def format_report(result):
+    """把评估结果格式化为与原统计脚本相同的表格"""
+    lines = [f"| File Number: {result['files']} | Total Number: {result['total']} |", "----------------------"]
+    lines.append(f"Mean diff = {result['mean_ms']:.3f}ms, SD = {result['std_ms']:.3f}ms")
+    for tolerance, (rate, std) in result["hit_rates"].items():
+        lines.append(f"< {tolerance:2d} ms  {rate:.3f} ({std:.3f})")
+    if "residual_hit_rates" in result:
+        lines.append(f"Regression: slope {result['slope']:.4f}, intercept {result['intercept_ms']:.3f}ms")
+        for tolerance, (rate, std) in result["residual_hit_rates"].items():
+            lines.append(f"< {tolerance:2d} ms  {rate:.3f} ({std:.3f})  (residuals)")
+    return "\n".join(lines)
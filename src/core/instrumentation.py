@@ -0,0 +1,122 @@
+import functools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# 当前正在记录的Stats（每个线程/上下文独立）；为None时所有计时和计数都是空操作
+_current = ContextVar("praditor_stats", default=None)
+
+
+class Stats:
+    """一次检测过程中各阶段的耗时和计数
+
+    timings中每一项为{"seconds": 累计耗时, "calls": 调用次数}，耗时包含内部嵌套的其他阶段；
+    counters中每一项为累计值。
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    def add_time(self, name, seconds):
+        timing = self.timings.setdefault(name, {"seconds": 0.0, "calls": 0})
+        timing["seconds"] += seconds
+        timing["calls"] += 1
+
+    def add_count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other):
+        """把另一份结果（Stats或as_dict()的结果，例如子进程返回的）累加进来"""
+        other = other.as_dict() if isinstance(other, Stats) else other
+        for name, timing in other["timings"].items():
+            total = self.timings.setdefault(name, {"seconds": 0.0, "calls": 0})
+            total["seconds"] += timing["seconds"]
+            total["calls"] += timing["calls"]
+        for name, value in other["counters"].items():
+            self.add_count(name, value)
+
+    def seconds(self, name):
+        """某一阶段的累计耗时（秒），没有记录时为0"""
+        return self.timings.get(name, {}).get("seconds", 0.0)
+
+    def as_dict(self):
+        return {
+            "timings": {name: {"seconds": round(t["seconds"], 6), "calls": t["calls"]} for name, t in sorted(self.timings.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def dump(self, json_path, **extra):
+        """写出JSON文件
+
+        Args:
+            json_path: 输出路径
+            **extra: 额外写入的字段（例如音频路径、时长）
+        """
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({**extra, **self.as_dict()}, f, indent=2, ensure_ascii=False)
+        return json_path
+
+
+@contextmanager
+def record(stats=None):
+    """在with块内记录检测过程中的耗时和计数
+
+    用法：
+        with record() as stats:
+            run_detection(params, audio_obj)
+        stats.dump("stats.json")
+
+    Args:
+        stats: 继续累加到已有的Stats上；为None时新建
+
+    Returns:
+        Stats对象
+    """
+    stats = Stats() if stats is None else stats
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current():
+    """当前正在记录的Stats，没有时返回None"""
+    return _current.get()
+
+
+@contextmanager
+def timer(name):
+    """记录with块的耗时；没有在record()中时不做任何事"""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_time(name, time.perf_counter() - start)
+
+
+def count(name, value=1):
+    """累加计数；没有在record()中时不做任何事"""
+    stats = _current.get()
+    if stats is not None:
+        stats.add_count(name, value)
+
+
+def timed(name):
+    """装饰器：记录函数每次调用的耗时"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,231 @@
+import copy
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core import detection
+from src.core.cancellation import CancellationToken, is_cancelled, shared_event
+from src.core.context import AnalysisContext
+from src.core.instrumentation import current, record
+from src.utils.audio import ReadSound
+from src.utils.logger import sot_logger
+
+
+# 子进程中的音频、分析上下文和取消标志（由_init_worker创建）
+_worker_audio = None
+_worker_context = None
+_worker_cancel_token = None
+_worker_blocks = []
+
+
+def _to_shared(arr, blocks):
+    """把数组复制到一块共享内存中
+
+    Returns:
+        (共享内存名, shape, dtype)，用于在子进程中重建数组
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[:] = arr
+    blocks.append(block)
+    return block.name, arr.shape, arr.dtype.str
+
+
+def _from_shared(spec):
+    """在子进程中挂载共享内存，返回只读数组"""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    _worker_blocks.append(block)  # 保持引用，否则共享内存会被关闭
+    arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    arr.flags.writeable = False
+    return arr
+
+
+def _init_worker(audio_spec, frame_rate, analysis_dtype, array_specs, log_level, cancel_event=None):
+    """子进程初始化：挂载共享内存中的音频和滤波结果；cancel_event为主进程中的multiprocessing.Event"""
+    global _worker_audio, _worker_context, _worker_cancel_token
+
+    import logging
+    logging.getLogger("Praditor").setLevel(log_level)
+    _worker_cancel_token = CancellationToken(cancel_event) if cancel_event is not None else None
+
+    arr = _from_shared(audio_spec)
+    _worker_audio = ReadSound(arr=arr, duration_seconds=len(arr) / frame_rate, frame_rate=frame_rate, analysis_dtype=analysis_dtype)
+
+    if array_specs is None:
+        _worker_context = None
+        return
+
+    _worker_context = AnalysisContext(_worker_audio)
+    for (cutoff0, cutoff1), filtered_spec in array_specs.items():
+        _worker_context.add_arrays(cutoff0, cutoff1, _from_shared(filtered_spec))
+
+
+def _init_channel_worker(frames_spec, frame_rate, duration_seconds, analysis_dtype, log_level, cancel_event=None):
+    """子进程初始化：挂载共享内存中的多声道音频；cancel_event为主进程中的multiprocessing.Event"""
+    global _worker_audio, _worker_cancel_token
+
+    import logging
+    logging.getLogger("Praditor").setLevel(log_level)
+    _worker_cancel_token = CancellationToken(cancel_event) if cancel_event is not None else None
+
+    frames = _from_shared(frames_spec)
+    _worker_audio = ReadSound(arr=frames, duration_seconds=duration_seconds, frame_rate=frame_rate, analysis_dtype=analysis_dtype)
+
+
+def _detect_channel(channel, params, mode, options, instrument=False):
+    """在子进程中对一个声道执行run_detection
+
+    Returns:
+        (channel, onsets, offsets, stats)；instrument为True时stats为子进程中记录的耗时和计数，否则为None
+    """
+    channel_obj = _worker_audio.split_channels()[channel]
+    if not instrument:
+        onsets, offsets = detection.run_detection(params, channel_obj, mode, cancel_token=_worker_cancel_token, **options)
+        return channel, onsets, offsets, None
+
+    with record() as stats:
+        onsets, offsets = detection.run_detection(params, channel_obj, mode, cancel_token=_worker_cancel_token, **options)
+    return channel, onsets, offsets, stats.as_dict()
+
+
+def _detect_segment(index, params, start, end, mode, cluster_backend, instrument=False):
+    """在子进程中检测一个分段
+
+    Returns:
+        (index, onsets, offsets, stats)；instrument为True时stats为子进程中记录的耗时和计数，否则为None
+    """
+    if not instrument:
+        onsets, offsets = detection.detect_segment(params, _worker_audio, start, end, mode, cluster_backend, _worker_context,
+                                                   _worker_cancel_token)
+        return index, onsets, offsets, None
+
+    with record() as stats:
+        onsets, offsets = detection.detect_segment(params, _worker_audio, start, end, mode, cluster_backend, _worker_context,
+                                                   _worker_cancel_token)
+    return index, onsets, offsets, stats.as_dict()
+
+
+def detect_segments_parallel(params, audio_obj, segments, detections, mode="general", cluster_backend=None, context=None,
+                             workers=None, cancel_token=None):
+    """使用进程池并行检测各个分段，结果按分段顺序合并
+
+    音频和AnalysisContext中的滤波结果通过共享内存传给子进程，不会为每个分段复制数据。
+
+    Args:
+        params: 检测参数字典（分段之后的状态，会被复制给每个子进程）
+        audio_obj: 整段音频对象
+        segments: 分段列表，每个元素为[start, end]，单位为毫秒
+        detections: 与segments对应的已有检测结果，为None的分段才需要检测
+        mode: "general"（通用模式）或"vad"（VAD模式）
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        context: AnalysisContext；为None时每个片段单独滤波
+        workers: 进程数，默认为CPU核数
+        cancel_token: CancellationToken；通过共享的事件传给子进程，正在检测的分段在下一个分块边界处返回，
+            不再开始新的分段（已返回的结果被丢弃）
+
+    Returns:
+        与segments对应的(onsets, offsets)列表；被取消时未完成的分段为None
+    """
+    results = list(detections)
+    pending = [i for i, result in enumerate(results) if result is None]
+    workers = min(workers or os.cpu_count() or 1, max(len(pending), 1))
+
+    # 提前算好所有需要的滤波结果，子进程直接共享
+    if context is not None:
+        for xset in ("onset", "offset"):
+            if params[xset]:
+                context.filtered(params[xset]["cutoff0"], params[xset]["cutoff1"])
+
+    blocks = []
+    try:
+        audio_spec = _to_shared(np.asarray(audio_obj.get_array_of_samples()), blocks)
+        array_specs = None
+        if context is not None:
+            array_specs = {
+                key: _to_shared(filtered, blocks)
+                for key, filtered in context.cached_arrays().items()
+            }
+
+        done = len(segments) - len(pending)
+        stats = current()  # 正在记录时，子进程中的耗时和计数合并到主进程
+        initargs = (audio_spec, audio_obj.frame_rate, audio_obj.analysis_dtype, array_specs, sot_logger.getEffectiveLevel(),
+                    shared_event(cancel_token))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+            futures = [
+                executor.submit(_detect_segment, i, params, segments[i][0], segments[i][1], mode, cluster_backend, stats is not None)
+                for i in pending
+            ]
+            for future in as_completed(futures):
+                if is_cancelled(cancel_token):
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+
+                index, onsets, offsets, worker_stats = future.result()
+                results[index] = (onsets, offsets)
+                if worker_stats is not None:
+                    stats.merge(worker_stats)
+
+                # 记录当前进度百分比
+                done += 1
+                progress = int((done / len(segments)) * 100)
+                sot_logger.info(f"Detection progress: {progress:.0f}%")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return results
+
+
+def detect_channels_parallel(params, audio_obj, mode="general", workers=None, cancel_token=None, **options):
+    """使用进程池同时检测多声道音频的各个声道，见detection.run_detection_channels
+
+    解码得到的所有声道通过共享内存传给子进程，每个子进程只取自己的声道，不重新读取文件。
+
+    Args:
+        params: 检测参数字典（每个声道使用一份副本）
+        audio_obj: 多声道音频对象
+        mode: "general"（通用模式）或"vad"（VAD模式）
+        workers: 进程数，默认为CPU核数（不超过声道数）
+        cancel_token: CancellationToken；通过共享的事件传给子进程，正在检测的声道在下一个分块边界处返回，不再开始新的声道
+        **options: 传给run_detection的其他参数，例如cluster_backend、single_pass
+
+    Returns:
+        每个声道的(onsets, offsets)列表；被取消时未完成的声道为None
+    """
+    results = [None] * audio_obj.num_channels
+    workers = min(workers or os.cpu_count() or 1, audio_obj.num_channels)
+
+    blocks = []
+    try:
+        frames_spec = _to_shared(np.ascontiguousarray(audio_obj.frames), blocks)
+        stats = current()  # 正在记录时，子进程中的耗时和计数合并到主进程
+        initargs = (frames_spec, audio_obj.frame_rate, audio_obj.duration_seconds, audio_obj.analysis_dtype, sot_logger.getEffectiveLevel(),
+                    shared_event(cancel_token))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_channel_worker, initargs=initargs) as executor:
+            futures = [
+                executor.submit(_detect_channel, channel, copy.deepcopy(params), mode, options, stats is not None)
+                for channel in range(audio_obj.num_channels)
+            ]
+            for future in as_completed(futures):
+                if is_cancelled(cancel_token):
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+
+                channel, onsets, offsets, worker_stats = future.result()
+                results[channel] = (onsets, offsets)
+                if worker_stats is not None:
+                    stats.merge(worker_stats)
+                sot_logger.info(f"Channel {channel + 1}/{audio_obj.num_channels} done")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return results
@@ -0,0 +1,135 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.core.instrumentation import count
+
+
+# 每次向量化计算的最大元素个数（行数 × win_size），控制内存占用
+MAX_CHUNK_ELEMENTS = 1 << 20
+# 第一块的行数；大部分候选在前几百个采样点内就能确定答案，块大小按倍数增长
+FIRST_CHUNK_ROWS = 512
+
+
+def rolling_trimmed_mean(arr, start, stop, win_size, ratio):
+    """一次性计算一段区域内每个采样点的__y1_value（滚动截尾均值）
+
+    对右边界R ∈ [start, stop)，取arr[R-win_size:R]的一阶差分绝对值，
+    从小到大排序后保留前int(win_size * ratio)个求均值。
+    求和按排序后的顺序逐项累加，与逐点循环中sum()的结果逐位一致。
+
+    Args:
+        arr: 滤波后的音频数组
+        start: 第一个右边界（包含）
+        stop: 最后一个右边界（不包含）
+        win_size: 窗口大小（帧）
+        ratio: 保留比例
+
+    Returns:
+        长度为stop-start的数组
+    """
+    keep = int(win_size * ratio)
+
+    # diff[t] = |arr[start-win_size+t] - arr[start-win_size-1+t]|
+    diff = np.abs(arr[start - win_size:stop - 1] - arr[start - win_size - 1:stop - 2])
+    windows = np.sort(sliding_window_view(diff, win_size), axis=1)
+
+    y1 = windows[:, 0].copy()
+    for j in range(1, keep):
+        y1 += windows[:, j]
+    return y1 / keep
+
+
+def scan_reference(arr, ref_midpoint, ref_midpoint_next, win_size, ratio, threshold, num_valid, penalty):
+    """逐点扫描的参考实现（原detectPraditor中的循环），用于边界情况
+
+    Returns:
+        找到的答案帧；未找到时返回None
+    """
+    count_valid = 0
+    count_bad = 0
+    count_ds_time = -1
+
+    while ref_midpoint + count_ds_time < ref_midpoint_next:
+        count_ds_time += 1
+
+        left_boundary = ref_midpoint + count_ds_time - win_size
+        right_boundary = ref_midpoint + count_ds_time
+
+        try:
+            raw_value = abs(arr[left_boundary:right_boundary] - arr[left_boundary-1:right_boundary-1])
+        except ValueError:
+            break
+        raw_value.sort()
+        raw_value = raw_value[:int(len(raw_value) * ratio)]
+
+        y1_value = sum(raw_value)/len(raw_value)
+
+        if y1_value > threshold:
+            count_valid += 1
+        else:
+            count_bad += 1
+
+        if count_valid - count_bad * penalty <= 0:
+            count_valid = 0
+            count_bad = 0
+        elif count_valid - count_bad >= num_valid:
+            return ref_midpoint + count_ds_time - count_valid - count_bad
+
+    return None
+
+
+def scan_onset(arr, ref_midpoint, ref_midpoint_next, win_size, ratio, threshold, num_valid, penalty):
+    """从ref_midpoint开始向后扫描，找到净有效帧数达到num_valid的起点
+
+    分块计算__y1_value序列，再在其上运行valid/bad计数状态机；
+    结果与逐点扫描（scan_reference）完全一致。
+
+    Args:
+        arr: 滤波后的音频数组
+        ref_midpoint: 扫描起点
+        ref_midpoint_next: 扫描终点（下一个候选的起点，包含）
+        win_size: 窗口大小（帧）
+        ratio: 保留比例
+        threshold: 阈值
+        num_valid: 需要的净有效帧数
+        penalty: 无效帧的惩罚系数
+
+    Returns:
+        找到的答案帧；未找到时返回None
+    """
+    # 窗口越过数组开头、窗口大小非整数或保留0个点时，逐点扫描的行为比较特殊（空切片、报错等），直接交给参考实现
+    if (not isinstance(win_size, (int, np.integer)) or win_size <= 0 or int(win_size * ratio) <= 0
+            or ref_midpoint - win_size - 1 < 0):
+        count("refinement_fallbacks")
+        return scan_reference(arr, ref_midpoint, ref_midpoint_next, win_size, ratio, threshold, num_valid, penalty)
+
+    # 右边界超过数组长度时逐点扫描会因切片长度不一致而停止
+    last = min(ref_midpoint_next, len(arr))
+
+    count_valid = 0
+    count_bad = 0
+    max_rows = max(FIRST_CHUNK_ROWS, MAX_CHUNK_ELEMENTS // win_size)
+    rows = FIRST_CHUNK_ROWS
+    chunk_start = ref_midpoint
+    while chunk_start <= last:
+        chunk_stop = min(chunk_start + rows, last + 1)
+        y1 = rolling_trimmed_mean(arr, chunk_start, chunk_stop, win_size, ratio)
+        count("refinement_chunks")
+        count("refinement_samples", chunk_stop - chunk_start)
+
+        for offset, is_valid in enumerate((y1 > threshold).tolist()):
+            if is_valid:
+                count_valid += 1
+            else:
+                count_bad += 1
+
+            if count_valid - count_bad * penalty <= 0:
+                count_valid = 0
+                count_bad = 0
+            elif count_valid - count_bad >= num_valid:
+                return chunk_start + offset - count_valid - count_bad
+
+        chunk_start = chunk_stop
+        rows = min(rows * 2, max_rows)
+
+    return None
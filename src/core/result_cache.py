@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.logger import sot_logger
+
+
+# 缓存的默认总大小上限（字节）
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+# 结果文件格式的版本；格式改变时修改
+CACHE_FORMAT = 1
+
+# 决定检测结果的模块（相对src目录）：源码改变后旧的缓存自动失效
+DETECTOR_MODULES = (
+    "core/detection.py",
+    "core/refine.py",
+    "core/clustering.py",
+    "core/context.py",
+    "utils/audio.py",   # 读取、混合声道与滤波
+    "utils/params.py",  # 参数解析与类型转换
+)
+
+_detector_version = None
+
+
+def default_cache_dir():
+    """默认的缓存目录：PRADITOR_CACHE_DIR，否则为系统的用户缓存目录下的Praditor/results"""
+    if os.environ.get("PRADITOR_CACHE_DIR"):
+        return os.environ["PRADITOR_CACHE_DIR"]
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "Praditor", "results")
+
+
+def detector_version():
+    """检测算法的版本：DETECTOR_MODULES中各模块源码的哈希
+
+    仓库中没有单独的版本号，用源码哈希代替，修改检测代码后不会误用旧结果；
+    打包后读不到源码时退回到CACHE_FORMAT。
+    """
+    global _detector_version
+    if _detector_version is None:
+        digest = hashlib.sha256(f"format={CACHE_FORMAT}".encode())
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for name in DETECTOR_MODULES:
+            path = os.path.join(src_dir, *name.split("/"))
+            try:
+                with open(path, "rb") as source:
+                    digest.update(source.read())
+            except OSError:
+                pass
+        _detector_version = digest.hexdigest()[:16]
+    return _detector_version
+
+
+def file_hash(path, chunk_size=2 ** 20):
+    """音频文件内容的sha256（按原始字节计算，不解码）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as audio_file:
+        for chunk in iter(lambda: audio_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """按内容寻址的检测结果缓存
+
+    键为(音频内容哈希, 实际生效的参数, 模式, 检测选项, 检测算法版本)的哈希，
+    音频和参数都没有改变的文件直接复用上次的onsets和offsets，不再解码和检测。
+    每个结果是缓存目录中的一个小JSON文件（写入时原子替换，可以被多个进程同时使用）；
+    命中时更新文件的修改时间，prune()按修改时间淘汰最久未使用的结果，直到总大小不超过上限。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，默认为default_cache_dir()
+            max_bytes: 缓存总大小上限（字节），见prune()
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, audio_file_path, params, mode, **options):
+        """计算缓存键
+
+        Args:
+            audio_file_path: 音频文件路径
+            params: 实际生效的参数字典（检测前的状态，检测会原地修改参数）
+            mode: "general"或"vad"
+            **options: 其他影响结果的选项，例如cluster_backend、single_pass、analysis_dtype
+
+        Returns:
+            十六进制字符串
+        """
+        payload = json.dumps({
+            "audio": file_hash(audio_file_path),
+            "params": params,
+            "mode": mode,
+            "options": options,
+            "version": detector_version(),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        """读取缓存的结果
+
+        Returns:
+            {"onsets", "offsets", "duration"}；未命中时为None
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r") as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # 记录最近使用时间，用于淘汰
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, onsets, offsets, duration):
+        """写入一个结果（先写临时文件再原子替换）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as cache_file:
+            json.dump({"onsets": list(onsets), "offsets": list(offsets), "duration": duration}, cache_file)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """淘汰最久未使用的结果，直到总大小不超过max_bytes
+
+        Returns:
+            删除的结果数量
+        """
+        entries = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                # 其它进程正在写入的临时文件，写完后会被替换为结果文件
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            sot_logger.info(f"Result cache: evicted {removed} entries ({total / 2 ** 20:.1f} MiB left)")
+        return removed
@@ -0,0 +1,208 @@
+import csv
+import json
+import os
+import re
+import threading
+
+from src.utils.audio import isAudioFile
+from src.utils.logger import sot_logger
+
+
+# 所有ResultStore共用一把锁：GUI中检测线程和主线程可能同时写同一个日志文件
+_lock = threading.Lock()
+
+# --channel all时各声道的行名：<文件名>_ch1、<文件名>_ch2……
+_CHANNEL_ROW = re.compile(r"^(?P<audio>.*)_ch\d+$")
+
+
+def get_parent_csv_path(audio_file_path, is_vad_mode):
+    """获取音频文件所在文件夹对应的汇总CSV路径（位于父文件夹中）
+
+    Args:
+        audio_file_path: 音频文件路径
+        is_vad_mode: 是否为VAD模式
+
+    Returns:
+        <父文件夹>/<文件夹名>.csv 或 <文件夹名>_vad.csv
+    """
+    audio_dir = os.path.dirname(os.path.abspath(audio_file_path))
+    parent_dir = os.path.dirname(audio_dir)
+    folder_name = os.path.basename(audio_dir)
+
+    csv_suffix = "_vad" if is_vad_mode else ""
+    return os.path.join(parent_dir, f"{folder_name}{csv_suffix}.csv")
+
+
+def build_rows(audio_filename, is_vad_mode, onsets, offsets):
+    """把一个文件的检测结果转换为汇总CSV中的行
+
+    Args:
+        audio_filename: 音频文件名（不含扩展名）
+        is_vad_mode: 是否为VAD模式
+        onsets: Onset检测结果列表
+        offsets: Offset检测结果列表
+
+    Returns:
+        行字典列表
+    """
+    rows = []
+    if is_vad_mode:
+        for i in range(len(onsets)):
+            if i < len(offsets):
+                rows.append({
+                    "filename": audio_filename,
+                    "minTime": onsets[i],
+                    "maxTime": offsets[i],
+                    "mark": "sound"
+                })
+    else:
+        max_len = max(len(onsets), len(offsets))
+        for i in range(max_len):
+            onset = onsets[i] if i < len(onsets) else ""
+            offset = offsets[i] if i < len(offsets) else ""
+            rows.append({
+                "filename": audio_filename,
+                "onset": onset,
+                "offset": offset
+            })
+    return rows
+
+
+class ResultStore:
+    """汇总CSV的追加式结果存储
+
+    每个文件的结果以一行JSON追加到 <汇总CSV>.journal 中（O(1)），
+    需要时再一次性合并进汇总CSV（materialize），避免每处理一个文件就重写整个CSV。
+    日志在合并成功后才删除；中途退出时，下一次合并会把遗留的记录一起写入。
+
+    一个文件的结果要么是一组<文件名>行（单个声道或混合），要么是每个声道一组<文件名>_chN行（--channel all）；
+    重新记录一个文件时，另一种方式留下的行也一起替换。
+    """
+
+    def __init__(self, csv_path, is_vad_mode):
+        """初始化结果存储
+
+        Args:
+            csv_path: 汇总CSV路径
+            is_vad_mode: 是否为VAD模式
+        """
+        self.csv_path = csv_path
+        self.journal_path = csv_path + ".journal"
+        self.is_vad_mode = is_vad_mode
+
+    @classmethod
+    def for_audio(cls, audio_file_path, is_vad_mode):
+        """获取音频文件所在文件夹对应的结果存储"""
+        return cls(get_parent_csv_path(audio_file_path, is_vad_mode), is_vad_mode)
+
+    def _audio_stems(self):
+        """汇总CSV对应的音频文件夹中所有音频文件的文件名（不含扩展名）"""
+        csv_name = os.path.splitext(os.path.basename(self.csv_path))[0]
+        folder_name = csv_name[:-len("_vad")] if self.is_vad_mode and csv_name.endswith("_vad") else csv_name
+        audio_dir = os.path.join(os.path.dirname(self.csv_path), folder_name)
+        try:
+            return {os.path.splitext(name)[0] for name in os.listdir(audio_dir) if isAudioFile(name)}
+        except OSError:
+            return set()
+
+    @property
+    def fieldnames(self):
+        if self.is_vad_mode:
+            return ["filename", "minTime", "maxTime", "mark"]
+        return ["filename", "onset", "offset"]
+
+    def record(self, audio_filename, onsets, offsets, channel=None):
+        """追加一个文件（或其中一个声道）的检测结果；同一文件多次记录时以最后一次为准
+
+        Args:
+            audio_filename: 音频文件名（不含扩展名）
+            onsets: Onset检测结果列表
+            offsets: Offset检测结果列表
+            channel: 声道编号（从1开始），汇总CSV中的文件名为<audio_filename>_ch<channel>；
+                为None时为整个文件的结果
+        """
+        filename = audio_filename if channel is None else f"{audio_filename}_ch{channel}"
+        line = json.dumps({"filename": filename, "audio": audio_filename, "onsets": list(onsets), "offsets": list(offsets)})
+        with _lock:
+            with open(self.journal_path, "a", encoding="utf-8") as journal:
+                journal.write(line + "\n")
+
+    def pending(self):
+        """读取尚未合并的记录
+
+        Returns:
+            {filename: (audio, onsets, offsets)}，按记录顺序；同一行名只保留最后一次，
+            并且一个文件以另一种方式（整个文件/逐声道）重新记录后，之前的记录被丢弃
+        """
+        entries = {}
+        if not os.path.exists(self.journal_path):
+            return entries
+        with open(self.journal_path, "r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:  # 中途退出时最后一行可能不完整
+                    continue
+                filename = entry["filename"]
+                audio = entry.get("audio", filename)
+                is_channel = filename != audio
+                for stale in [name for name, (other, _, _) in entries.items() if other == audio and (name != other) != is_channel]:
+                    del entries[stale]
+                entries.pop(filename, None)
+                entries[filename] = (audio, entry["onsets"], entry["offsets"])
+        return entries
+
+    def _is_stale(self, row_filename, entries, audio_stems):
+        """已有CSV中的行是否被本次合并的记录替换
+
+        Args:
+            row_filename: 行的文件名
+            entries: pending()的结果
+            audio_stems: 音频文件夹中现有文件的文件名（不含扩展名）；与之同名的行属于该文件，不是声道行
+        """
+        if row_filename in entries:
+            return True
+        audios = {audio for audio, _, _ in entries.values()}
+        if row_filename in audios:  # 之前整个文件的结果，这次逐声道记录
+            return True
+        match = _CHANNEL_ROW.match(row_filename)
+        return bool(match) and match.group("audio") in audios and row_filename not in audio_stems
+
+    def materialize(self):
+        """把日志中的记录合并进汇总CSV，并清空日志
+
+        已有CSV中其他文件的行保持不变，被重新记录的文件整体替换（包括另一种声道方式留下的行），最后按文件名排序。
+
+        Returns:
+            汇总CSV路径；没有需要合并的记录时返回None
+        """
+        with _lock:
+            entries = self.pending()
+            if not entries:
+                return None
+
+            existing_data = []
+            if os.path.exists(self.csv_path):
+                try:
+                    with open(self.csv_path, "r", newline="", encoding="utf-8") as csvfile:
+                        existing_data = list(csv.DictReader(csvfile))
+                except (csv.Error, StopIteration):
+                    existing_data = []
+
+            audio_stems = self._audio_stems()
+            new_data = [row for row in existing_data if not self._is_stale(row.get("filename"), entries, audio_stems)]
+            for filename, (_, onsets, offsets) in entries.items():
+                new_data.extend(build_rows(filename, self.is_vad_mode, onsets, offsets))
+            new_data.sort(key=lambda x: x.get("filename", ""))
+
+            # 先写临时文件再替换，保证CSV和日志任何时刻都至少有一份完整结果
+            tmp_path = self.csv_path + ".tmp"
+            with open(tmp_path, "w", newline="", encoding="utf-8") as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
+                writer.writeheader()
+                writer.writerows(new_data)
+            os.replace(tmp_path, self.csv_path)
+            os.remove(self.journal_path)
+
+        sot_logger.info(f"Parent folder CSV updated at: {self.csv_path}")
+        return self.csv_path
@@ -0,0 +1,360 @@
+import copy
+import csv
+import itertools
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.batch import list_audio_files
+from src.core.context import AnalysisContext
+from src.core.cancellation import CancellationToken, is_cancelled, shared_event
+from src.core.detection import run_detection, postprocess_vad
+from src.core.evaluation import count_hits, load_reference
+from src.utils.audio import ReadSound
+from src.utils.logger import sot_logger
+from src.utils.params import get_default_params_path, read_params_file
+
+
+# 可以扫描的参数（与params.txt中的键一致）
+SWEEP_PARAMS = ("amp", "cutoff0", "cutoff1", "numValid", "win_size", "ratio", "penalty", "ref_len", "eps_ratio")
+# 取整数值的参数（随机采样时取整）
+INT_PARAMS = ("cutoff0", "cutoff1", "numValid", "win_size", "ref_len")
+# VAD模式下固定的参数（见detection.detectPraditor），扫描它们不会改变结果
+VAD_FIXED_PARAMS = ("ratio", "win_size", "ref_len", "penalty")
+
+
+def _split_name(name):
+    """把"amp"或"onset.amp"拆分为(作用的xset列表, 参数名)"""
+    xset, _, key = name.rpartition(".")
+    if key not in SWEEP_PARAMS:
+        raise ValueError(f"Unknown parameter: {name}")
+    if xset and xset not in ("onset", "offset"):
+        raise ValueError(f"Unknown parameter set: {name}")
+    return ([xset] if xset else ["onset", "offset"]), key
+
+
+def apply_overrides(base_params, overrides):
+    """在参数字典的副本上应用一组覆盖值
+
+    Args:
+        base_params: 参数字典（不会被修改）
+        overrides: {参数名: 值}，参数名为"amp"（onset和offset都改）或"onset.amp"（只改一侧）
+
+    Returns:
+        新的参数字典
+    """
+    params = copy.deepcopy(base_params)
+    for name, value in overrides.items():
+        xsets, key = _split_name(name)
+        for xset in xsets:
+            if params.get(xset):
+                params[xset][key] = value
+    return params
+
+
+def check_candidates(candidates, mode):
+    """检查覆盖值在该模式下是否有效
+
+    VAD模式下onset和offset使用同一组参数（分段时offset被替换为onset），因此只接受不带前缀的参数名，
+    并且ratio、win_size、ref_len和penalty固定，不能扫描；否则这些覆盖值会被悄悄忽略。
+
+    Args:
+        candidates: 覆盖值字典列表
+        mode: "general"或"vad"
+
+    Raises:
+        ValueError: 覆盖值在该模式下无效
+    """
+    if mode != "vad":
+        return
+    for overrides in candidates:
+        for name in overrides:
+            xset, _, key = name.rpartition(".")
+            if xset:
+                raise ValueError(f"{name}: VAD mode uses one parameter set for onsets and offsets, use '{key}' instead")
+            if key in VAD_FIXED_PARAMS:
+                raise ValueError(f"{name}: fixed in VAD mode and cannot be swept")
+
+
+def grid_candidates(grid):
+    """网格扫描：所有取值的笛卡尔积
+
+    Args:
+        grid: {参数名: 取值列表}
+
+    Returns:
+        覆盖值字典列表
+    """
+    for name in grid:
+        _split_name(name)
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def random_candidates(ranges, n, seed=0):
+    """随机扫描：在每个参数的取值范围内均匀采样
+
+    Args:
+        ranges: {参数名: (最小值, 最大值)}
+        n: 采样组数
+        seed: 随机种子
+
+    Returns:
+        覆盖值字典列表
+    """
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for _ in range(n):
+        overrides = {}
+        for name, (low, high) in ranges.items():
+            _, key = _split_name(name)
+            if key in INT_PARAMS:
+                overrides[name] = int(rng.integers(int(low), int(high) + 1))
+            else:
+                overrides[name] = round(float(rng.uniform(low, high)), 4)
+        candidates.append(overrides)
+    return candidates
+
+
+def _cutoff_key(params):
+    """一组参数用到的所有截止频率，用于把共用滤波结果的参数分到一组"""
+    return tuple(sorted({
+        (float(params[xset]["cutoff0"]), float(params[xset]["cutoff1"]))
+        for xset in ("onset", "offset") if params.get(xset)
+    }))
+
+
+def sweep_file(audio_file_path, base_params, candidates, mode="general", cluster_backend=None, reference=None, tolerance=0.02,
+               indices=None, cancel_token=None):
+    """对一个音频文件依次运行多组参数
+
+    所有参数共用同一个AnalysisContext：每组截止频率只滤波一次，
+    每组(截止频率, eps_ratio)只聚类一次，只改变细化参数时只重新运行细化。
+
+    Args:
+        audio_file_path: 音频文件路径
+        base_params: 基础参数字典
+        candidates: 覆盖值字典列表
+        mode: "general"或"vad"
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        reference: 参考标注(onsets, offsets)；为None时不评估
+        tolerance: 评估时允许的误差（秒）
+        indices: 与candidates对应的参数组编号，默认为0..n-1
+        cancel_token: CancellationToken；被取消时不再运行剩下的参数组
+
+    Returns:
+        每组参数的结果行（字典），被取消时只包含已完成的参数组
+    """
+    is_vad_mode = mode == "vad"
+    indices = range(len(candidates)) if indices is None else indices
+    audio_obj = ReadSound(audio_file_path)
+    context = AnalysisContext(audio_obj, cache_regions=True)
+    nyquist = float(audio_obj.frame_rate) / 2
+    filename = os.path.splitext(os.path.basename(audio_file_path))[0]
+
+    rows = []
+    for index, overrides in zip(indices, candidates):
+        if is_cancelled(cancel_token):
+            break
+        params = apply_overrides(base_params, overrides)
+        row = {"candidate": index, "filename": filename, **overrides}
+
+        if any(float(params[xset]["cutoff1"]) > nyquist for xset in params if params[xset]):
+            row["status"] = "skipped"
+            rows.append(row)
+            continue
+
+        start_time = time.perf_counter()
+        onsets, offsets = run_detection(params, audio_obj, mode, cluster_backend=cluster_backend, context=context,
+                                        cancel_token=cancel_token)
+        if is_cancelled(cancel_token):
+            break
+        if is_vad_mode:
+            onsets, offsets = postprocess_vad(onsets, offsets, audio_obj.duration_seconds)
+        row.update({
+            "status": "done",
+            "onsets": len(onsets),
+            "offsets": len(offsets),
+            "elapsed": round(time.perf_counter() - start_time, 4),
+        })
+
+        if reference is not None:
+            row.update({
+                "ref_onsets": len(reference[0]),
+                "ref_offsets": len(reference[1]),
+                "onset_hits": count_hits(onsets, reference[0], tolerance),
+                "offset_hits": count_hits(offsets, reference[1], tolerance),
+            })
+        rows.append(row)
+    return rows
+
+
+# 子进程中的取消标志（由_init_worker创建）
+_worker_cancel_token = None
+
+
+def _init_worker(log_level, cancel_event=None):
+    """子进程初始化：设置日志级别，避免大量进度日志刷屏；cancel_event为主进程中的multiprocessing.Event"""
+    global _worker_cancel_token
+    logging.getLogger("Praditor").setLevel(log_level)
+    _worker_cancel_token = CancellationToken(cancel_event) if cancel_event is not None else None
+
+
+def _sweep_file_task(*args, **kwargs):
+    """在子进程中运行sweep_file，使用主进程共享的取消标志"""
+    return sweep_file(*args, cancel_token=_worker_cancel_token, **kwargs)
+
+
+def summarize(rows):
+    """按参数组汇总所有文件的结果
+
+    Returns:
+        每组参数一行；有参考标注时包含precision、recall和f1（onset和offset合计）
+    """
+    summary = {}
+    for row in rows:
+        if row.get("status") != "done":
+            continue
+        total = summary.setdefault(row["candidate"], {
+            key: value for key, value in row.items()
+            if key not in ("filename", "status", "elapsed", "onsets", "offsets", "ref_onsets", "ref_offsets", "onset_hits", "offset_hits")
+        })
+        total["files"] = total.get("files", 0) + 1
+        for key in ("elapsed", "onsets", "offsets", "ref_onsets", "ref_offsets", "onset_hits", "offset_hits"):
+            if key in row:
+                total[key] = total.get(key, 0) + row[key]
+
+    for total in summary.values():
+        total["elapsed"] = round(total["elapsed"], 4)
+        if "ref_onsets" in total:
+            hits = total["onset_hits"] + total["offset_hits"]
+            detected = total["onsets"] + total["offsets"]
+            expected = total["ref_onsets"] + total["ref_offsets"]
+            precision = hits / detected if detected else 0.0
+            recall = hits / expected if expected else 0.0
+            total["precision"] = round(precision, 4)
+            total["recall"] = round(recall, 4)
+            total["f1"] = round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0
+    return [summary[index] for index in sorted(summary)]
+
+
+# summarize结果中的统计列，其余列为参数组的覆盖值
+SUMMARY_COLUMNS = ("candidate", "files", "elapsed", "onsets", "offsets", "ref_onsets", "ref_offsets", "onset_hits", "offset_hits",
+                   "precision", "recall", "f1")
+
+
+def format_summary(summary, top=5):
+    """把F1最高的几组参数格式化为表格
+
+    Args:
+        summary: summarize的结果（需要包含f1）
+        top: 列出的参数组数
+
+    Returns:
+        表格文本，每组参数一行：编号、precision、recall、f1和覆盖值
+    """
+    best = sorted(summary, key=lambda total: total["f1"], reverse=True)[:top]
+    lines = [f"{'#':>5}  {'precision':>9}  {'recall':>6}  {'f1':>6}  overrides"]
+    for total in best:
+        overrides = " ".join(f"{key}={value}" for key, value in total.items() if key not in SUMMARY_COLUMNS) or "(base params)"
+        lines.append(f"{total['candidate']:>5}  {total['precision']:>9.4f}  {total['recall']:>6.4f}  {total['f1']:>6.4f}  {overrides}")
+    return "\n".join(lines)
+
+
+def write_table(rows, csv_path):
+    """把结果行写成CSV，列为所有行中出现过的键"""
+    fieldnames = []
+    for row in rows:
+        fieldnames.extend(key for key in row if key not in fieldnames)
+    with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return csv_path
+
+
+def run_sweep(folder, candidates, mode="general", params_path=None, workers=None, cluster_backend=None, reference_dir=None,
+              tolerance=0.02, output=None, log_level=logging.WARNING, cancel_token=None):
+    """在文件夹中的所有音频上评估多组参数
+
+    任务按(文件, 截止频率组合)划分到进程池中：同一任务内的参数共用滤波结果和聚类结果，
+    不同的截止频率组合可以并行。检测结果不写出TextGrid。
+
+    Args:
+        folder: 音频文件夹路径
+        candidates: 覆盖值字典列表，见grid_candidates和random_candidates
+        mode: "general"或"vad"（VAD模式下ratio、win_size、ref_len、penalty固定，offset与onset相同，见check_candidates）
+        params_path: 基础参数文件，默认为params.txt或params_vad.txt
+        workers: 进程数，默认为CPU核数
+        cluster_backend: 聚类后端，见src.core.clustering.BACKENDS
+        reference_dir: 参考标注所在文件夹（<文件名>.TextGrid或<文件名>_vad.TextGrid）；为None时不评估
+        tolerance: 评估时允许的误差（秒）
+        output: 结果表路径（每个文件每组参数一行）；同时写出<output>_summary.csv
+        log_level: 子进程的日志级别
+        cancel_token: CancellationToken；通过共享的事件传给子进程，正在运行的任务在下一组参数或分块边界处返回，
+            还没开始的任务不再运行
+
+    Returns:
+        (rows, summary)
+    """
+    is_vad_mode = mode == "vad"
+    check_candidates(candidates, mode)
+    base_params = read_params_file(params_path or get_default_params_path(is_vad_mode))
+    file_paths = list_audio_files(folder)
+    if not file_paths or not candidates:
+        sot_logger.warning(f"Nothing to sweep in {folder}")
+        return [], []
+
+    # 共用截止频率的参数分到同一个任务中
+    groups = {}
+    for index, overrides in enumerate(candidates):
+        groups.setdefault(_cutoff_key(apply_overrides(base_params, overrides)), []).append(index)
+
+    tasks = []
+    for fpath in file_paths:
+        reference = None
+        if reference_dir is not None:
+            filename = os.path.splitext(os.path.basename(fpath))[0]
+            reference_path = os.path.join(reference_dir, filename + ("_vad" if is_vad_mode else "") + ".TextGrid")
+            if not os.path.exists(reference_path):
+                sot_logger.warning(f"No reference for {fpath}")
+                continue
+            reference = load_reference(reference_path, is_vad_mode)
+        for indices in groups.values():
+            tasks.append((fpath, [candidates[i] for i in indices], indices, reference))
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+    sot_logger.info(f"Sweeping {len(candidates)} parameter sets over {len(file_paths)} files ({len(tasks)} tasks, {workers} workers)")
+
+    rows = []
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_level, shared_event(cancel_token))) as executor:
+        futures = {
+            executor.submit(_sweep_file_task, fpath, base_params, task_candidates, mode, cluster_backend, reference, tolerance, indices): fpath
+            for fpath, task_candidates, indices, reference in tasks
+        }
+        for count, future in enumerate(as_completed(futures), start=1):
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                sot_logger.error(f"Error: {futures[future]}: {e}")
+            sot_logger.info(f"Sweep progress: {count}/{len(tasks)} tasks ({time.perf_counter() - start_time:.1f}s)")
+            if is_cancelled(cancel_token):
+                executor.shutdown(wait=False, cancel_futures=True)
+                sot_logger.info("Sweep cancelled")
+                break
+
+    rows.sort(key=lambda row: (row["candidate"], row["filename"]))
+    summary = summarize(rows)
+    if output is not None:
+        write_table(rows, output)
+        write_table(summary, os.path.splitext(output)[0] + "_summary.csv")
+        sot_logger.info(f"Sweep results written to: {output}")
+    return rows, summary
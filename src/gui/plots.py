@@ -1,13 +1,14 @@
 import sys
+import time
 
 import numpy as np
 from PySide6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis
-from PySide6.QtCore import Qt, QMargins, Signal, Property
+from PySide6.QtCore import Qt, QMargins, Signal, Property, QRunnable, QThreadPool, QLineF, QTimer
 from PySide6.QtGui import QPen, QColor
 from PySide6.QtWidgets import (QApplication, QSlider, QVBoxLayout, QLabel, QHBoxLayout, 
-    QWidget, QGridLayout)
+    QWidget, QGridLayout, QGraphicsItem)
 
-from src.utils.audio import ReadSound, get_frm_points_from_textgrid, get_frm_intervals_from_textgrid
+from src.utils.file_cache import FileCache
 
 
 def formatted_time(ms):
@@ -34,31 +35,13 @@ def formatted_time(ms):
     # 格式化输出
     return f"{minutes:d}:{seconds:02d}.{milliseconds:03d}"
 
-def downsampleSignal(signal, max_limit):
-    """对信号进行降采样，减少数据点数
-    
-    Args:
-        signal: 原始信号数组
-        max_limit: 最大数据点限制
-        
-    Returns:
-        降采样后的信号数组
-    """
-    limit = max_limit if len(signal) > max_limit else len(signal)
-    if not isinstance(limit, int) or limit <= 0:
-        raise ValueError(f"limit must be a positive integer, not {limit}")
-
-    # 计算需要的降采样因子
-    scale_factor = len(signal) // limit
+# onset和offset标记的颜色
+XSET_COLORS = {"onset": "#1991D3", "offset": "#2AD25E"}
+# 时间标签的宽度（像素），相邻标签至少相隔这么远
+TIME_LABEL_WIDTH = 60
+# 无法获取屏幕刷新率时使用的帧率
+DEFAULT_FRAME_RATE = 60
 
-    # 如果计算出的scale_factor为0，说明输入信号太短，无法达到目标点数
-    if scale_factor == 0:
-        raise ValueError("Input signal is too short to reach the target number of points")
-    signal = np.array(signal).reshape(-1, 1)
-    # 计算每个块的平均值
-    downsampled_signal = signal[::scale_factor].mean(axis=1)
-
-    return downsampled_signal
 
 def downsampleXset(xsets, stime, duration, max_show_frm, samplerate):
     """对Xset数据进行降采样，适应显示需求
@@ -71,16 +54,67 @@ def downsampleXset(xsets, stime, duration, max_show_frm, samplerate):
         samplerate: 采样率
         
     Returns:
-        降采样后的Xset数据列表
+        (indices, positions)：时间窗内的Xset在xsets中的下标，以及降采样后的位置
     """
-    # print(max_show_frm, etime, stime)
     limit = max_show_frm if duration * samplerate > max_show_frm else int(duration * samplerate)
+    scale_factor = duration * samplerate // limit # 计算需要的降采样因子
 
+    xsets = np.asarray(xsets, dtype=float)
+    indices = np.flatnonzero((xsets >= stime) & (xsets <= stime + duration))
+    return indices, np.round((xsets[indices] - stime) * samplerate / scale_factor)
 
-    scale_factor = duration * samplerate // limit # 计算需要的降采样因子
-    # print(scale_factor)
-    xsets = [x - stime for x in xsets if stime <= x <= stime+duration]
-    return [round(x * samplerate / scale_factor) for x in xsets]
+
+class MarkerLayer(QGraphicsItem):
+    """在图表的绘图区上一次性画出所有onset/offset标记
+
+    每种标记只保存一个位置数组，绘制时把落在同一像素列的标记合并，
+    所以开销只与绘图区宽度有关，而不是标记数量。
+    """
+
+    def __init__(self, chart):
+        super().__init__(chart)
+        self.chart = chart
+        self.markers = []  # [(位置数组, 颜色)]，位置与x轴同单位
+        self.x_range = 1
+        self.setZValue(10)  # 画在波形之上
+        chart.plotAreaChanged.connect(self.plotAreaChanged)
+
+    def setMarkers(self, markers, x_range):
+        """设置要画的标记并重绘
+
+        Args:
+            markers: [(位置数组, 颜色)]
+            x_range: x轴的范围（0到x_range）
+        """
+        self.markers = markers
+        self.x_range = x_range
+        self.update()
+
+    def plotAreaChanged(self, rect):
+        self.prepareGeometryChange()
+
+    def boundingRect(self):
+        return self.chart.plotArea()
+
+    def paint(self, painter, option, widget=None):
+        area = self.chart.plotArea()
+        for positions, color in self.markers:
+            if not len(positions):
+                continue
+            columns = np.unique(np.round(area.left() + positions / self.x_range * area.width()))
+            pen = QPen(QColor(color))
+            pen.setWidth(0)
+            painter.setPen(pen)
+            painter.drawLines([QLineF(x, area.top(), x, area.bottom()) for x in columns.tolist()])
+
+
+class WaveformPyramidTask(QRunnable):  # 后台构建波形金字塔
+    def __init__(self, waveform):
+        super().__init__()
+        self.waveform = waveform
+
+    def run(self):
+        self.waveform.build()
 
 
 class AudioViewer(QWidget):
@@ -99,7 +133,8 @@ class AudioViewer(QWidget):
         super().__init__()
         self.max_amp_ratio = 1.0
         self.tg_dict_tp = {"onset": [], "offset": []}
-        self.audio_arr = None
+        self.waveform = None  # 当前音频的最小/最大值波形金字塔
+        self.file_cache = FileCache()  # 音频、TextGrid和参数文件的缓存，预读相邻的文件
         self.max_amp = None
         self.audio_clip = None
         self.time_unit = 441
@@ -110,7 +145,7 @@ class AudioViewer(QWidget):
         self.resolution = 1
         self.showOnset = True
         self.showOffset = True
-        self.time_labels = {}
+        self.time_labels = []  # 复用的时间标签，数量不超过图表宽度能容纳的个数
 
 
         self.audio_obj = None
@@ -166,6 +201,30 @@ class AudioViewer(QWidget):
 
         self._chart.legend().hide()
 
+        # 波形只创建一条序列，之后每次重绘都用replaceNp整体替换数据
+        self.waveform_series = QLineSeries()
+        pen = QPen(QColor("grey"))
+        pen.setWidth(1)
+        self.waveform_series.setPen(pen)
+        self._chart.addSeries(self.waveform_series)
+        self._chart.setAxisX(self._axis_x, self.waveform_series)
+        self._chart.setAxisY(self._axis_y, self.waveform_series)
+        self._waveform_x = {}  # 每个x坐标的点数 -> x缓冲区
+        self._waveform_y = np.empty(0, dtype=np.float64)
+
+        # 所有Xset画在同一个图层上；每种Xset保存时间数组和是否隐藏的掩码
+        self.marker_layer = MarkerLayer(self._chart)
+        self.xset_times = {}
+        self.xset_hidden = {}
+        self.visible_xsets = []  # 当前时间窗内可见的(位置, 时间, 颜色)
+
+        # 重绘调度：滚动、拖动、滚轮只记录需要重绘，每个显示帧最多重绘一次（使用最新的状态）
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.timeout.connect(self.flushRedraw)
+        self.redraw_pending = None  # None、"scroll"（只重绘当前时间窗）或"view"（缩放、振幅也改变了）
+        self.last_redraw = 0.0
+
 
         self.chart_view = QChartView(self._chart)
         # self.chart_view.setRenderHint(QPainter.LosslessImageRendering)
@@ -277,9 +336,9 @@ class AudioViewer(QWidget):
         elif self.interval_ms < 100:
             self.interval_ms = 100
         
-        # 只有当音频文件已加载时才调用readAudio
+        # 只有当音频文件已加载时才重绘（只改变了缩放，不需要重新读取音频和TextGrid）
         if self.fpath and self.audio_obj:
-            self.tg_dict_tp = self.readAudio(self.fpath)
+            self.scheduleRedraw(view=True)
 
         super().keyPressEvent(event)
 
@@ -347,7 +406,7 @@ class AudioViewer(QWidget):
         # print(self.max_amp_ratio)
         # print(self.max_amp_ratio, self.interval_ms)
 
-        self.tg_dict_tp = self.readAudio(self.fpath)
+        self.scheduleRedraw(view=True)
         super().wheelEvent(event)
 
 
@@ -390,23 +449,47 @@ class AudioViewer(QWidget):
             self.fpath = fpath
             try:
                 # self.audio_obj = AudioSegment.from_file(self.fpath, format=self.fpath.split(".")[-1]).split_to_mono()[0]
-                self.audio_obj = ReadSound(self.fpath)
+                # 预读过的文件直接从缓存中取出（波形金字塔也已构建好）
+                self.audio_obj, self.waveform = self.file_cache.audio(self.fpath)
             except Exception as e:
                 # 处理音频文件读取失败的情况
                 self.audio_obj = None
+                self.waveform = None
                 return {"onset": [], "offset": []}
+            if len(self.waveform.levels) == 1:
+                # 波形金字塔在后台构建，构建完成前直接在原始采样上取最小/最大值
+                QThreadPool.globalInstance().start(WaveformPyramidTask(self.waveform))
         
         # 确保audio_obj已成功创建
         if not self.audio_obj:
             return {"onset": [], "offset": []}
 
         self.audio_samplerate = self.audio_obj.frame_rate
-        self.max_amp = self.audio_obj.max * self.max_amp_ratio
-
         self.maximum = int(self.audio_obj.duration_seconds * 1000)
         self.time_unit = self.audio_samplerate // 100
         self.audio_etime.setText(f"{formatted_time(self.maximum)}")
 
+        self.updateView()
+
+        # 根据模式选择不同的函数读取结果
+        # VAD模式读取_vad.TextGrid文件，默认模式读取.TextGrid文件
+        self.tg_dict_tp = self.file_cache.textgrid(self.fpath, is_vad_mode)
+
+        self.updateXset(self.tg_dict_tp)
+
+        return self.tg_dict_tp
+
+
+    def updateView(self):
+        """按当前的缩放、振幅比例和滚动位置重绘波形和 Xset
+
+        只使用已读取的音频和 Xset，不读取文件；缩放、滚轮、快捷键等只改变视图的操作都走这里，
+        只有换文件或检测结果改变时才调用readAudio。
+        """
+        if not self.audio_obj:
+            return
+
+        self.max_amp = self.audio_obj.max * self.max_amp_ratio
         self.adjustWinSizeResolution()
 
         self._axis_x.setRange(0, self.resolution)
@@ -414,18 +497,7 @@ class AudioViewer(QWidget):
 
         self.updateSlider()
         self.updateChart()
-
-        # 根据模式选择不同的函数读取结果
-        if is_vad_mode:
-            # VAD模式：读取_vad.TextGrid文件
-            self.tg_dict_tp = get_frm_intervals_from_textgrid(self.fpath)
-        else:
-            # 默认模式：读取.TextGrid文件
-            self.tg_dict_tp = get_frm_points_from_textgrid(self.fpath)
-
-        self.updateXset(self.tg_dict_tp)
-
-        return self.tg_dict_tp
+        self.refreshXset()
 
 
     def updateSlider(self):
@@ -488,28 +560,45 @@ class AudioViewer(QWidget):
         if not self.audio_obj:
             return
             
-        this_series = QLineSeries()
-        # this_series.setColor("rgb(193,204,208)")
-        pen = QPen(QColor("grey"))
-        pen.setWidth(1)  # 设置线条宽度为3像素
-        this_series.setPen(pen)  # 应用这个笔刷到线条系列
-        # print(self.slider_timerange.sliderPosition(), self.slider_timerange.sliderPosition()+self.interval_ms)
-        self.audio_arr = np.array(self.audio_obj[self.slider_timerange.sliderPosition():self.slider_timerange.sliderPosition()+self.interval_ms].get_array_of_samples())
-        thumbnail = downsampleSignal(self.audio_arr, self.resolution)
-        timepoint = [i for i in range(len(thumbnail))]
-        # 将数组数据一次性添加到序列中
-        points = [(x, y) for x, y in zip(timepoint, thumbnail)]
-        # self.series.replace(points)
-        for p in points:
-            this_series.append(*p)
-
-        self._chart.removeAllSeries()
-        self._chart.addSeries(this_series)
-        self._chart.setAxisX(self._axis_x, this_series)
-        self._chart.setAxisY(self._axis_y, this_series)
+        # 与audio_obj[ms0:ms1]相同的换算，保证波形与Xset的位置一致
+        start = int(self.slider_timerange.sliderPosition() * self.audio_samplerate / 1000)
+        stop = int((self.slider_timerange.sliderPosition() + self.interval_ms) * self.audio_samplerate / 1000)
+        n_samples = min(stop, len(self.audio_obj.get_array_of_samples())) - start
+        if n_samples <= 0:
+            return
+        # 每个x坐标对应scale_factor个采样点（与downsampleXset一致），取其中的最小值和最大值
+        scale_factor = max(n_samples // min(self.resolution, n_samples), 1)
+        mins, maxs = self.waveform.minmax(start, start + n_samples, scale_factor)
+        if scale_factor == 1:
+            xs, ys = self.waveformBuffers(len(mins), 1)
+            ys[:] = mins
+        else:  # 每个x坐标画一条从最小值到最大值的竖线
+            xs, ys = self.waveformBuffers(len(mins), 2)
+            ys[0::2] = mins
+            ys[1::2] = maxs
+        # 一次性替换整条波形（数据在C++中复制，缓冲区可以复用）
+        self.waveform_series.replaceNp(xs, ys)
         self._axis_x.setRange(0, self.resolution)
 
 
+    def waveformBuffers(self, n_columns, points_per_column):
+        """获取波形的x、y缓冲区（按需扩大，之后重复使用）
+
+        Args:
+            n_columns: x坐标的个数
+            points_per_column: 每个x坐标的点数（1或2）
+
+        Returns:
+            (xs, ys)两个float64数组视图，长度为n_columns * points_per_column
+        """
+        n_points = n_columns * points_per_column
+        if self._waveform_x.get(points_per_column) is None or len(self._waveform_x[points_per_column]) < n_points:
+            self._waveform_x[points_per_column] = np.repeat(np.arange(n_columns, dtype=np.float64), points_per_column)
+        if len(self._waveform_y) < n_points:
+            self._waveform_y = np.empty(n_points, dtype=np.float64)
+        return self._waveform_x[points_per_column][:n_points], self._waveform_y[:n_points]
+
+
     def hideXset(self, xsets=[], isVisible=True):
         """隐藏或显示 Xset 检测结果
         
@@ -517,17 +606,9 @@ class AudioViewer(QWidget):
             xsets: Xset 检测结果列表
             isVisible: 是否可见
         """
-        stime = self.slider_timerange.sliderPosition() / 1000
-        xsets = downsampleXset(xsets, stime, self.interval_ms/1000, self.resolution, self.audio_samplerate)
-        for line in self._chart.series():
-            if len(line.points()) == 2:
-                point = line.points()[0]
-                # print(point.x())
-                if point.x() in xsets:
-                    line.setVisible(isVisible)
-        
-        # 统一更新时间标签的可见性
-        self.updateTimeLabelsVisibility()
+        for mode, times in self.xset_times.items():
+            self.xset_hidden[mode][np.isin(times, xsets)] = not isVisible
+        self.refreshXset()
 
 
     def removeXset(self, xsets=[]):
@@ -540,22 +621,11 @@ class AudioViewer(QWidget):
         if not xsets:
             return
 
-        stime = self.slider_timerange.sliderPosition() / 1000
-        # etime = (self.slider_timerange.sliderPosition() + self.interval_ms) / 1000
-
-        xsets = downsampleXset(xsets, stime, self.interval_ms/1000, self.resolution, self.audio_samplerate)
-        # print(xsets)
-        for line in self._chart.series():
-            if len(line.points()) == 2:
-                point = line.points()[0]
-                # print(point.x())
-                if point.x() in xsets:
-                    self._chart.removeSeries(line)
-                    if point.x() in self.time_labels:
-                        label = self.time_labels[point.x()]
-                        label.deleteLater()
-                        del self.time_labels[point.x()]
-
+        for mode, times in self.xset_times.items():
+            keep = ~np.isin(times, xsets)
+            self.xset_times[mode] = times[keep]
+            self.xset_hidden[mode] = self.xset_hidden[mode][keep]
+        self.refreshXset()
 
 
     def updateXset(self, tg_dict):#, showOnset=True, showOffset=True):
@@ -568,71 +638,79 @@ class AudioViewer(QWidget):
         if not tg_dict:
             return
 
-        # 先清除旧的时间标签
-        self.clearTimeLabels()
-        
-        stime = self.slider_timerange.sliderPosition() / 1000
-        # etime = (self.slider_timerange.sliderPosition() + self.interval_ms) / 1000
-
+        self.xset_times = {}
+        self.xset_hidden = {}
         for mode in tg_dict:
-            # if (not showOnset and mode == "onset") or (not showOffset and mode == "offset"):
-            #     continue
-            original_xsets = tg_dict[mode]
-            
-            # 降采样用于显示位置
-            xsets = downsampleXset(original_xsets, stime, self.interval_ms/1000, self.resolution, self.audio_samplerate)
-            
-            # 创建原始时间值到降采样位置的映射
-            time_map = {}
-            for i, original_time in enumerate(original_xsets):
-                if stime <= original_time <= stime + self.interval_ms/1000:
-                    # 找到对应的降采样位置
-                    xset_pos = xsets[i] if i < len(xsets) else None
-                    if xset_pos is not None:
-                        time_map[xset_pos] = original_time
-
-            for xset in xsets:
-                test_series = QLineSeries()
-                # test_series.setColor("#1991D3")
-                if mode == "onset":
-                    pen = QPen(QColor("#1991D3"))
-                    color = "#1991D3"
-                else:
-                    pen = QPen(QColor("#2AD25E"))
-                    color = "#2AD25E"
-
-                pen.setWidth(0)  # 设置线条宽度为 3 像素
-                test_series.setPen(pen)  # 应用这个笔刷到线条系列
-
-                test_series.append(xset, -self.max_amp)
-                test_series.append(xset, self.max_amp)
-
-                self._chart.addSeries(test_series)
-                self._chart.setAxisX(self._axis_x, test_series)
-                self._chart.setAxisY(self._axis_y, test_series)
-                
-                # 使用原始时间值创建标签
-                original_time = time_map.get(xset, (xset * (self.interval_ms / 1000) / self.resolution) + stime)
-                self.createTimeLabel(xset, original_time, color)
+            times = np.asarray(tg_dict[mode], dtype=float)
+            self.xset_times[mode] = times
+            # 按当前的显示开关设置可见性
+            self.xset_hidden[mode] = np.full(len(times), not (self.showOnset if mode == "onset" else self.showOffset))
+        self.refreshXset()
+
+
+    def refreshXset(self):
+        """按当前时间窗重新计算可见 Xset 的位置，并更新标记图层和时间标签"""
+        if not self.audio_samplerate:
+            return
 
+        stime = self.slider_timerange.sliderPosition() / 1000
+        markers = []
+        self.visible_xsets = []
+        for mode, times in self.xset_times.items():
+            color = XSET_COLORS["onset"] if mode == "onset" else XSET_COLORS["offset"]
+            indices, positions = downsampleXset(times, stime, self.interval_ms/1000, self.resolution, self.audio_samplerate)
+            shown = ~self.xset_hidden[mode][indices]
+            markers.append((positions[shown], color))
+            self.visible_xsets.append((positions[shown], times[indices][shown], color))
+        self.marker_layer.setMarkers(markers, self.resolution)
 
-        try:
-            self.hideXset(self.tg_dict_tp["onset"], isVisible=self.showOnset)
-        except KeyError:
-            pass
-        try:
-            self.hideXset(self.tg_dict_tp["offset"], isVisible=self.showOffset)
-        except KeyError:
-            pass
+        # 统一更新时间标签的可见性
+        self.updateTimeLabelsVisibility()
 
 
     def sliderValueChanged(self):
         """滑块值变化事件处理
         
-        当时间滑块值改变时，更新图表和 Xset 显示
+        当时间滑块值改变时，安排更新图表和 Xset 显示
         """
-        self.updateChart()
-        self.updateXset(self.tg_dict_tp)
+        self.scheduleRedraw()
+
+
+    def scheduleRedraw(self, view=False):
+        """安排一次重绘，同一帧内的多次请求合并为一次
+
+        距离上次重绘已超过一帧时在下一轮事件循环中立即重绘，否则等到这一帧结束。
+
+        Args:
+            view: 缩放或振幅比例也改变了（需要updateView），否则只是滚动
+        """
+        if view or self.redraw_pending is None:
+            self.redraw_pending = "view" if view else "scroll"
+        if self.redraw_timer.isActive():
+            return
+
+        frame_ms = 1000 / self.frameRate()
+        elapsed_ms = (time.perf_counter() - self.last_redraw) * 1000
+        self.redraw_timer.start(int(max(0.0, frame_ms - elapsed_ms)))
+
+
+    def flushRedraw(self):
+        """执行被合并的重绘"""
+        pending, self.redraw_pending = self.redraw_pending, None
+        self.last_redraw = time.perf_counter()
+        if pending == "view":
+            self.updateView()
+        elif pending == "scroll":
+            self.updateChart()
+            # 与updateView相同，只重新定位已有的标记，保留hideXset/removeXset的结果
+            self.refreshXset()
+
+
+    def frameRate(self):
+        """当前屏幕的刷新率（Hz）"""
+        screen = self.screen()
+        rate = screen.refreshRate() if screen else 0
+        return rate if rate > 0 else DEFAULT_FRAME_RATE
 
 
     
@@ -665,10 +743,7 @@ class AudioViewer(QWidget):
                 new_value = self.slider_timerange.value() + slider_delta
                 # 确保滑块值在有效范围内
                 new_value = max(0, min(new_value, self.maximum - self.interval_ms))
-                self.slider_timerange.setValue(new_value)
-                
-                # 更新时间标签的位置
-                self.updateTimeLabelsPosition()
+                self.slider_timerange.setValue(new_value)  # 时间标签在合并后的重绘中更新
                 
                 # 更新最后鼠标位置
                 self.last_mouse_pos = current_pos
@@ -688,94 +763,77 @@ class AudioViewer(QWidget):
         """处理图表鼠标离开事件"""
         self.time_labels_visible = False
         # 隐藏所有时间标签
-        for label in self.time_labels.values():
-            label.hide()
+        self.clearTimeLabels()
     
     def updateTimeLabelsVisibility(self):
-        """更新时间标签的可见性，只显示当前启用的类型（onset/offset）的时间标签"""
-        # 获取当前可见的 xset 位置（从图表中的线条推断）
-        visible_xsets = set()
-        for line in self._chart.series():
-            if len(line.points()) == 2 and line.isVisible():
-                point = line.points()[0]
-                visible_xsets.add(point.x())
-        
-        # 只显示可见 xset 对应的时间标签
-        for xset, label in self.time_labels.items():
-            if xset in visible_xsets:
-                if self.time_labels_visible:
-                    label.show()
-                else:
-                    label.hide()
-            else:
-                label.hide()
+        """显示当前可见 Xset 的时间标签
+
+        只为时间窗内可见的 Xset 显示标签，并跳过与前一个标签重叠的，
+        所以标签数量不超过图表宽度能容纳的个数，与 Xset 的总数无关。
+        """
+        chart_width = self.chart_view.width()
+        chart_container = self.chart_view.parent().parent()
+        if not self.time_labels_visible or chart_width <= 0 or not chart_container or not self.visible_xsets:
+            self.clearTimeLabels()
+            return
+
+        positions = np.concatenate([positions for positions, _, _ in self.visible_xsets])
+        times = np.concatenate([times for _, times, _ in self.visible_xsets])
+        colors = np.concatenate([np.full(len(positions), color) for positions, _, color in self.visible_xsets])
+        # 同一像素列只保留一个标签
+        label_x = (positions / self.resolution * chart_width).astype(int) - TIME_LABEL_WIDTH // 2
+        label_x, first = np.unique(label_x, return_index=True)
+
+        chart_view_global_pos = self.chart_view.mapTo(chart_container, self.chart_view.rect().bottomLeft())
+        label_y = chart_view_global_pos.y() + 5
+
+        n_shown = 0
+        last_x = None
+        for x, i in zip(label_x.tolist(), first.tolist()):
+            if last_x is not None and x - last_x < TIME_LABEL_WIDTH:
+                continue
+            last_x = x
+            self.showTimeLabel(n_shown, chart_container, x, label_y, times[i], colors[i])
+            n_shown += 1
+
+        for label in self.time_labels[n_shown:]:
+            label.hide()
     
-    def createTimeLabel(self, xset, time_value, color):
-        """创建时间标签
+    def showTimeLabel(self, index, chart_container, x, y, time_value, color):
+        """在(x, y)处显示第index个复用的时间标签
         
         Args:
-            xset: xset 的 x 坐标（降采样后的值）
+            index: 标签在time_labels中的下标，不存在时新建
+            chart_container: 标签所在的容器
+            x: 标签左边的 x 坐标
+            y: 标签上边的 y 坐标
             time_value: 原始时间值（秒），直接从 TextGrid 读取
             color: 标签颜色
         """
-        if not self.audio_samplerate:
-            return
-            
-        time_str = f"{time_value:.3f}"
-        
-        label = QLabel(time_str)
-        label.setStyleSheet(f"color: {color}; font-weight: bold; background: transparent;")
-        label.setAlignment(Qt.AlignCenter)
-        label.setFixedWidth(60)
-        label.setFixedHeight(20)
-        
-        chart_width = self.chart_view.width()
-        if chart_width > 0:
-            x_ratio = xset / self.resolution
-            label_x = int(x_ratio * chart_width) - 30
-            
-            chart_container = self.chart_view.parent().parent()
-            if chart_container:
-                chart_view_global_pos = self.chart_view.mapTo(chart_container, self.chart_view.rect().bottomLeft())
-                label_y = chart_view_global_pos.y() + 5
-                
-                label.setParent(chart_container)
-                label.move(label_x, label_y)
-                # 根据 time_labels_visible 控制初始显示状态
-                if self.time_labels_visible:
-                    label.show()
-                else:
-                    label.hide()
-                
-                self.time_labels[xset] = label
+        if index == len(self.time_labels):
+            label = QLabel(chart_container)
+            label.setAlignment(Qt.AlignCenter)
+            label.setFixedWidth(TIME_LABEL_WIDTH)
+            label.setFixedHeight(20)
+            label.color = None
+            self.time_labels.append(label)
+        label = self.time_labels[index]
+
+        if label.color != color:
+            label.setStyleSheet(f"color: {color}; font-weight: bold; background: transparent;")
+            label.color = color
+        label.setText(f"{time_value:.3f}")
+        label.move(x, y)
+        label.show()
     
     def clearTimeLabels(self):
-        """清除所有时间标签"""
-        for xset, label in self.time_labels.items():
-            label.deleteLater()
-        self.time_labels.clear()
+        """隐藏所有时间标签"""
+        for label in self.time_labels:
+            label.hide()
     
     def updateTimeLabelsPosition(self):
         """更新时间标签的位置"""
-        stime = self.slider_timerange.sliderPosition() / 1000
-        chart_width = self.chart_view.width()
-        
-        if chart_width <= 0 or not self.audio_samplerate:
-            return
-        
-        chart_container = self.chart_view.parent().parent()
-        if not chart_container:
-            return
-            
-        chart_view_global_pos = self.chart_view.mapTo(chart_container, self.chart_view.rect().bottomLeft())
-        label_y = chart_view_global_pos.y() + 5
-        
-        # 遍历所有时间标签，更新它们的 x 坐标
-        for xset, label in list(self.time_labels.items()):
-            # 计算新的 x 坐标
-            x_ratio = xset / self.resolution
-            label_x = int(x_ratio * chart_width) - 30
-            label.move(label_x, label_y)
+        self.updateTimeLabelsVisibility()
 
 
 
@@ -0,0 +1,133 @@
+import os
+import time
+
+from PySide6.QtCore import Qt, QObject, Signal
+from PySide6.QtGui import QColor, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+
+from src.utils.resources import get_resource_path
+
+
+# 各状态的显示文字和颜色
+STATUS_STYLES = {
+    "pending": ("Pending", "#999999"),
+    "running": ("Running", "#1991D3"),
+    "done": ("Done", "#2AD25E"),
+    "cached": ("Cached", "#2AD25E"),  # 音频和参数都没有改变，复用了缓存的结果
+    "skipped": ("Skipped", "#E6A23C"),
+    "cancelled": ("Cancelled", "#999999"),
+    "failed": ("Failed", "#F56C6C"),
+}
+
+COLUMNS = ["File", "Status", "Duration", "Time", "Onsets", "Offsets"]
+
+
+class RunAllSignals(QObject):
+    """把BatchJob的回调（在进程池的内部线程中调用）转成主线程中的信号"""
+    started = Signal(int)
+    done = Signal(int, object)
+    finished = Signal(object)
+
+
+class RunAllTable(QWidget):
+    """run-all的实时结果表：每个文件一行，显示状态、音频时长、检测耗时和结果数量
+
+    双击一行时发出fileActivated信号，用于在波形视图中打开该文件（处理过程中也可以浏览）。
+    """
+    fileActivated = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Praditor - Run all")
+        self.setWindowIcon(QIcon(get_resource_path('resources/icons/icon.ico')))
+        self.resize(720, 480)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(COLUMNS)):
+            self.table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.table.cellDoubleClicked.connect(lambda row, column: self.fileActivated.emit(row))
+        layout.addWidget(self.table)
+
+        self.statuses = []
+        self.start_time = None
+        self.end_time = None
+
+    def setFiles(self, file_paths):
+        """重置表格，每个文件一行（状态为Pending）
+
+        Args:
+            file_paths: 音频文件路径列表
+        """
+        self.table.setRowCount(len(file_paths))
+        self.statuses = ["pending"] * len(file_paths)
+        for row, fpath in enumerate(file_paths):
+            self.table.setItem(row, 0, QTableWidgetItem(os.path.basename(fpath)))
+            for column in range(1, len(COLUMNS)):
+                self.table.setItem(row, column, QTableWidgetItem(""))
+            self._setStatus(row, "pending")
+        self.start_time = time.perf_counter()
+        self.end_time = None
+        self.updateSummary()
+
+    def _setStatus(self, row, status):
+        text, color = STATUS_STYLES.get(status, (status, "#999999"))
+        item = self.table.item(row, 1)
+        item.setText(text)
+        item.setForeground(QColor(color))
+        self.statuses[row] = status
+
+    def markStarted(self, row):
+        """标记第row个文件开始处理"""
+        self._setStatus(row, "running")
+        self.updateSummary()
+
+    def markDone(self, row, result):
+        """填入第row个文件的处理结果
+
+        Args:
+            row: 文件序号
+            result: batch.process_file返回的结果字典
+        """
+        self._setStatus(row, "cached" if result.get("cached") else result["status"])
+        if "duration" in result:
+            self.table.item(row, 2).setText(f"{result['duration']:.1f}s")
+        if "elapsed" in result:
+            self.table.item(row, 3).setText(f"{result['elapsed']:.2f}s")
+        if result["status"] == "done":  # 包括缓存的结果
+            self.table.item(row, 4).setText(str(len(result["onsets"])))
+            self.table.item(row, 5).setText(str(len(result["offsets"])))
+        if "error" in result:
+            self.table.item(row, 1).setToolTip(result["error"])
+        self.updateSummary()
+
+    def markFinished(self):
+        """所有文件完成（或取消）后，把剩下的行标记为Cancelled"""
+        for row, status in enumerate(self.statuses):
+            if status in ("pending", "running"):
+                self._setStatus(row, "cancelled")
+        self.end_time = time.perf_counter()
+        self.updateSummary()
+
+    def updateSummary(self):
+        """更新表格上方的汇总信息：完成数量、正在处理的数量和速度"""
+        if self.start_time is None:
+            return
+        elapsed = (self.end_time or time.perf_counter()) - self.start_time
+        finished = sum(1 for status in self.statuses if status not in ("pending", "running"))
+        running = self.statuses.count("running")
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        failed = self.statuses.count("failed")
+        cached = self.statuses.count("cached")
+        self.summary_label.setText(
+            f"{finished}/{len(self.statuses)} files, {running} running, {failed} failed, {cached} cached  |  "
+            f"{elapsed:.1f}s elapsed, {rate:.2f} files/sec"
+        )
@@ -2,6 +2,7 @@ from PySide6.QtCore import Signal, Qt
 from PySide6.QtWidgets import QGridLayout, QApplication, QMainWindow, QWidget, QLabel
 
 from src.gui.slider_single import SingleSlider
+from src.utils.params import parse_param_value
 
 
 class MySliders(QWidget):
@@ -240,45 +241,45 @@ class MySliders(QWidget):
         onset_params = params.get("onset", {})
         
         if "amp" in onset_params:
-            self.amp_slider_onset.param_slider.setValue(round(eval(onset_params["amp"]) / self.amp_slider_onset.scale))
+            self.amp_slider_onset.param_slider.setValue(round(parse_param_value("amp", onset_params["amp"]) / self.amp_slider_onset.scale))
         if "cutoff0" in onset_params:
-            self.cutoff0_slider_onset.param_slider.setValue(round(eval(onset_params["cutoff0"]) / self.cutoff0_slider_onset.scale))
+            self.cutoff0_slider_onset.param_slider.setValue(round(parse_param_value("cutoff0", onset_params["cutoff0"]) / self.cutoff0_slider_onset.scale))
         if "cutoff1" in onset_params:
-            self.cutoff1_slider_onset.param_slider.setValue(round(eval(onset_params["cutoff1"]) / self.cutoff1_slider_onset.scale))
+            self.cutoff1_slider_onset.param_slider.setValue(round(parse_param_value("cutoff1", onset_params["cutoff1"]) / self.cutoff1_slider_onset.scale))
         if "numValid" in onset_params:
-            self.numValid_slider_onset.param_slider.setValue(round(eval(onset_params["numValid"]) / self.numValid_slider_onset.scale))
+            self.numValid_slider_onset.param_slider.setValue(round(parse_param_value("numValid", onset_params["numValid"]) / self.numValid_slider_onset.scale))
         if "win_size" in onset_params:
-            self.win_size_slider_onset.param_slider.setValue(round(eval(onset_params["win_size"]) / self.win_size_slider_onset.scale))
+            self.win_size_slider_onset.param_slider.setValue(round(parse_param_value("win_size", onset_params["win_size"]) / self.win_size_slider_onset.scale))
         if "ratio" in onset_params:
-            self.ratio_slider_onset.param_slider.setValue(round(eval(onset_params["ratio"]) / self.ratio_slider_onset.scale))
+            self.ratio_slider_onset.param_slider.setValue(round(parse_param_value("ratio", onset_params["ratio"]) / self.ratio_slider_onset.scale))
         if "penalty" in onset_params:
-            self.penalty_slider_onset.param_slider.setValue(round(eval(onset_params["penalty"]) / self.penalty_slider_onset.scale))
+            self.penalty_slider_onset.param_slider.setValue(round(parse_param_value("penalty", onset_params["penalty"]) / self.penalty_slider_onset.scale))
         if "ref_len" in onset_params:
-            self.ref_len_slider_onset.param_slider.setValue(round(eval(onset_params["ref_len"]) / self.ref_len_slider_onset.scale))
+            self.ref_len_slider_onset.param_slider.setValue(round(parse_param_value("ref_len", onset_params["ref_len"]) / self.ref_len_slider_onset.scale))
         if "eps_ratio" in onset_params:
-            self.eps_ratio_slider_onset.param_slider.setValue(round(eval(onset_params["eps_ratio"]) / self.eps_ratio_slider_onset.scale))
+            self.eps_ratio_slider_onset.param_slider.setValue(round(parse_param_value("eps_ratio", onset_params["eps_ratio"]) / self.eps_ratio_slider_onset.scale))
 
         # 重置Offset参数，只处理params字典中实际存在的键
         offset_params = params.get("offset", {})
         
         if "amp" in offset_params:
-            self.amp_slider_offset.param_slider.setValue(round(eval(offset_params["amp"]) / self.amp_slider_offset.scale))
+            self.amp_slider_offset.param_slider.setValue(round(parse_param_value("amp", offset_params["amp"]) / self.amp_slider_offset.scale))
         if "cutoff0" in offset_params:
-            self.cutoff0_slider_offset.param_slider.setValue(round(eval(offset_params["cutoff0"]) / self.cutoff0_slider_offset.scale))
+            self.cutoff0_slider_offset.param_slider.setValue(round(parse_param_value("cutoff0", offset_params["cutoff0"]) / self.cutoff0_slider_offset.scale))
         if "cutoff1" in offset_params:
-            self.cutoff1_slider_offset.param_slider.setValue(round(eval(offset_params["cutoff1"]) / self.cutoff1_slider_offset.scale))
+            self.cutoff1_slider_offset.param_slider.setValue(round(parse_param_value("cutoff1", offset_params["cutoff1"]) / self.cutoff1_slider_offset.scale))
         if "numValid" in offset_params:
-            self.numValid_slider_offset.param_slider.setValue(round(eval(offset_params["numValid"]) / self.numValid_slider_offset.scale))
+            self.numValid_slider_offset.param_slider.setValue(round(parse_param_value("numValid", offset_params["numValid"]) / self.numValid_slider_offset.scale))
         if "win_size" in offset_params:
-            self.win_size_slider_offset.param_slider.setValue(round(eval(offset_params["win_size"]) / self.win_size_slider_offset.scale))
+            self.win_size_slider_offset.param_slider.setValue(round(parse_param_value("win_size", offset_params["win_size"]) / self.win_size_slider_offset.scale))
         if "ratio" in offset_params:
-            self.ratio_slider_offset.param_slider.setValue(round(eval(offset_params["ratio"]) / self.ratio_slider_offset.scale))
+            self.ratio_slider_offset.param_slider.setValue(round(parse_param_value("ratio", offset_params["ratio"]) / self.ratio_slider_offset.scale))
         if "penalty" in offset_params:
-            self.penalty_slider_offset.param_slider.setValue(round(eval(offset_params["penalty"]) / self.penalty_slider_offset.scale))
+            self.penalty_slider_offset.param_slider.setValue(round(parse_param_value("penalty", offset_params["penalty"]) / self.penalty_slider_offset.scale))
         if "ref_len" in offset_params:
-            self.ref_len_slider_offset.param_slider.setValue(round(eval(offset_params["ref_len"]) / self.ref_len_slider_offset.scale))
+            self.ref_len_slider_offset.param_slider.setValue(round(parse_param_value("ref_len", offset_params["ref_len"]) / self.ref_len_slider_offset.scale))
         if "eps_ratio" in offset_params:
-            self.eps_ratio_slider_offset.param_slider.setValue(round(eval(offset_params["eps_ratio"]) / self.eps_ratio_slider_offset.scale))
+            self.eps_ratio_slider_offset.param_slider.setValue(round(parse_param_value("eps_ratio", offset_params["eps_ratio"]) / self.eps_ratio_slider_offset.scale))
 
 
     def updateTooltips(self, is_vad_mode):
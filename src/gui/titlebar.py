@@ -295,7 +295,7 @@ class CustomTitleBar(QWidget):
             }
         """)
         self.run_all_btn.setCursor(QCursor(Qt.PointingHandCursor))
-        self.run_all_btn.setToolTip("Run Praditor on all audio files")
+        self.run_all_btn.setToolTip("Run Praditor on all audio files (Shift+click: ignore cached results)")
         self.run_all_btn.setEnabled(False)  # 初始禁用
         layout.addWidget(self.run_all_btn)
         
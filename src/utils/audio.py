@@ -1,9 +1,10 @@
 import os.path
 import sys
 from datetime import datetime
+from functools import lru_cache
 
 import numpy as np
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, filtfilt, sosfilt, sosfilt_zi, sosfiltfilt
 from textgrid import TextGrid
 import soundfile as sf
 
@@ -13,7 +14,7 @@ class ReadSound:
     
     用于读取音频文件，处理音频数据，并提供音频切片功能
     """
-    def __init__(self, fpath=None, arr=None, duration_seconds=None, frame_rate=None):
+    def __init__(self, fpath=None, arr=None, duration_seconds=None, frame_rate=None, start_frame=0, analysis_dtype=np.float64, channel=0):
         """初始化ReadSound对象
         
         Args:
@@ -21,8 +22,15 @@ class ReadSound:
             arr: 音频数据数组
             duration_seconds: 音频时长（秒）
             frame_rate: 采样率
+            start_frame: 切片在原始音频中的起始帧
+            analysis_dtype: 滤波及之后分析使用的浮点类型，np.float64（默认）或np.float32（内存减半）
+            channel: 多声道音频检测使用的声道：声道序号（从0开始，默认第一个声道），或"mix"（各声道的平均）
         """
 
+        self.start_frame = start_frame
+        self.analysis_dtype = np.dtype(analysis_dtype)
+        self.channel = channel
+
 
         if fpath is None:
             if arr is None:
@@ -42,10 +50,17 @@ class ReadSound:
 
 
 
-        try:
-            self.arr = self.arr[:, 0]
-        except IndexError:
-            pass
+        # 解码得到的所有声道，形状为(帧数, 声道数)；单声道时是原数组的视图
+        self.frames = self.arr if self.arr.ndim == 2 else self.arr[:, np.newaxis]
+        self.num_channels = self.frames.shape[1]
+
+        if channel == "mix":
+            self.arr = np.round(self.frames.mean(axis=1)).astype(self.frames.dtype)
+        elif isinstance(channel, (int, np.integer)) and not isinstance(channel, bool) and 0 <= channel < self.num_channels:
+            self.channel = int(channel)
+            self.arr = self.frames[:, self.channel]
+        else:
+            raise ValueError(f"Invalid channel {channel!r}: the audio has {self.num_channels} channel(s) (indices 0-{self.num_channels - 1})")
 
         self.max = np.max(np.abs(self.arr))
 
@@ -67,7 +82,24 @@ class ReadSound:
         end = min(end, len(self.arr))
 
 
-        return ReadSound(arr=self.arr[start:end], duration_seconds=(end - start) / 1000, frame_rate=self.frame_rate)
+        # 切片保留所有声道，并使用与原对象相同的声道（或混合）
+        return ReadSound(arr=self.frames[start:end], duration_seconds=(end - start) / 1000, frame_rate=self.frame_rate,
+                         start_frame=self.start_frame + start, analysis_dtype=self.analysis_dtype, channel=self.channel)
+
+    def split_channels(self):
+        """每个声道一个ReadSound，共享已经解码的数据，不重新读取文件
+
+        Returns:
+            ReadSound列表，第i个的channel为i
+        """
+        channel_objs = []
+        for channel in range(self.num_channels):
+            channel_obj = ReadSound(arr=self.frames, duration_seconds=self.duration_seconds, frame_rate=self.frame_rate,
+                                    start_frame=self.start_frame, analysis_dtype=self.analysis_dtype, channel=channel)
+            if hasattr(self, "fpath"):
+                channel_obj.fpath = self.fpath
+            channel_objs.append(channel_obj)
+        return channel_objs
 
     def get_array_of_samples(self):
         """获取音频样本数组
@@ -102,15 +134,117 @@ def get_current_time():
     return formatted_time
 
 
-def bandpass_filter(data, lowcut, highcut, fs, order=4):
+# 滤波器设计缓存的最大条目数（每组阶数、截止频率、类型各占一条）
+FILTER_CACHE_SIZE = 64
+# 非float64输出时分块滤波的块长度（采样点），float64临时数组的峰值约为几个块的大小
+FILTER_CHUNK_SIZE = 2 ** 18
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def design_filter(order, wn, btype, output="sos"):
+    """设计Butterworth滤波器（带缓存）
+    
+    同一组参数只调用一次butter，批处理时不再为每个片段重复设计滤波器。
+    
+    Args:
+        order: 滤波器阶数
+        wn: 归一化截止频率，低通时为float，带通时为(low, high)元组
+        btype: 'low'或'bandpass'
+        output: "sos"（二阶节）或"ba"（传递函数）
+        
+    Returns:
+        output为"sos"时返回sos数组，为"ba"时返回(b, a)；数组均为只读
+    """
+    coeffs = butter(order, wn, btype=btype, output=output)
+    if output == "sos":
+        coeffs.flags.writeable = False
+        return coeffs
+    for arr in coeffs:
+        arr.flags.writeable = False
+    return tuple(coeffs)
+
+
+def chunked_sosfiltfilt(sos, data, dtype, chunk_size=FILTER_CHUNK_SIZE):
+    """与sosfiltfilt相同的零相位滤波，但结果直接写入dtype类型的数组
+
+    正反两遍都按块计算，块之间传递滤波器状态（float64），因此与整段计算等价；
+    只有第一遍的中间结果以dtype保存。float64的临时数组只有一块大小，
+    不会出现整段音频长度的float64数组。
+
+    Args:
+        sos: 二阶节系数（可写的数组）
+        data: 音频数据数组
+        dtype: 输出的浮点类型
+        chunk_size: 块长度（采样点）
+
+    Returns:
+        滤波后的音频数据（dtype类型）
+    """
+    n_sections = sos.shape[0]
+    ntaps = 2 * n_sections + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum())
+    edge = 3 * ntaps
+    n = len(data)
+    if n <= edge:  # 太短，与sosfiltfilt报同样的错误
+        return sosfiltfilt(sos, data).astype(dtype)
+
+    # 与sosfiltfilt相同的奇对称延拓，只构造两端
+    left = 2.0 * float(data[0]) - np.asarray(data[edge:0:-1], dtype=np.float64)
+    right = 2.0 * float(data[-1]) - np.asarray(data[-2:-(edge + 2):-1], dtype=np.float64)
+    zi = sosfilt_zi(sos)
+
+    # 正向
+    out = np.empty(n, dtype=dtype)
+    _, z = sosfilt(sos, left, zi=zi * left[0])
+    for start in range(0, n, chunk_size):
+        y, z = sosfilt(sos, np.asarray(data[start:start + chunk_size], dtype=np.float64), zi=z)
+        out[start:start + len(y)] = y
+    right_y, _ = sosfilt(sos, right, zi=z)
+
+    # 反向（左端延拓部分的结果会被丢弃，不需要计算）
+    _, z = sosfilt(sos, right_y[::-1], zi=zi * right_y[-1])
+    for stop in range(n, 0, -chunk_size):
+        start = max(stop - chunk_size, 0)
+        y, z = sosfilt(sos, out[start:stop][::-1].astype(np.float64), zi=z)
+        out[start:stop] = y[::-1]
+    return out
+
+
+def apply_filter(coeffs, data, output="sos", dtype=np.float64):
+    """零相位滤波
+    
+    Args:
+        coeffs: design_filter的返回值
+        data: 音频数据数组
+        output: "sos"或"ba"，需与设计时一致
+        dtype: 输出的浮点类型；不是float64时sos滤波分块进行（见chunked_sosfiltfilt）
+        
+    Returns:
+        滤波后的音频数据
+    """
+    if output == "sos":
+        sos = np.array(coeffs)  # sosfilt需要可写的数组，缓存中的是只读的
+        if np.dtype(dtype) != np.float64:
+            return chunked_sosfiltfilt(sos, data, dtype)
+        return sosfiltfilt(sos, data)
+    b, a = coeffs
+    return filtfilt(b, a, data)
+
+
+def bandpass_filter(data, lowcut, highcut, fs, order=4, output="sos", dtype=np.float64):
     """带通滤波器
     
+    默认使用二阶节（sosfiltfilt）：截止频率很低时（如onset默认的4Hz），
+    传递函数形式的高阶滤波器极点贴近单位圆，数值上不稳定，甚至输出NaN。
+    
     Args:
         data: 音频数据数组
         lowcut: 低截止频率
         highcut: 高截止频率
         fs: 采样率
         order: 滤波器阶数
+        output: "sos"（默认）或"ba"（旧版filtfilt实现）
+        dtype: 输出的浮点类型；滤波本身始终以float64计算（低截止频率下float32系数会明显损失精度），
+            np.float32时分块滤波并直接写入float32数组，float64的临时数组只有一块大小
         
     Returns:
         滤波后的音频数据
@@ -119,19 +253,16 @@ def bandpass_filter(data, lowcut, highcut, fs, order=4):
     low = lowcut / nyquist
     high = highcut / nyquist
     if low == 0:
-        b, a = butter(order, high, btype='low', output="ba")
-        filtered_data = filtfilt(b, a, data)
+        filtered_data = apply_filter(design_filter(order, high, 'low', output), data, output, dtype)
     else:
         try:
-            b, a = butter(order, [low, high], btype='bandpass', output="ba")
-            filtered_data = filtfilt(b, a, data)
+            filtered_data = apply_filter(design_filter(order, (low, high), 'bandpass', output), data, output, dtype)
         except ValueError:  # 如果设置的最高频率大于了可接受的范围
-            b, a = butter(order, [low, 1], btype='bandpass', output="ba")
-            filtered_data = filtfilt(b, a, data)
-    return filtered_data
+            filtered_data = apply_filter(design_filter(order, (low, 1), 'bandpass', output), data, output, dtype)
+    return filtered_data.astype(dtype, copy=False)
 
 
-def lowpass_filter(data, highcut, fs, order=4):
+def lowpass_filter(data, highcut, fs, order=4, output="sos"):
     """低通滤波器
     
     Args:
@@ -139,14 +270,14 @@ def lowpass_filter(data, highcut, fs, order=4):
         highcut: 高截止频率
         fs: 采样率
         order: 滤波器阶数
+        output: "sos"（默认）或"ba"
         
     Returns:
         滤波后的音频数据
     """
     nyquist = 0.5 * fs
     high = highcut / nyquist
-    b, a = butter(order, high, btype='low', output="ba")
-    filtered_data = filtfilt(b, a, data)
+    filtered_data = apply_filter(design_filter(order, high, 'low', output), data, output)
     return filtered_data
 
 
@@ -0,0 +1,176 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.utils.audio import ReadSound, get_frm_intervals_from_textgrid, get_frm_points_from_textgrid
+from src.utils.logger import sot_logger
+from src.utils.params import ParamsError, read_params_file
+from src.utils.waveform import WaveformPyramid
+
+
+# 缓存中音频采样（含波形金字塔）的默认总大小上限（字节）
+DEFAULT_MAX_BYTES = 512 * 2 ** 20
+
+
+def _sample_bytes(arr):
+    """采样数组实际占用的内存（多声道文件只取第一声道时，数组是整块数据的视图）"""
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr.nbytes
+
+
+def _mtime(path):
+    """文件的修改时间，文件不存在时为None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class FileCache:
+    """音频、TextGrid和参数文件的缓存，可以在后台线程中预读相邻的文件
+
+    音频按最近使用顺序（LRU）保存，按采样和波形金字塔占用的总内存淘汰；
+    TextGrid结果很小，按路径和修改时间缓存，文件改变后自动重新读取；
+    参数文件由src.utils.params.read_params_file缓存，预读时一起读入。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """初始化缓存
+
+        Args:
+            max_bytes: 缓存音频的总大小上限（字节）；最近使用的一个文件即使超过上限也会保留
+        """
+        self.max_bytes = max_bytes
+        self._audio = OrderedDict()  # 路径 -> (修改时间, ReadSound, WaveformPyramid)
+        self._textgrids = {}  # (路径, is_vad_mode) -> (修改时间, 结果)
+        self._pending = {}  # 路径 -> 正在预读的Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="praditor-prefetch")
+
+    @property
+    def nbytes(self):
+        """缓存音频占用的总字节数"""
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self):
+        # 金字塔可能在之后才构建，所以每次重新计算
+        return sum(_sample_bytes(audio_obj.get_array_of_samples()) + waveform.nbytes
+                   for _, audio_obj, waveform in self._audio.values())
+
+    def _load_audio(self, fpath, build=True):
+        """读取音频并（可选）构建波形金字塔，可在后台线程中运行
+
+        Args:
+            fpath: 音频文件路径
+            build: 是否构建波形金字塔；为False时由调用者在后台构建
+        """
+        mtime = _mtime(fpath)
+        audio_obj = ReadSound(fpath)
+        waveform = WaveformPyramid(audio_obj.get_array_of_samples())
+        if build:
+            waveform.build()
+        entry = (mtime, audio_obj, waveform)
+        with self._lock:
+            self._audio[fpath] = entry
+            self._audio.move_to_end(fpath)
+            self._evict()
+        return entry
+
+    def _evict(self):
+        """淘汰最久未使用的音频，直到总大小不超过上限（需持有锁）"""
+        while len(self._audio) > 1 and self._total_bytes() > self.max_bytes:
+            self._audio.popitem(last=False)
+
+    def audio(self, fpath):
+        """获取音频，未缓存时在当前线程读取；正在预读时等待预读完成
+
+        在当前线程读取时不构建波形金字塔（len(levels) == 1），由调用者在后台构建。
+
+        Args:
+            fpath: 音频文件路径
+
+        Returns:
+            (ReadSound, WaveformPyramid)
+        """
+        with self._lock:
+            entry = self._audio.get(fpath)
+            if entry is not None and entry[0] == _mtime(fpath):
+                self._audio.move_to_end(fpath)
+                return entry[1], entry[2]
+            future = self._pending.get(fpath)
+
+        if future is not None:
+            try:
+                entry = future.result()
+                if entry[0] == _mtime(fpath):
+                    with self._lock:
+                        if fpath in self._audio:
+                            self._audio.move_to_end(fpath)
+                    return entry[1], entry[2]
+            except Exception:
+                pass  # 预读失败时在当前线程重新读取，抛出真正的错误
+        _, audio_obj, waveform = self._load_audio(fpath, build=False)
+        return audio_obj, waveform
+
+    def textgrid(self, fpath, is_vad_mode=False):
+        """读取音频对应的TextGrid结果（.TextGrid或_vad.TextGrid）
+
+        Args:
+            fpath: 音频文件路径
+            is_vad_mode: 是否为VAD模式
+
+        Returns:
+            包含onset和offset的字典（副本，可以修改）
+        """
+        tg_path = os.path.splitext(os.path.abspath(fpath))[0] + ("_vad" if is_vad_mode else "") + ".TextGrid"
+        key = (fpath, is_vad_mode)
+        mtime = _mtime(tg_path)
+        with self._lock:
+            cached = self._textgrids.get(key)
+        if cached is None or cached[0] != mtime:
+            result = get_frm_intervals_from_textgrid(fpath) if is_vad_mode else get_frm_points_from_textgrid(fpath)
+            cached = (mtime, result)
+            with self._lock:
+                self._textgrids[key] = cached
+        return {name: list(times) for name, times in cached[1].items()}
+
+    def _prefetch_one(self, fpath):
+        try:
+            entry = self._load_audio(fpath)
+            for is_vad_mode in (False, True):
+                self.textgrid(fpath, is_vad_mode)
+                suffix = "_vad" if is_vad_mode else ""
+                for txt_path in (os.path.splitext(fpath)[0] + f"{suffix}.txt",
+                                 os.path.join(os.path.dirname(fpath), f"params{suffix}.txt")):
+                    if os.path.exists(txt_path):
+                        try:
+                            read_params_file(txt_path)
+                        except ParamsError:
+                            pass  # 打开文件时再报告
+            return entry
+        except Exception as e:
+            sot_logger.warning(f"Prefetch failed for {fpath}: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(fpath, None)
+
+    def prefetch(self, fpaths):
+        """在后台线程中依次预读音频及其TextGrid和参数文件
+
+        已缓存（且未修改）或正在预读的文件会被跳过。
+
+        Args:
+            fpaths: 音频文件路径列表，按优先级排列
+        """
+        for fpath in fpaths:
+            with self._lock:
+                entry = self._audio.get(fpath)
+                if fpath in self._pending or (entry is not None and entry[0] == _mtime(fpath)):
+                    continue
+                self._pending[fpath] = self._executor.submit(self._prefetch_one, fpath)
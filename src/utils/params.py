@@ -0,0 +1,202 @@
+import ast
+import copy
+import math
+import os
+import threading
+
+from src.utils.resources import get_resource_path
+
+
+# 参数名 -> 类型；参数文件中的值为数字的字符串（滑块输入框中的文字），检测前转换成数字
+PARAM_TYPES = {
+    "amp": float,
+    "cutoff0": float,
+    "cutoff1": float,
+    "numValid": int,
+    "win_size": int,
+    "ratio": float,
+    "penalty": float,
+    "ref_len": int,
+    "eps_ratio": float,
+}
+
+PARAM_SECTIONS = ("onset", "offset")
+
+_params_cache = {}  # 路径 -> (修改时间, 文件大小, 参数字典)
+_params_cache_lock = threading.Lock()
+
+
+class ParamsError(ValueError):
+    """参数文件格式或参数值无效"""
+
+
+def parse_param_value(name, value):
+    """把单个参数值转换成数字
+
+    字符串按Python字面量解析（ast.literal_eval，不执行任何代码），结果与原来的eval相同：
+    "4"为int，"0.97"为float。整数类型的参数也接受整数值的浮点数（如"475.0"）。
+
+    Args:
+        name: 参数名，见PARAM_TYPES
+        value: 字符串或数字
+
+    Returns:
+        int或float
+    """
+    number = value
+    if isinstance(value, str):
+        try:
+            number = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            raise ParamsError(f"{name}: {value!r} is not a number") from None
+    if isinstance(number, bool) or not isinstance(number, (int, float)) or not math.isfinite(number):
+        raise ParamsError(f"{name}: {value!r} is not a finite number")
+    if PARAM_TYPES.get(name) is int and not isinstance(number, int):
+        if not number.is_integer():
+            raise ParamsError(f"{name}: {value!r} must be an integer")
+        number = int(number)
+    return number
+
+
+def validate_params(params):
+    """检查参数字典的结构和参数值
+
+    参数字典为{"onset": {...}, "offset": {...}}，某一部分可以为空（不检测onset或offset）。
+
+    Args:
+        params: 参数字典
+
+    Returns:
+        params本身
+    """
+    if not isinstance(params, dict):
+        raise ParamsError(f"params must be a dict, got {type(params).__name__}")
+    for xset, section in params.items():
+        if xset not in PARAM_SECTIONS:
+            raise ParamsError(f"unknown section {xset!r} (expected 'onset' or 'offset')")
+        if not isinstance(section, dict):
+            raise ParamsError(f"{xset}: must be a dict, got {type(section).__name__}")
+        for name, value in section.items():
+            if name not in PARAM_TYPES:
+                raise ParamsError(f"{xset}: unknown parameter {name!r}")
+            try:
+                parse_param_value(name, value)
+            except ParamsError as e:
+                raise ParamsError(f"{xset}.{e}") from None
+    return params
+
+
+def parse_params(text):
+    """解析参数文件的内容（Python字典字面量，与getParams()写出的格式相同）
+
+    Args:
+        text: 文件内容
+
+    Returns:
+        参数字典（值保持文件中的原样，通常为字符串）
+    """
+    try:
+        params = ast.literal_eval(text.strip())
+    except (ValueError, SyntaxError) as e:
+        raise ParamsError(f"not a params dict: {e}") from None
+    return validate_params(params)
+
+
+def typed_params(params):
+    """把参数字典中的值转换成数字，用于检测
+
+    Args:
+        params: 参数字典，值为字符串或数字
+
+    Returns:
+        新的参数字典，值为int或float；不修改传入的字典
+    """
+    return {xset: {name: parse_param_value(name, value) for name, value in section.items()}
+            for xset, section in params.items()}
+
+
+def get_default_params_path(is_vad_mode=False):
+    """获取默认参数文件路径
+
+    Args:
+        is_vad_mode: 是否为VAD模式
+
+    Returns:
+        params.txt或params_vad.txt的路径
+    """
+    file_suffix = "_vad" if is_vad_mode else ""
+    return get_resource_path(f"src/app/params{file_suffix}.txt")
+
+
+def read_params_file(txt_file_path):
+    """读取参数文件
+
+    解析结果按路径、修改时间和文件大小缓存，文件没有改变时不再读取和解析。
+
+    Args:
+        txt_file_path: 参数文件路径
+
+    Returns:
+        参数字典（副本，可以修改）
+    """
+    stat = os.stat(txt_file_path)
+    with _params_cache_lock:
+        cached = _params_cache.get(txt_file_path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        with open(txt_file_path, "r") as txt_file:
+            try:
+                params = parse_params(txt_file.read())
+            except ParamsError as e:
+                raise ParamsError(f"{txt_file_path}: {e}") from None
+        cached = (stat.st_mtime_ns, stat.st_size, params)
+        with _params_cache_lock:
+            _params_cache[txt_file_path] = cached
+    return copy.deepcopy(cached[2])
+
+
+def params_path_candidates(audio_file_path, is_vad_mode=False):
+    """按照File→Folder→Default优先级列出音频文件可用的参数文件
+
+    Args:
+        audio_file_path: 音频文件路径
+        is_vad_mode: 是否为VAD模式
+
+    Returns:
+        存在的参数文件路径列表，最后一项总是默认参数文件
+    """
+    file_suffix = "_vad" if is_vad_mode else ""
+
+    # 文件同名参数
+    file_params_path = os.path.splitext(audio_file_path)[0] + f"{file_suffix}.txt"
+    # 文件夹参数
+    folder_params_path = os.path.join(os.path.dirname(audio_file_path), f"params{file_suffix}.txt")
+
+    candidates = [path for path in (file_params_path, folder_params_path) if os.path.exists(path)]
+    candidates.append(get_default_params_path(is_vad_mode))
+    return candidates
+
+
+def resolve_params_path(audio_file_path, is_vad_mode=False):
+    """按照File→Folder→Default优先级找到音频文件对应的参数文件
+
+    Args:
+        audio_file_path: 音频文件路径
+        is_vad_mode: 是否为VAD模式
+
+    Returns:
+        实际生效的参数文件路径
+    """
+    return params_path_candidates(audio_file_path, is_vad_mode)[0]
+
+
+def load_params(audio_file_path, is_vad_mode=False):
+    """按照File→Folder→Default优先级加载音频文件对应的参数
+
+    Args:
+        audio_file_path: 音频文件路径
+        is_vad_mode: 是否为VAD模式
+
+    Returns:
+        参数字典
+    """
+    return read_params_file(resolve_params_path(audio_file_path, is_vad_mode))
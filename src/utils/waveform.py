@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class WaveformPyramid:
+    """多分辨率的最小/最大值波形金字塔，用于快速绘制任意缩放级别的波形
+
+    第0层是原始采样点；第k层把原始音频按base**k个采样点分块，保存每块的最小值和最大值。
+    绘制时选择分块不超过每列采样点数的最粗一层，所以无论窗口多长，
+    取一列的最小/最大值只需要合并不到base块，总开销只与列数（像素）有关，且不会丢失峰值。
+
+    build()之前只有第0层，结果仍然正确，只是开销与窗口长度成正比；
+    build()可以在后台线程中运行，完成后一次性替换levels。
+    """
+
+    def __init__(self, samples, base=4):
+        """初始化波形金字塔
+
+        Args:
+            samples: 一维采样数组（不复制）
+            base: 相邻两层的分块倍数
+        """
+        self.samples = samples
+        self.base = base
+        self.levels = [(1, samples, samples)]  # (每块采样点数, 最小值, 最大值)
+
+    def build(self):
+        """逐层计算所有分块的最小值和最大值（每层由上一层合并得到，总开销O(n)）
+
+        Returns:
+            self
+        """
+        levels = [(1, self.samples, self.samples)]
+        block, mins, maxs = levels[0]
+        while len(mins) >= self.base * 2:
+            n_blocks = len(mins) // self.base
+            tail = len(mins) - n_blocks * self.base
+            new_mins = mins[:n_blocks * self.base].reshape(n_blocks, self.base).min(axis=1)
+            new_maxs = maxs[:n_blocks * self.base].reshape(n_blocks, self.base).max(axis=1)
+            if tail:  # 末尾不足一块的部分单独成块
+                new_mins = np.append(new_mins, mins[-tail:].min())
+                new_maxs = np.append(new_maxs, maxs[-tail:].max())
+            block, mins, maxs = block * self.base, new_mins, new_maxs
+            levels.append((block, mins, maxs))
+        self.levels = levels
+        return self
+
+    @property
+    def nbytes(self):
+        """金字塔额外占用的内存（字节，不含原始采样）"""
+        return sum(mins.nbytes + maxs.nbytes for _, mins, maxs in self.levels[1:])
+
+    def minmax(self, start, stop, samples_per_column):
+        """计算[start, stop)内每一列的最小值和最大值
+
+        第i列覆盖采样点[start + i*samples_per_column, start + (i+1)*samples_per_column)。
+        使用分块时，列的边界对齐到所在层的分块边界，误差小于一个分块（不超过一列）。
+
+        Args:
+            start: 起始采样点
+            stop: 结束采样点（不含）
+            samples_per_column: 每列的采样点数（正整数）
+
+        Returns:
+            (mins, maxs)两个数组，长度为ceil((stop - start) / samples_per_column)
+        """
+        start = max(int(start), 0)
+        stop = min(int(stop), len(self.samples))
+        if stop <= start:
+            return self.samples[:0], self.samples[:0]
+
+        levels = self.levels  # build()可能在另一线程中替换levels
+        block, mins, maxs = levels[0]
+        for level in levels:
+            if level[0] > samples_per_column:
+                break
+            block, mins, maxs = level
+
+        first = start // block
+        end = -(-stop // block)  # 包含stop所在的分块
+        window_mins = mins[first:end]
+        window_maxs = maxs[first:end]
+        # 每列在该层中的起始分块；相邻两列落在同一分块时reduceat返回该分块的值
+        edges = np.minimum(np.arange(start, stop, samples_per_column) // block - first, len(window_mins) - 1)
+        return np.minimum.reduceat(window_mins, edges), np.maximum.reduceat(window_maxs, edges)